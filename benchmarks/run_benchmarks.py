@@ -0,0 +1,398 @@
+"""Times the hot paths of the board on a fixed set of positions and games
+
+Run from the repository root:
+
+    PYTHONPATH=src python benchmarks/run_benchmarks.py --output results.json
+    PYTHONPATH=src python benchmarks/run_benchmarks.py --compare baseline.json --threshold 10
+
+Every benchmark is run several times and the fastest run is kept, which is the least disturbed by
+whatever else the machine is doing. Boards are made without a move cache, so move generation is timed
+rather than cache lookups.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from typing import Callable
+
+from fianchetto import BoardManager, Move
+from fianchetto.core.notation import san_to_move
+from fianchetto.core.perft import perft
+from fianchetto.engine.mcts import ROLLOUT_POLICIES, playout
+
+try:
+    from fianchetto.data.batch import BoardBatch
+except ImportError:
+    BoardBatch = None
+
+# Start position, Kiwipete, and the en passant, promotion and castling test positions
+POSITIONS = ["rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+             "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+             "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+             "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+             "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8"]
+
+# (position, depth, expected nodes)
+PERFT = [(0, 3, 8902), (1, 2, 2039), (2, 3, 2812), (3, 2, 264), (4, 2, 1486)]
+
+# Games replayed from the start position
+GAMES = {"opera" : "e4 e5 Nf3 d6 d4 Bg4 dxe5 Bxf3 Qxf3 dxe5 Bc4 Nf6 Qb3 Qe7 Nc3 c6 Bg5 b5 Nxb5 cxb5 Bxb5+ "
+                   "Nbd7 O-O-O Rd8 Rxd7 Rxd7 Rd1 Qe6 Bxd7+ Nxd7 Qb8+ Nxb8 Rd8#",
+         "immortal" : "e4 e5 f4 exf4 Bc4 Qh4+ Kf1 b5 Bxb5 Nf6 Nf3 Qh6 d3 Nh5 Nh4 Qg5 Nf5 c6 g4 Nf6 Rg1 cxb5 h4 "
+                      "Qg6 h5 Qg5 Qf3 Ng8 Bxf4 Qf6 Nc3 Bc5 Nd5 Qxb2 Bd6 Bxg1 e5 Qxa1+ Ke2 Na6 Nxg7+ Kd8 Qf6+ "
+                      "Nxf6 Be7#"}
+
+PIECES = ("Pawn", "Knight", "Bishop", "Rook", "Queen", "King")
+
+
+def load(fen: str) -> BoardManager:
+    """Returns a board set to a position"""
+    game = BoardManager()
+    game.load_fen(fen)
+    return game
+
+
+def game_moves(sans: str) -> list[Move]:
+    """Turns a game in SAN into moves played from the start position"""
+    game = load(POSITIONS[0])
+    moves = []
+    for san in sans.split():
+        move = Move(*san_to_move(san, game))
+        game.make_move(move)
+        moves.append(move)
+
+    return moves
+
+
+def measure(run: Callable[[], int], setup: Callable[[], None] | None = None, repeat: int = 5) -> dict:
+    """Times a benchmark
+
+    Args:
+        run (Callable): The timed work, returns how many operations it did
+        setup (Callable | None): Untimed preparation before every run
+        repeat (int): Number of runs
+
+    Return:
+        The fastest and mean run time in seconds, the operations per run and the operations per second
+    """
+    times = []
+    ops = 0
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+
+        start = time.perf_counter()
+        ops = run()
+        times.append(time.perf_counter() - start)
+
+    best = min(times)
+    return {"seconds" : best,
+            "mean" : sum(times) / len(times),
+            "ops" : ops,
+            "ops_per_second" : ops / best if best else None}
+
+
+def _pieces(game: BoardManager, kind: str | None = None) -> list[tuple]:
+    """Lists (piece, square) for every piece, or only those of one kind"""
+    return [(piece, (x, y)) for x, column in enumerate(game.board) for y, piece in enumerate(column)
+            if piece is not None and (kind is None or type(piece).__name__ == kind)]
+
+
+def bench_move(repeat: int) -> dict:
+    """BoardManager.move, which validates every move, over the fixed games"""
+    games = [game_moves(sans) for sans in GAMES.values()]
+    boards = []
+
+    def setup():
+        boards[:] = [load(POSITIONS[0]) for _ in games]
+
+    def run():
+        for game, moves in zip(boards, games):
+            for move in moves:
+                game.move(move.start, move.end, move.promotion)
+
+        return sum(len(moves) for moves in games)
+
+    return measure(run, setup, repeat)
+
+
+def bench_generate_valid_moves(kind: str, repeat: int) -> dict:
+    """Piece.generate_valid_moves for every piece of one kind in every position"""
+    games = [load(fen) for fen in POSITIONS]
+    work = [(game, piece, square) for game in games for piece, square in _pieces(game, kind)]
+
+    def run():
+        for game, piece, square in work:
+            piece.generate_valid_moves(square, game)
+
+        return len(work)
+
+    return measure(run, repeat=repeat)
+
+
+def bench_in_check(repeat: int) -> dict:
+    """King.in_check for both kings of every position"""
+    games = [load(fen) for fen in POSITIONS]
+    work = [(game, piece) for game in games for piece, _ in _pieces(game, "King")]
+
+    def run():
+        for _ in range(20):
+            for game, king in work:
+                king.in_check(game)
+
+        return 20 * len(work)
+
+    return measure(run, repeat=repeat)
+
+
+def bench_remove_checks(repeat: int) -> dict:
+    """Piece._remove_checks on the moves of every piece of the side to move, one call per candidate move"""
+    work = []
+    for fen in POSITIONS:
+        game = load(fen)
+        for piece, square in _pieces(game):
+            if piece.color == game.to_move:
+                work.append((game, piece, square, piece.generate_valid_moves(square, game)))
+
+    def run():
+        for game, piece, square, moves in work:
+            piece._remove_checks(square, moves, game)
+
+        return sum(len(moves) for *_, moves in work)
+
+    return measure(run, repeat=repeat)
+
+
+def bench_perft(index: int, depth: int, expected: int, repeat: int) -> dict:
+    """Perft to a fixed depth, which also checks the node count"""
+    game = load(POSITIONS[index])
+
+    def run():
+        nodes = perft(game, depth)
+        if nodes != expected:
+            raise AssertionError(f"perft({POSITIONS[index]}, {depth}) gave {nodes} nodes, expected {expected}")
+
+        return nodes
+
+    return measure(run, repeat=repeat)
+
+
+def bench_replay(sans: str, repeat: int) -> dict:
+    """BoardManager.apply_moves replaying a whole game"""
+    moves = game_moves(sans)
+    board = []
+
+    def setup():
+        board[:] = [load(POSITIONS[0])]
+
+    def run():
+        return board[0].apply_moves(moves)
+
+    return measure(run, setup, repeat)
+
+
+def bench_playouts(policy: str, repeat: int) -> dict:
+    """Seeded MCTS playouts from the start position and Kiwipete, operations are playouts"""
+    games = [load(POSITIONS[0]), load(POSITIONS[1])]
+
+    def run():
+        rng = random.Random(0)
+        for _ in range(10):
+            for game in games:
+                playout(game, rng, ROLLOUT_POLICIES[policy])
+
+        return 10 * len(games)
+
+    return measure(run, repeat=repeat)
+
+
+def bench_batch(repeat: int) -> dict:
+    """BoardBatch attacks, check flags and move counts for 200 copies of each position, operations are boards"""
+    batch = BoardBatch.from_boards([load(fen) for fen in POSITIONS] * 200)
+
+    def run():
+        batch.attacks(0)
+        batch.attacks(1)
+        batch.in_check()
+        batch.pseudo_legal_counts()
+        return len(batch)
+
+    return measure(run, repeat=repeat)
+
+
+def benchmarks(repeat: int) -> dict[str, Callable[[], dict]]:
+    """Returns every benchmark by name, not yet run"""
+    suite = {"BoardManager.move" : lambda: bench_move(repeat)}
+    for kind in PIECES:
+        suite[f"{kind}.generate_valid_moves"] = lambda kind=kind: bench_generate_valid_moves(kind, repeat)
+
+    suite["King.in_check"] = lambda: bench_in_check(repeat)
+    suite["Piece._remove_checks"] = lambda: bench_remove_checks(repeat)
+    for index, depth, expected in PERFT:
+        suite[f"perft.{index}.depth{depth}"] = \
+            lambda index=index, depth=depth, expected=expected: bench_perft(index, depth, expected, repeat)
+
+    for name, sans in GAMES.items():
+        suite[f"replay.{name}"] = lambda sans=sans: bench_replay(sans, repeat)
+
+    for policy in ROLLOUT_POLICIES:
+        suite[f"mcts.playout.{policy}"] = lambda policy=policy: bench_playouts(policy, repeat)
+
+    # Needs NumPy
+    if BoardBatch is not None:
+        suite["BoardBatch.counts"] = lambda: bench_batch(repeat)
+
+    return suite
+
+
+def _git_commit() -> tuple[str | None, bool | None]:
+    """Returns the commit of the checkout and whether it has uncommitted changes, or None outside git"""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=directory, capture_output=True, text=True,
+                                check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=directory,
+                                capture_output=True, text=True, check=True).stdout
+
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+    return commit, bool(status.strip())
+
+
+def _package_version() -> str | None:
+    try:
+        from importlib.metadata import PackageNotFoundError, version
+
+    except ImportError:
+        return None
+
+    try:
+        return version("fianchetto")
+
+    except PackageNotFoundError:
+        return None
+
+
+def environment(repeat: int) -> dict:
+    """Describes the machine and checkout the results come from"""
+    commit, dirty = _git_commit()
+    return {"timestamp" : datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python" : platform.python_version(),
+            "implementation" : platform.python_implementation(),
+            "platform" : platform.platform(),
+            "machine" : platform.machine(),
+            "processor" : platform.processor(),
+            "cpu_count" : os.cpu_count(),
+            "fianchetto" : _package_version(),
+            "commit" : commit,
+            "dirty" : dirty,
+            "repeat" : repeat}
+
+
+def run(repeat: int = 5, only: list[str] | None = None, progress=None) -> dict:
+    """Runs the suite
+
+    Args:
+        repeat (int): Runs of every benchmark, the fastest is kept
+        only (list[str] | None): Run only the benchmarks whose name contains one of these
+        progress (TextIO | None): Where a line is written as each benchmark finishes
+
+    Return:
+        {"environment" : metadata, "benchmarks" : {name : timings}}
+    """
+    results = {}
+    for name, bench in benchmarks(repeat).items():
+        if only and not any(part in name for part in only):
+            continue
+
+        results[name] = bench()
+        if progress is not None:
+            progress.write(f"{name:32} {results[name]['seconds'] * 1000:10.3f} ms\n")
+            progress.flush()
+
+    return {"environment" : environment(repeat), "benchmarks" : results}
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> tuple[list[tuple], list[str]]:
+    """Compares the fastest times of two result files
+
+    Args:
+        baseline (dict): Stored results
+        current (dict): New results
+        threshold (float): Slowdown in percent above which a benchmark counts as a regression
+
+    Return:
+        ([(name, baseline seconds, current seconds, change in percent, regressed)], names of regressions)
+    """
+    rows = []
+    regressions = []
+    for name, timing in current["benchmarks"].items():
+        before = baseline["benchmarks"].get(name)
+        if before is None or not before["seconds"]:
+            continue
+
+        change = (timing["seconds"] - before["seconds"]) / before["seconds"] * 100
+        regressed = change > threshold
+        rows.append((name, before["seconds"], timing["seconds"], change, regressed))
+        if regressed:
+            regressions.append(name)
+
+    return rows, regressions
+
+
+def report(rows: list[tuple], threshold: float, output=sys.stdout) -> None:
+    """Writes a comparison as a table"""
+    output.write(f"{'benchmark':32} {'baseline ms':>12} {'current ms':>12} {'change':>9}\n")
+    for name, before, after, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        output.write(f"{name:32} {before * 1000:12.3f} {after * 1000:12.3f} {change:+8.1f}%{flag}\n")
+
+    output.write(f"Threshold {threshold:.1f}%\n")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Times the board hot paths and compares against a baseline")
+    parser.add_argument("--output", "-o", help="write the results as JSON to this file instead of stdout")
+    parser.add_argument("--repeat", type=int, default=5, help="runs of every benchmark, the fastest is kept")
+    parser.add_argument("--only", action="append", help="run only the benchmarks whose name contains this")
+    parser.add_argument("--results", help="compare this stored results file instead of running the suite")
+    parser.add_argument("--compare", metavar="BASELINE", help="flag regressions against this results file")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="slowdown in percent that counts as a regression (default 10)")
+    args = parser.parse_args(argv)
+
+    if args.results:
+        with open(args.results) as stream:
+            current = json.load(stream)
+
+    else:
+        current = run(args.repeat, args.only, progress=sys.stderr)
+        text = json.dumps(current, indent=2)
+        if args.output:
+            with open(args.output, "w") as stream:
+                stream.write(text + "\n")
+
+        elif not args.compare:
+            print(text)
+
+    if args.compare:
+        with open(args.compare) as stream:
+            baseline = json.load(stream)
+
+        rows, regressions = compare(baseline, current, args.threshold)
+        report(rows, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
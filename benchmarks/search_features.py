@@ -0,0 +1,95 @@
+"""Measures what each search feature saves and what it costs on a fixed set of positions
+
+Run from the repository root:
+
+    PYTHONPATH=src python benchmarks/search_features.py --depth 3
+
+Every position is searched to a fixed depth with all features on, all off, and with each feature on its
+own and switched off on its own. The report gives the nodes, the time, the node reduction against
+searching with everything off and how many of the best moves of the test positions were found. For the
+effect on playing strength, play the configurations against each other, for example:
+
+    fianchetto tournament --first all --second no-lmr:lmr=false --games 200 --nodes 5000
+"""
+import argparse
+import json
+import sys
+import time
+
+from fianchetto import BoardManager, Move
+from fianchetto.core.notation import san_to_move
+from fianchetto.engine import Searcher, SearchLimits
+
+FEATURES = ("pvs", "aspiration", "null_move", "lmr", "futility")
+
+# (FEN, best move in SAN), tactics that are found at shallow depths
+POSITIONS = [("r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4", "Qxf7#"),
+             ("6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1", "Rd8#"),
+             ("4k3/8/8/3q4/8/8/8/3RK3 w - - 0 1", "Rxd5"),
+             ("r1bqkbnr/pppp1ppp/2n5/4p3/2B1P3/5Q2/PPPP1PPP/RNB1K1NR w KQkq - 2 3", "Qxf7#"),
+             ("6k1/8/8/8/8/8/1q6/1R4K1 b - - 0 1", "Qxb1+"),
+             ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", None),
+             ("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1", None)]
+
+
+def configurations() -> dict[str, dict]:
+    """Returns the Searcher options of every configuration by name"""
+    configs = {"all" : {feature : True for feature in FEATURES},
+               "none" : {feature : False for feature in FEATURES}}
+    for feature in FEATURES:
+        configs[f"only-{feature}"] = {other : other == feature for other in FEATURES}
+        configs[f"no-{feature}"] = {other : other != feature for other in FEATURES}
+
+    return configs
+
+
+def run_configuration(options: dict, depth: int) -> dict:
+    """Searches every position with one configuration
+
+    Return:
+        Total nodes and seconds, and the number of positions whose best move was found out of those that
+        have one
+    """
+    nodes = 0
+    seconds = 0.0
+    solved = 0
+    for fen, best in POSITIONS:
+        game = BoardManager()
+        game.load_fen(fen)
+        expected = None if best is None else Move(*san_to_move(best, game))
+        start = time.perf_counter()
+        result = Searcher(**options).search(game, SearchLimits(depth=depth))
+        seconds += time.perf_counter() - start
+        nodes += result.nodes
+        if expected is not None and result.best_move == expected:
+            solved += 1
+
+    return {"nodes" : nodes, "seconds" : seconds, "solved" : solved}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Reports the node savings of each search feature")
+    parser.add_argument("--depth", type=int, default=3, help="depth every position is searched to")
+    parser.add_argument("--output", "-o", help="also write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    results = {name : run_configuration(options, args.depth) for name, options in configurations().items()}
+    baseline = results["none"]["nodes"]
+    tests = sum(1 for _, best in POSITIONS if best is not None)
+    print(f"{'configuration':20} {'nodes':>9} {'reduction':>10} {'seconds':>9} {'solved':>7}")
+    for name, result in results.items():
+        reduction = (1 - result["nodes"] / baseline) * 100 if baseline else 0.0
+        result["reduction"] = reduction
+        print(f"{name:20} {result['nodes']:9} {reduction:9.1f}% {result['seconds']:9.2f} "
+              f"{result['solved']:>3}/{tests}")
+
+    if args.output:
+        with open(args.output, "w") as stream:
+            json.dump({"depth" : args.depth, "configurations" : results}, stream, indent=2)
+            stream.write("\n")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
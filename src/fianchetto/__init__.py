@@ -1 +1 @@
-from .core import BoardManager
\ No newline at end of file
+from .core import BoardManager, IllegalMoveError, InvalidPositionError, Move
\ No newline at end of file
@@ -0,0 +1,50 @@
+import argparse
+import sys
+
+from fianchetto.core.pgn import PgnGame
+from fianchetto.engine.annotate import annotate_pgn
+from .tournament import engine_config
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Adds the options of the annotate command to a parser"""
+    parser.add_argument("input", help="PGN archive to annotate")
+    parser.add_argument("output", help="Where the annotated PGN is written")
+    parser.add_argument("--checkpoint", default=None,
+                        help="Progress file used to resume a killed run, defaults to the output with .checkpoint")
+    parser.add_argument("--engine", type=engine_config, default="engine", help='Engine options as "name:option=value,..."')
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes, defaults to one per CPU")
+    parser.add_argument("--queue-size", type=int, default=None,
+                        help="Positions searched at once, defaults to four per worker")
+    parser.add_argument("--nodes", type=int, default=None, help="Nodes per position")
+    parser.add_argument("--movetime", type=int, default=None, help="Milliseconds per position")
+    parser.add_argument("--depth", type=int, default=None, help="Depth per position")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Print every game as it is written")
+
+
+def run(args: argparse.Namespace) -> int:
+    """Annotates the archive described by the parsed arguments"""
+    options = args.engine.options
+    nodes = args.nodes
+    if nodes is None and args.movetime is None and args.depth is None:
+        nodes = 5000
+
+    movetime = None if args.movetime is None else args.movetime / 1000
+    checkpoint = args.checkpoint or f"{args.output}.checkpoint"
+
+    def progress(written: int, pgn_game: PgnGame) -> None:
+        if args.verbose:
+            white = pgn_game.headers.get("White", "?")
+            black = pgn_game.headers.get("Black", "?")
+            sys.stderr.write(f"{written}: {white} - {black} {pgn_game.result}\n")
+
+    try:
+        games = annotate_pgn(args.input, args.output, checkpoint, args.workers, args.queue_size, nodes,
+                             movetime, args.depth, options, progress)
+
+    except (OSError, ValueError) as e:
+        sys.stderr.write(f"{e}\n")
+        return 1
+
+    sys.stdout.write(f"Annotated {games} games into {args.output}\n")
+    return 0
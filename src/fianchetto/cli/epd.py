@@ -0,0 +1,53 @@
+import argparse
+import os
+import sys
+
+from fianchetto.engine.epd import EpdResult, SuiteSummary, load_epd, run_suite, summarize
+from .tournament import engine_config
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Adds the options of the epd command to a parser"""
+    parser.add_argument("suites", nargs="+", help="EPD files with bm or am operations")
+    parser.add_argument("--engine", type=engine_config, default="engine", help='Engine options as "name:option=value,..."')
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes, defaults to one per CPU")
+    parser.add_argument("--nodes", type=int, default=None, help="Nodes per position")
+    parser.add_argument("--movetime", type=int, default=None, help="Milliseconds per position")
+    parser.add_argument("--depth", type=int, default=None, help="Depth per position")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Print every position as it finishes")
+
+
+def report(summary: SuiteSummary) -> str:
+    """Formats the totals of one suite"""
+    average = "-" if summary.average_solution_time is None else f"{summary.average_solution_time:.2f}s"
+    return (f"{summary.name}: solved {summary.solved}/{summary.total}, "
+            f"average time to solution {average}, {summary.nodes_per_second:.0f} nodes/s\n")
+
+
+def run(args: argparse.Namespace) -> int:
+    """Runs the suites described by the parsed arguments"""
+    options = args.engine.options
+    nodes = args.nodes
+    if nodes is None and args.movetime is None and args.depth is None:
+        nodes = 5000
+
+    movetime = None if args.movetime is None else args.movetime / 1000
+
+    def progress(result: EpdResult) -> None:
+        if args.verbose:
+            mark = "ok" if result.solved else "--"
+            sys.stderr.write(f"{mark} {result.id or result.index + 1}: {result.move} "
+                             f"({result.seconds:.2f}s, {result.nodes} nodes)\n")
+
+    for path in args.suites:
+        try:
+            records = load_epd(path)
+
+        except (OSError, ValueError) as e:
+            sys.stderr.write(f"{e}\n")
+            return 1
+
+        results = run_suite(records, args.workers, nodes, movetime, args.depth, options, progress)
+        sys.stdout.write(report(summarize(os.path.basename(path), results)))
+
+    return 0
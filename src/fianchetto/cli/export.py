@@ -0,0 +1,51 @@
+import argparse
+import sys
+
+from .tournament import engine_config
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Adds the options of the export command to a parser"""
+    parser.add_argument("inputs", nargs="+", help="PGN files to export")
+    parser.add_argument("--output", "-o", required=True, help="Directory the shards are written to")
+    parser.add_argument("--shard-size", type=int, default=65536, help="Positions per shard")
+    parser.add_argument("--sample", type=float, default=1.0, help="Chance of keeping each position")
+    parser.add_argument("--skip-plies", type=int, default=0, help="Opening plies of every game that are never kept")
+    parser.add_argument("--planes", action="store_true", help="Write 8 x 8 planes instead of bitboards")
+    parser.add_argument("--compress", action="store_true", help="Compress the shards")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the sampling")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes, defaults to one per CPU")
+    parser.add_argument("--engine", type=engine_config, default="engine", help='Engine options as "name:option=value,..."')
+    parser.add_argument("--nodes", type=int, default=None, help="Nodes to search each position for its eval")
+    parser.add_argument("--movetime", type=int, default=None, help="Milliseconds to search each position")
+    parser.add_argument("--depth", type=int, default=None, help="Depth to search each position")
+
+
+def run(args: argparse.Namespace) -> int:
+    """Exports the files described by the parsed arguments"""
+    try:
+        from fianchetto.data.export import export_training_data
+
+    except ImportError:
+        sys.stderr.write("Exporting training data needs NumPy, pip install fianchetto[numpy]\n")
+        return 1
+
+    settings = {"shard_size" : args.shard_size,
+                "sample_rate" : args.sample,
+                "skip_plies" : args.skip_plies,
+                "encoding" : "planes" if args.planes else "bitboards",
+                "seed" : args.seed,
+                "compress" : args.compress,
+                "nodes" : args.nodes,
+                "movetime" : None if args.movetime is None else args.movetime / 1000,
+                "depth" : args.depth,
+                "options" : args.engine.options}
+    try:
+        positions = export_training_data(args.inputs, args.output, args.workers, **settings)
+
+    except (OSError, ValueError) as e:
+        sys.stderr.write(f"{e}\n")
+        return 1
+
+    sys.stdout.write(f"Exported {positions} positions into {args.output}\n")
+    return 0
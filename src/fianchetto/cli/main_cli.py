@@ -1,13 +1,58 @@
-from fianchetto.core.board_manager import BoardManager
+import argparse
+import sys
+from typing import Iterable, Iterator, TextIO
+
+from fianchetto.core.board_manager import BoardManager, IllegalMoveError, Move
+from fianchetto.core.notation import san_to_move, uci_to_move
 from fianchetto.core.pieces import Color
+from . import annotate, epd, export, tournament
 
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
 
 
-def main():
-    game = BoardManager()
-    if main_menu(game):
-        keep_going = True
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="fianchetto", description="Play chess in the terminal")
+    parser.add_argument("--moves-file", help="Play the moves in this file without asking anything, - reads stdin")
+    parser.add_argument("--fen", default=START_FEN, help="Position the scripted moves start from")
+    parser.add_argument("--render", action="store_true", help="Draw the board after every scripted move")
+    commands = parser.add_subparsers(dest="command")
+    tournament.add_arguments(commands.add_parser("tournament", help="Play engine games against each other"))
+    epd.add_arguments(commands.add_parser("epd", help="Solve EPD test suites"))
+    annotate.add_arguments(commands.add_parser("annotate", help="Annotate a PGN archive with engine scores"))
+    export.add_arguments(commands.add_parser("export", help="Export PGN positions as NumPy training shards"))
+    args = parser.parse_args(argv)
+
+    if args.command == "tournament":
+        return tournament.run(args)
+
+    if args.command == "epd":
+        return epd.run(args)
+
+    if args.command == "annotate":
+        return annotate.run(args)
+
+    if args.command == "export":
+        return export.run(args)
+
+    if args.moves_file is not None:
+        if args.moves_file == "-":
+            return run_script(sys.stdin, args.fen, args.render)
+
+        with open(args.moves_file) as stream:
+            return run_script(stream, args.fen, args.render)
+
+    play()
+    return 0
 
+
+def play():
+    """Runs interactive games until the player leaves from the main menu"""
+    while True:
+        game = BoardManager()
+        if not main_menu(game):
+            return
+
+        keep_going = True
         while keep_going:
             print_board(game)
             alg_move = input("Please enter a move by entering the starting and ending coordinates seprataed by commas (Ex: g1, f3): ")
@@ -35,7 +80,96 @@ def main():
                 continue
 
 
-    main()
+def run_script(stream: TextIO, fen: str = START_FEN, render: bool = False, output: TextIO | None = None,
+               errors: TextIO | None = None) -> int:
+    """Plays a list of moves without any prompts and writes the final position as a FEN
+
+    Moves may be given as "g1, f3" one per line, or as UCI ("g1f3") or SAN ("Nf3") separated by spaces.
+    Anything after a # on a line is ignored.
+
+    Args:
+        stream (TextIO): Where the moves are read from
+        fen (str): Starting position
+        render (bool): Draw the board after every move
+        output (TextIO | None): Where positions are written, stdout by default
+        errors (TextIO | None): Where errors are written, stderr by default
+
+    Return:
+        0 if every move was played, 1 otherwise
+    """
+    output = output or sys.stdout
+    errors = errors or sys.stderr
+    game = BoardManager()
+    try:
+        game.load_fen(fen)
+
+    except ValueError as e:
+        errors.write(f"{e}\n")
+        return 1
+
+    tokens = list(_script_tokens(stream))
+
+    def moves() -> Iterator[Move]:
+        for token in tokens:
+            if render:
+                output.write(board_frame(game))
+
+            yield parse_move(token, game)
+
+    try:
+        game.apply_moves(moves())
+
+    except IllegalMoveError as e:
+        errors.write(f"Move {e.ply + 1} ({tokens[e.ply]}): {e.reason}\n")
+        return 1
+
+    except ValueError as e:
+        played = len(game.history)
+        errors.write(f"Move {played + 1} ({tokens[played]}): {e}\n")
+        return 1
+
+    if render:
+        output.write(board_frame(game))
+
+    output.write(f"{game.to_fen()}\n")
+    return 0
+
+
+def _script_tokens(lines: Iterable[str]) -> Iterator[str]:
+    """Splits a move script into one string per move"""
+    for line in lines:
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+
+        if "," in line:
+            yield line
+
+        else:
+            yield from line.split()
+
+
+def parse_move(text: str, game: BoardManager) -> Move:
+    """Reads a move written as "g1, f3", in UCI or in SAN
+
+    Args:
+        text (str): The move
+        game (BoardManager): Position the move is played in, needed for SAN
+
+    Return:
+        The move, promotions left as None become queens when played
+    """
+    if "," in text:
+        squares = alg_to_coord(text)
+        if len(squares) != 2:
+            raise ValueError("Please use the correct format for the move. (See example)")
+
+        return Move(squares[0], squares[1])
+
+    if len(text) in (4, 5) and text[0] in "abcdefgh" and text[1].isdigit() and text[2] in "abcdefgh":
+        return Move(*uci_to_move(text))
+
+    return Move(*san_to_move(text, game))
 
 
 def main_menu(game: BoardManager):
@@ -51,7 +185,7 @@ def main_menu(game: BoardManager):
         
         elif ans.lower() == "n":
             print("")
-            return quit()
+            return False
         
         else:
             keep_going = True
@@ -92,20 +226,24 @@ def alg_to_coord(alg_move: str) -> list[tuple[int, int]]:
     return moves
 
 def print_board(game: BoardManager):
-    print()
-    print("type RESET as your move at any time to head back to the main menu")
+    """Draws the board with a single write so the frame never shows half drawn"""
+    sys.stdout.write("\ntype RESET as your move at any time to head back to the main menu\n" + board_frame(game))
+    sys.stdout.flush()
+
+def board_frame(game: BoardManager) -> str:
+    """Returns the board as text seen from the side to move"""
     if game.to_move == Color.WHITE:
-        print_white_side(game)
+        return white_side(game)
 
     else:
-        print_black_side(game)
-
-def print_white_side(game: BoardManager):
-    print()
-    print("      White to move     ")
-    print("________________________")
-    print("  a  b  c  d  e  f  g  h")
-    print("  |  |  |  |  |  |  |  | ")
+        return black_side(game)
+
+def white_side(game: BoardManager) -> str:
+    lines = ["",
+             "      White to move     ",
+             "________________________",
+             "  a  b  c  d  e  f  g  h",
+             "  |  |  |  |  |  |  |  | "]
     for i in range(8):
         line = "[ "
         for j in range(8):
@@ -114,16 +252,17 @@ def print_white_side(game: BoardManager):
             else:
                 line += f"{game.board[j][7 - i]} "
 
-        print(f"{line}] - {8 - i}")
+        lines.append(f"{line}] - {8 - i}")
 
-    print("________________________")
+    lines.append("________________________")
+    return "\n".join(lines) + "\n"
 
-def print_black_side(game):
-    print()
-    print("      Black to move     ")
-    print("________________________")
-    print("  h  g  f  e  d  c  b  a")
-    print("  |  |  |  |  |  |  |  | ")
+def black_side(game: BoardManager) -> str:
+    lines = ["",
+             "      Black to move     ",
+             "________________________",
+             "  h  g  f  e  d  c  b  a",
+             "  |  |  |  |  |  |  |  | "]
     for i in range(8):
         line = "[ "
         for j in range(8):
@@ -132,10 +271,11 @@ def print_black_side(game):
             else:
                 line += f"{game.board[7 - j][i]} "
 
-        print(f"{line}] - {i + 1}")
+        lines.append(f"{line}] - {i + 1}")
 
-    print("________________________")
+    lines.append("________________________")
+    return "\n".join(lines) + "\n"
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,82 @@
+import argparse
+import sys
+
+from fianchetto.engine.tournament import (EngineConfig,
+                                          GameRecord,
+                                          elo_difference,
+                                          load_openings,
+                                          run_tournament,
+                                          score_of,
+                                          sprt)
+
+
+def engine_config(text: str) -> EngineConfig:
+    """Reads an engine argument, an option the searcher does not take is a usage error"""
+    try:
+        return EngineConfig.parse(text)
+
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Adds the options of the tournament command to a parser"""
+    parser.add_argument("--first", type=engine_config, default="first",
+                        help='Engine to test, "name" or "name:option=value,..."')
+    parser.add_argument("--second", type=engine_config, default="second",
+                        help="Engine to test against, same format as --first")
+    parser.add_argument("--openings", help="Opening suite, a PGN file or one FEN/EPD per line")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes, defaults to one per CPU")
+    parser.add_argument("--nodes", type=int, default=None, help="Nodes per move")
+    parser.add_argument("--movetime", type=int, default=None, help="Milliseconds per move")
+    parser.add_argument("--max-plies", type=int, default=400, help="Engine moves before a game is drawn")
+    parser.add_argument("--pgn", help="File the games are written to as they finish")
+    parser.add_argument("--elo0", type=float, default=0.0, help="Elo of the SPRT null hypothesis")
+    parser.add_argument("--elo1", type=float, default=5.0, help="Elo of the SPRT alternative hypothesis")
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+
+
+def report(records: list[GameRecord], name: str, elo0: float, elo1: float, alpha: float, beta: float) -> str:
+    """Formats the standings of the first engine"""
+    score = score_of(records, name)
+    elo, margin = elo_difference(score)
+    test = sprt(score, elo0, elo1, alpha, beta)
+    decision = {"H0" : f"H0 accepted (elo <= {elo0:g})",
+                "H1" : f"H1 accepted (elo >= {elo1:g})",
+                None : "continue"}[test.decision]
+    return (f"Games {score.games}: +{score.wins} -{score.losses} ={score.draws}\n"
+            f"Elo {elo:+.1f} +/- {margin:.1f}\n"
+            f"SPRT [{elo0:g}, {elo1:g}] LLR {test.llr:.2f} ({test.lower:.2f}, {test.upper:.2f}) {decision}\n")
+
+
+def run(args: argparse.Namespace) -> int:
+    """Plays the match described by the parsed arguments"""
+    first, second = args.first, args.second
+    openings = load_openings(args.openings) if args.openings else []
+    nodes = args.nodes
+    if nodes is None and args.movetime is None:
+        nodes = 2000
+
+    movetime = None if args.movetime is None else args.movetime / 1000
+
+    def progress(record: GameRecord) -> None:
+        sys.stderr.write(f"Game {record.index + 1}: {record.white} - {record.black} {record.result} "
+                         f"({record.reason})\n")
+
+    output = open(args.pgn, "w") if args.pgn else None
+    try:
+        records = run_tournament(first, second, openings, args.games, args.workers, nodes, movetime, output,
+                                 progress, args.max_plies)
+
+    except ValueError as e:
+        sys.stderr.write(f"{e}\n")
+        return 1
+
+    finally:
+        if output is not None:
+            output.close()
+
+    sys.stdout.write(report(records, first.name, args.elo0, args.elo1, args.alpha, args.beta))
+    return 0
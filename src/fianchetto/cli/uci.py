@@ -0,0 +1,267 @@
+import copy
+import sys
+import threading
+import time
+from typing import Callable, TextIO
+
+from fianchetto.core.board_manager import BoardManager, IllegalMoveError
+from fianchetto.core.notation import move_to_uci, uci_to_move
+from fianchetto.core.pieces import Color
+from fianchetto.engine.search import Searcher, SearchInfo, SearchLimits
+from fianchetto.engine.time_manager import TimeManager
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+_GO_NUMBERS = ("depth", "nodes", "movetime", "wtime", "btime", "winc", "binc", "movestogo")
+
+# UCI check options that switch search features on and off, by the Searcher attribute they set
+_SEARCH_OPTIONS = {"PVS" : "pvs",
+                   "AspirationWindows" : "aspiration",
+                   "NullMove" : "null_move",
+                   "LMR" : "lmr",
+                   "FutilityPruning" : "futility"}
+
+
+class UciEngine():
+    """Speaks the Universal Chess Interface to a GUI
+
+    Commands are passed to handle one line at a time. Searches run on a background thread so that stop,
+    ponderhit and isready are answered while the engine thinks.
+
+    Attributes:
+        game (BoardManager): Position set by the last position command
+        searcher (Searcher): The search used by go
+    """
+    def __init__(self, output: Callable[[str], None] | None = None):
+        """Creates an engine
+
+        Args:
+            output (Callable | None): Called with every line to send to the GUI, prints to stdout by default
+        """
+        self.game = BoardManager()
+        self.game.load_fen(START_FEN)
+        self.searcher = Searcher()
+        self._output = output or self._print
+        self._output_lock = threading.Lock()
+        self._thread = None
+        self._limits = None
+        self._go = {}
+        self._pondering = False
+        self._release = threading.Event()
+
+    @staticmethod
+    def _print(line: str) -> None:
+        print(line, flush=True)
+
+    def send(self, line: str) -> None:
+        """Sends one line to the GUI, safe to call from the search thread"""
+        with self._output_lock:
+            self._output(line)
+
+    def run(self, stream: TextIO = sys.stdin) -> None:
+        """Reads commands until quit or the end of the stream"""
+        for line in stream:
+            if not self.handle(line):
+                break
+
+        self._stop_search()
+
+    def handle(self, line: str) -> bool:
+        """Runs one command
+
+        Args:
+            line (str): The command as sent by the GUI
+
+        Return:
+            False once the engine should quit
+        """
+        tokens = line.split()
+        if not tokens:
+            return True
+
+        command = tokens[0]
+        if command == "uci":
+            self.send("id name FianchettoPy")
+            self.send("id author Agostino Imbimbo Parra")
+            self.send("option name Hash type spin default 16 min 1 max 1024")
+            self.send("option name Ponder type check default false")
+            for name, attribute in _SEARCH_OPTIONS.items():
+                default = "true" if getattr(self.searcher, attribute) else "false"
+                self.send(f"option name {name} type check default {default}")
+
+            self.send("uciok")
+
+        elif command == "isready":
+            self.send("readyok")
+
+        elif command == "ucinewgame":
+            self._stop_search()
+            self.searcher.tt.clear()
+
+        elif command == "setoption":
+            self._set_option(tokens[1:])
+
+        elif command == "position":
+            self._stop_search()
+            try:
+                self._position(tokens[1:])
+
+            except ValueError as e:
+                self.send(f"info string {e}")
+
+        elif command == "go":
+            self._stop_search()
+            self._start_search(tokens[1:])
+
+        elif command == "stop":
+            self._stop_search()
+
+        elif command == "ponderhit":
+            self._ponderhit()
+
+        elif command == "quit":
+            self._stop_search()
+            return False
+
+        return True
+
+    def wait(self) -> None:
+        """Blocks until the running search, if any, has sent its bestmove"""
+        if self._thread is not None:
+            self._thread.join()
+
+    def _set_option(self, tokens: list[str]) -> None:
+        """Handles "setoption name <name> value <value>" """
+        if "name" not in tokens or "value" not in tokens:
+            return
+
+        name = " ".join(tokens[tokens.index("name") + 1:tokens.index("value")]).lower()
+        value = " ".join(tokens[tokens.index("value") + 1:])
+        if name == "hash" and value.isdigit():
+            self._stop_search()
+            features = {attribute : getattr(self.searcher, attribute) for attribute in _SEARCH_OPTIONS.values()}
+            self.searcher = Searcher(int(value), **features)
+
+        for option, attribute in _SEARCH_OPTIONS.items():
+            if name == option.lower() and value.lower() in ("true", "false"):
+                self._stop_search()
+                setattr(self.searcher, attribute, value.lower() == "true")
+
+    def _position(self, tokens: list[str]) -> None:
+        """Handles "position startpos|fen <fen> [moves ...]" by replaying the moves on a new board"""
+        if "moves" in tokens:
+            split = tokens.index("moves")
+            setup, moves = tokens[:split], tokens[split + 1:]
+
+        else:
+            setup, moves = tokens, []
+
+        game = BoardManager()
+        if setup[:1] == ["startpos"]:
+            game.load_fen(START_FEN)
+
+        elif setup[:1] == ["fen"]:
+            game.load_fen(" ".join(setup[1:]))
+
+        else:
+            raise ValueError("position needs startpos or fen")
+
+        try:
+            game.apply_moves(uci_to_move(text) for text in moves)
+
+        except IllegalMoveError as e:
+            raise ValueError(f"{moves[e.ply]} is not legal") from e
+
+        self.game = game
+
+    def _apply_clock(self, limits: SearchLimits) -> None:
+        """Puts a search on the movetime or clock given to go, starting from now"""
+        go = self._go
+        if "movetime" in go:
+            limits.set_deadline(time.monotonic() + go["movetime"] / 1000)
+            return
+
+        side = "w" if self.game.to_move == Color.WHITE else "b"
+        if f"{side}time" in go:
+            limits.set_time_manager(TimeManager(go[f"{side}time"] / 1000, go.get(f"{side}inc", 0) / 1000,
+                                                go.get("movestogo"), self.game.fullmove_number))
+
+    def _start_search(self, tokens: list[str]) -> None:
+        """Handles "go" by starting the search thread"""
+        go = {}
+        for i, token in enumerate(tokens):
+            if token in _GO_NUMBERS and i + 1 < len(tokens):
+                try:
+                    go[token] = int(tokens[i + 1])
+
+                except ValueError:
+                    pass
+
+        self._go = go
+        self._pondering = "ponder" in tokens
+        infinite = "infinite" in tokens
+        self._release.clear()
+        if not (self._pondering or infinite):
+            self._release.set()
+
+        self._limits = SearchLimits(depth=go.get("depth"), nodes=go.get("nodes"))
+        if not (self._pondering or infinite):
+            self._apply_clock(self._limits)
+
+        # Cleared here rather than in the thread, a stop sent right after go must still reach the search
+        self.searcher.stop_event.clear()
+        self._thread = threading.Thread(target=self._search, args=(copy.deepcopy(self.game), self._limits),
+                                        daemon=True)
+        self._thread.start()
+
+    def _search(self, game: BoardManager, limits: SearchLimits) -> None:
+        """Body of the search thread"""
+        result = self.searcher.search(game, limits, self._send_info)
+
+        # While pondering or searching infinitely the GUI has to say stop or ponderhit first
+        self._release.wait()
+
+        if result.best_move is None:
+            self.send("bestmove 0000")
+
+        elif result.ponder_move is not None:
+            self.send(f"bestmove {move_to_uci(*result.best_move)} ponder {move_to_uci(*result.ponder_move)}")
+
+        else:
+            self.send(f"bestmove {move_to_uci(*result.best_move)}")
+
+    def _send_info(self, info: SearchInfo) -> None:
+        """Streams the progress of the search"""
+        score = f"mate {info.mate}" if info.mate is not None else f"cp {info.score}"
+        nps = int(info.nodes / info.seconds) if info.seconds > 0 else 0
+        pv = " ".join(move_to_uci(*move) for move in info.pv)
+        self.send(f"info depth {info.depth} score {score} nodes {info.nodes} nps {nps} "
+                  f"time {int(info.seconds * 1000)} pv {pv}".rstrip())
+
+    def _ponderhit(self) -> None:
+        """The GUI played the move we pondered on, so the search now runs on our own clock"""
+        if self._thread is None or not self._pondering:
+            return
+
+        self._pondering = False
+        self._apply_clock(self._limits)
+
+        self._release.set()
+
+    def _stop_search(self) -> None:
+        """Stops the running search and waits for its bestmove"""
+        if self._thread is None:
+            return
+
+        self.searcher.stop()
+        self._release.set()
+        self._thread.join()
+        self._thread = None
+
+
+def main():
+    UciEngine().run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1 @@
-from .board_manager import BoardManager
\ No newline at end of file
+from .board_manager import BoardManager, IllegalMoveError, InvalidPositionError, Move
\ No newline at end of file
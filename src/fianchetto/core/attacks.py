@@ -0,0 +1,325 @@
+from typing import Iterable
+
+from .pieces import Color
+
+# Squares are numbered file * 8 + rank, the same as the Zobrist tables
+KNIGHT_STEPS = ((1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2))
+KING_STEPS = ((1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1))
+ROOK_DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+BISHOP_DIRECTIONS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+
+_SLIDER_DIRECTIONS = {"R" : ROOK_DIRECTIONS,
+                      "B" : BISHOP_DIRECTIONS,
+                      "Q" : ROOK_DIRECTIONS + BISHOP_DIRECTIONS}
+
+
+def _color_index(color: Color) -> int:
+    return 0 if color == Color.WHITE else 1
+
+
+def attacked_squares(board: list[list], square: tuple[int, int]) -> list[int]:
+    """Returns the squares the piece on a square attacks
+
+    Unlike the moves of a piece these include squares held by its own side, which it defends, and leave
+    out pawn pushes and castling, which never take anything.
+
+    Args:
+        board (list[list[None|pieces]]): The board the piece stands on
+        square (tuple[int, int]): Square of the piece
+
+    Return:
+        Attacked squares as file * 8 + rank
+    """
+    x, y = square
+    piece = board[x][y]
+    symbol = piece.symbol
+    targets = []
+    if symbol == "p":
+        forward = y + (1 if piece.color == Color.WHITE else -1)
+        if 0 <= forward <= 7:
+            for file in (x - 1, x + 1):
+                if 0 <= file <= 7:
+                    targets.append(file * 8 + forward)
+
+        return targets
+
+    if symbol == "N" or symbol == "K":
+        for dx, dy in (KNIGHT_STEPS if symbol == "N" else KING_STEPS):
+            if 0 <= x + dx <= 7 and 0 <= y + dy <= 7:
+                targets.append((x + dx) * 8 + y + dy)
+
+        return targets
+
+    for dx, dy in _SLIDER_DIRECTIONS[symbol]:
+        i, j = x + dx, y + dy
+        while 0 <= i <= 7 and 0 <= j <= 7:
+            targets.append(i * 8 + j)
+            if board[i][j] is not None:
+                break
+
+            i += dx
+            j += dy
+
+    return targets
+
+
+def is_attacked(board: list[list], square: tuple[int, int], color: Color) -> bool:
+    """Checks from scratch if any piece of a color attacks a square, looking outwards from the square
+
+    Args:
+        board (list[list[None|pieces]]): The board
+        square (tuple[int, int]): Square to test
+        color (Color): Side doing the attacking
+
+    Return:
+        True if the square is attacked
+    """
+    x, y = square
+
+    def holds(i: int, j: int, symbols: str) -> bool:
+        if not (0 <= i <= 7 and 0 <= j <= 7):
+            return False
+
+        piece = board[i][j]
+        return piece is not None and piece.color == color and piece.symbol in symbols
+
+    # A pawn attacks the square from one rank behind it, seen from the attacker's side
+    behind = y - 1 if color == Color.WHITE else y + 1
+    if holds(x - 1, behind, "p") or holds(x + 1, behind, "p"):
+        return True
+
+    if any(holds(x + dx, y + dy, "N") for dx, dy in KNIGHT_STEPS):
+        return True
+
+    if any(holds(x + dx, y + dy, "K") for dx, dy in KING_STEPS):
+        return True
+
+    for directions, symbols in ((ROOK_DIRECTIONS, "RQ"), (BISHOP_DIRECTIONS, "BQ")):
+        for dx, dy in directions:
+            i, j = x + dx, y + dy
+            while 0 <= i <= 7 and 0 <= j <= 7:
+                if board[i][j] is not None:
+                    if holds(i, j, symbols):
+                        return True
+
+                    break
+
+                i += dx
+                j += dy
+
+    return False
+
+
+# Piece values for exchanges, the king is worth more than anything it could win
+SEE_VALUES = {"p" : 1, "N" : 3, "B" : 3, "R" : 5, "Q" : 9, "K" : 100}
+
+
+def least_valuable_attacker(board: list[list], square: tuple[int, int], color: Color,
+                            removed: int = 0) -> tuple[int, int] | None:
+    """Finds the cheapest piece of a color attacking a square
+
+    Args:
+        board (list[list[None|pieces]]): The board
+        square (tuple[int, int]): Square being attacked
+        color (Color): Side doing the attacking
+        removed (int): Bit mask of squares, bit file * 8 + rank, whose pieces are taken as gone. Sliders
+            behind them attack through, which is how x-rays are found
+
+    Return:
+        Square of the attacker, or None if the square is not attacked
+    """
+    x, y = square
+    best = None
+    best_value = 1000
+
+    def consider(i: int, j: int, symbols: str) -> None:
+        nonlocal best, best_value
+        if 0 <= i <= 7 and 0 <= j <= 7 and not removed >> (i * 8 + j) & 1:
+            piece = board[i][j]
+            if piece is not None and piece.color == color and piece.symbol in symbols:
+                if SEE_VALUES[piece.symbol] < best_value:
+                    best = (i, j)
+                    best_value = SEE_VALUES[piece.symbol]
+
+    behind = y - 1 if color == Color.WHITE else y + 1
+    consider(x - 1, behind, "p")
+    consider(x + 1, behind, "p")
+    if best is not None:
+        return best
+
+    for dx, dy in KNIGHT_STEPS:
+        consider(x + dx, y + dy, "N")
+
+    if best is not None:
+        return best
+
+    for directions, symbols in ((BISHOP_DIRECTIONS, "BQ"), (ROOK_DIRECTIONS, "RQ")):
+        for dx, dy in directions:
+            i, j = x + dx, y + dy
+            while 0 <= i <= 7 and 0 <= j <= 7:
+                if board[i][j] is not None and not removed >> (i * 8 + j) & 1:
+                    consider(i, j, symbols)
+                    break
+
+                i += dx
+                j += dy
+
+    if best is None:
+        for dx, dy in KING_STEPS:
+            consider(x + dx, y + dy, "K")
+
+    return best
+
+
+def static_exchange(board: list[list], start: tuple[int, int], end: tuple[int, int],
+                    promotion: str | None = None) -> int:
+    """Works out the material a move wins once both sides are done taking back on its square
+
+    Each side recaptures with its least valuable attacker, pieces behind the ones that already took join
+    in, and either side stops taking when it would lose by going on. Pins are not looked at.
+
+    Args:
+        board (list[list[None|pieces]]): The board before the move
+        start (tuple[int, int]): Square the moving piece leaves
+        end (tuple[int, int]): Square it goes to
+        promotion (str | None): Symbol of the piece a pawn promotes to
+
+    Return:
+        Material won by the moving side in Piece.value points, negative if it loses material
+    """
+    piece = board[start[0]][start[1]]
+    target = board[end[0]][end[1]]
+    removed = 1 << (start[0] * 8 + start[1])
+    if target is not None:
+        captured = SEE_VALUES[target.symbol]
+
+    elif piece.symbol == "p" and start[0] != end[0]:
+        # En passant, the taken pawn leaves the square next to the start
+        captured = 1
+        removed |= 1 << (end[0] * 8 + start[1])
+
+    else:
+        captured = 0
+
+    on_square = SEE_VALUES[piece.symbol]
+    if promotion is not None:
+        captured += SEE_VALUES[promotion] - 1
+        on_square = SEE_VALUES[promotion]
+
+    # gains[d] is what the side making capture d stands to win if the exchange stops after it
+    gains = [captured]
+    color = Color.BLACK if piece.color == Color.WHITE else Color.WHITE
+    while True:
+        attacker = least_valuable_attacker(board, end, color, removed)
+        if attacker is None:
+            break
+
+        gains.append(on_square - gains[-1])
+        # Neither side wants to go on, taking more can not change the outcome
+        if max(-gains[-2], gains[-1]) < 0:
+            break
+
+        removed |= 1 << (attacker[0] * 8 + attacker[1])
+        on_square = SEE_VALUES[board[attacker[0]][attacker[1]].symbol]
+        color = Color.BLACK if color == Color.WHITE else Color.WHITE
+
+    for i in range(len(gains) - 1, 0, -1):
+        gains[i - 1] = -max(-gains[i - 1], gains[i])
+
+    return gains[0]
+
+
+class AttackMap():
+    """Number of pieces of each color attacking every square, kept up to date as moves are made
+
+    When pieces change on a few squares only the pieces on those squares and the sliders whose rays reach
+    them can attack differently, so only their attacks are worked out again.
+
+    Attributes:
+        counts (list[list[int]]): counts[color][square] is how many pieces of the color (0 white, 1 black)
+            attack the square, with squares numbered file * 8 + rank
+        covered (list[int]): Number of squares each color attacks at least once
+    """
+    def __init__(self, board: list[list]):
+        """Builds the map for a board
+
+        Args:
+            board (list[list[None|pieces]]): The board to follow
+        """
+        self.rebuild(board)
+
+    def rebuild(self, board: list[list]) -> None:
+        """Works the whole map out again from a board"""
+        self.counts = [[0] * 64, [0] * 64]
+        self.covered = [0, 0]
+        # source square -> (color index, attacked squares) and square -> squares of the pieces attacking it
+        self._sources = {}
+        self._attackers = [set() for _ in range(64)]
+        for x in range(8):
+            for y in range(8):
+                if board[x][y] is not None:
+                    self._add(board, x * 8 + y)
+
+    def update(self, board: list[list], changed: Iterable[tuple[int, int]]) -> None:
+        """Brings the map up to date after pieces appeared, left or were replaced on some squares
+
+        Args:
+            board (list[list[None|pieces]]): The board after the change
+            changed (Iterable[tuple[int, int]]): Every square whose contents changed
+        """
+        squares = {x * 8 + y for x, y in changed}
+
+        # A slider that reached a changed square before the change is the only kind whose rays can have
+        # grown or shrunk, the rays of everything else do not depend on what stands in the way
+        affected = set(squares)
+        for square in squares:
+            for source in self._attackers[square]:
+                if board[source // 8][source % 8] is not None and board[source // 8][source % 8].symbol in "RBQ":
+                    affected.add(source)
+
+        for source in affected:
+            self._remove(source)
+
+        for source in affected:
+            if board[source // 8][source % 8] is not None:
+                self._add(board, source)
+
+    def count(self, square: tuple[int, int], color: Color) -> int:
+        """Returns how many pieces of a color attack a square"""
+        return self.counts[_color_index(color)][square[0] * 8 + square[1]]
+
+    def is_attacked(self, square: tuple[int, int], color: Color) -> bool:
+        """Checks if any piece of a color attacks a square"""
+        return self.counts[_color_index(color)][square[0] * 8 + square[1]] > 0
+
+    def mobility(self, color: Color) -> int:
+        """Returns the number of squares a color attacks"""
+        return self.covered[_color_index(color)]
+
+    def _add(self, board: list[list], source: int) -> None:
+        piece = board[source // 8][source % 8]
+        color = _color_index(piece.color)
+        targets = attacked_squares(board, (source // 8, source % 8))
+        counts = self.counts[color]
+        for target in targets:
+            if counts[target] == 0:
+                self.covered[color] += 1
+
+            counts[target] += 1
+            self._attackers[target].add(source)
+
+        self._sources[source] = (color, targets)
+
+    def _remove(self, source: int) -> None:
+        entry = self._sources.pop(source, None)
+        if entry is None:
+            return
+
+        color, targets = entry
+        counts = self.counts[color]
+        for target in targets:
+            counts[target] -= 1
+            if counts[target] == 0:
+                self.covered[color] -= 1
+
+            self._attackers[target].discard(source)
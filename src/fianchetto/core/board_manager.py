@@ -1,3 +1,5 @@
+from typing import Iterable, Iterator, NamedTuple
+
 from .pieces import (Color,   
                     Piece, 
                     Pawn, 
@@ -6,6 +8,52 @@ from .pieces import (Color,
                     King,
                     Knight,
                     Queen)
+from .notation import LETTER_TO_SYMBOL, coord_to_square, square_to_coord
+from .attacks import AttackMap, is_attacked, static_exchange
+from .checks import CheckInfo, PinInfo
+# Square masks of every pair of squares, for pin and path tests on the board
+from .lines import BETWEEN, LINE, mask_squares, square_bit, square_index
+from .move_cache import MoveCache
+from . import zobrist
+
+class Move(NamedTuple):
+    """A move on the board
+
+    Attributes:
+        start (tuple[int, int]): Square the piece starts on
+        end (tuple[int, int]): Square the piece ends on
+        promotion (str | None): Symbol of the piece a pawn promotes to, or None
+    """
+    start: tuple[int, int]
+    end: tuple[int, int]
+    promotion: str | None = None
+
+
+class IllegalMoveError(ValueError):
+    """Raised by BoardManager.apply_moves when a move of the sequence can not be played
+
+    Attributes:
+        ply (int): Index of the move inside the sequence
+        move (Move): The move
+        reason (str): Why the move can not be played
+    """
+    def __init__(self, ply: int, move: Move, reason: str):
+        super().__init__(f"Illegal move at ply {ply}: {reason}")
+        self.ply = ply
+        self.move = move
+        self.reason = reason
+
+
+class InvalidPositionError(ValueError):
+    """Raised by BoardManager.validate when a position could not come up in a game
+
+    Attributes:
+        problems (list[str]): Every problem found with the position
+    """
+    def __init__(self, problems: list[str]):
+        super().__init__(f"Invalid position: {'; '.join(problems)}")
+        self.problems = problems
+
 
 class BoardManager():
     """Represents the board and controls the legal moves
@@ -21,12 +69,21 @@ class BoardManager():
         white_king (tuple[int, int]): Location of white's king
         black_king (tuple[int, int]): Location of black's king
         check (Color | None): Set to the color of the side in check or to None other wise
+        halfmove_clock (int): Number of half moves since the last capture or pawn move
+        fullmove_number (int): Number of the current full move, starting at 1
+        history (list[tuple]): Undo information for every move played, used by unmake_move
+        attacks (AttackMap | None): Attack counts per square kept up to date by make_move and unmake_move, or
+            None if they are not being kept
+        move_cache (MoveCache | None): Legal moves of recently seen positions, or None to always generate
+            moves. Boards only share a cache when they are given the same one. It is not used in debug mode
     """
-    def __init__(self, debug: bool=False):
+    def __init__(self, debug: bool=False, attack_maps: bool=False, move_cache: MoveCache | None = None):
         """Creates and instance of the board managers
 
         Args:
             debug (bool): Flag that allows the board to not enforce certain move rules for debugging
+            attack_maps (bool): Keep attack counts for every square as moves are made
+            move_cache (MoveCache | None): Cache of legal moves to use, None to not cache them
         """
         self.board = [[None] * 8 for _ in range(8)]
         self.to_move = Color.WHITE
@@ -36,24 +93,40 @@ class BoardManager():
         self.white_king_pos = (4,0)
         self.black_king_pos = (4,7)
         self.check = None
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+        self.history = []
+        self._key = None
+        self._pawn_key = None
+        self.attacks = AttackMap(self.board) if attack_maps else None
+        self.move_cache = move_cache
+        # (key, CheckInfo) and (key, PinInfo) of the position at each ply of the history, so a search finds
+        # the ones of a position again after coming back from its children
+        self._checks = []
+        self._pins = []
 
-    def move(self, start: tuple[int, int], end: tuple[int, int]) -> None:
+    def move(self, start: tuple[int, int], end: tuple[int, int], promotion: str | None = None) -> None:
         """Makes a ches move on the board. If the move is not valid it will throw an error
 
         Args:
             start (tuple[int, int]): The coordinates of the square that the piece to be moved is on
             end (tuple[int, int]): The coordinates of the square that the piece will end up on
+            promotion (str | None): Symbol of the piece a pawn promotes to ("Q", "R", "B" or "N"). If it
+                is None the user is asked to choose
         """
         # Check that starting square is on the board
         if start[0] < 0 or start[0] > 7 or start[1] < 0 or start[1] > 7:
             raise ValueError("This piece is off the board")
+
+        if promotion is not None and promotion not in ("Q", "R", "B", "N"):
+            raise ValueError("Not a valid promotion piece")
         
         piece = self.board[start[0]][start[1]]
 
 
         # Check if a piece was selected
         if piece is not None:
-            legal_moves = piece.generate_valid_moves(start, self)
+            legal_moves = self.piece_moves(start)
 
             # Check if piece is the correct color
             if piece.color != self.to_move and not self.debug:
@@ -61,58 +134,588 @@ class BoardManager():
 
             # Check if the attempted move is allowed
             if end in legal_moves:
-                self._free_move(start, end)
-                piece.has_moved = True
+                if promotion is None and type(piece).__name__ == "Pawn" and (end[1] == 0 or end[1] == 7):
+                    promotion = self._promote()
 
-                # Check if a player just castled and finish catselting
-                if type(piece).__name__ == "King" and (start[0] - end[0] > 1 or start[0] - end[0] < -1):
-                    if end[0] == 6:
-                        self._free_move((7, end[1]), (5, end[1]))
+                self.make_move(Move(start, end, promotion))
+                           
+            else:
+                raise ValueError("Not a legal move")
+            
+        else: 
+            raise ValueError("No piece selected")
 
-                    elif end[0] == 2:
-                        self._free_move((0, end[1]), (3, end[1]))
+    def apply_moves(self, moves: Iterable[Move | tuple], validate: bool = True) -> int:
+        """Plays a sequence of moves, such as a recorded game
 
-                if self.en_passant:
-                    # Check if En Passant was just played, if it was, remove the pawn
-                    if type(piece).__name__ == "Pawn":
-                        if end == (self.en_passant_pos[0], self.en_passant_pos[1] + 1) or end == (self.en_passant_pos[0], self.en_passant_pos[1] - 1):
-                            self.board[self.en_passant_pos[0]][self.en_passant_pos[1]] = None
+        Pawns reaching the last rank become queens when no promotion is given.
 
-                # If the king moved update its position
-                if type(piece).__name__ == "King":
-                    if piece.color == Color.WHITE:
-                        self.white_king_pos = end
+        Args:
+            moves (Iterable[Move | tuple]): Moves as Move or (start, end) and (start, end, promotion) tuples
+            validate (bool): Check every move first. Without it the moves are trusted and played straight
+                away, skipping move generation, which is only safe for moves known to be legal
 
-                    else:
-                        self.black_king_pos = end
+        Return:
+            Number of moves played
 
-                # See if the player put their opponent in check.
-                if piece.color == Color.WHITE:
-                    opp_king = self.board[self.black_king_pos[0]][self.black_king_pos[1]]
+        Raises:
+            IllegalMoveError: With the index of the first illegal move when validating. The moves before it
+                stay played
+        """
+        played = 0
+        for ply, move in enumerate(moves):
+            move = Move(*move)
+            if validate:
+                reason = self._illegal_reason(move)
+                if reason is not None:
+                    raise IllegalMoveError(ply, move, reason)
+
+            self.make_move(move)
+            played += 1
 
-                else:
-                    opp_king = self.board[self.white_king_pos[0]][self.white_king_pos[1]]
+        return played
 
-                if opp_king is not None and opp_king.in_check(self):
-                    # King might be none durring debuging
-                    self.check = opp_king.color
+    def _illegal_reason(self, move: Move) -> str | None:
+        """Returns why a move can not be played by the side to move, or None if it can"""
+        start, end, promotion = move
+        for square in (start, end):
+            if square[0] < 0 or square[0] > 7 or square[1] < 0 or square[1] > 7:
+                return "This square is off the board"
 
-                else:
-                    self.check  = None
+        piece = self.board[start[0]][start[1]]
+        if piece is None:
+            return "No piece selected"
 
+        if piece.color != self.to_move and not self.debug:
+            return "The piece is the wrong color"
 
-                self._check_en_passant(piece, start, end)
+        promotes = type(piece).__name__ == "Pawn" and (end[1] == 0 or end[1] == 7)
+        if promotion is not None and (not promotes or promotion not in ("Q", "R", "B", "N")):
+            return "Not a valid promotion piece"
 
-                self._check_promotion(piece, end)
+        if end not in self.piece_moves(start):
+            return "Not a legal move"
+
+        return None
+
+    def make_move(self, move: Move) -> None:
+        """Plays a move without checking that it is legal. It can be taken back with unmake_move
+
+        Args:
+            move (Move): The move to play. Pawns reaching the last rank become queens if no promotion is given
+        """
+        start, end, promotion = move
+        piece = self.board[start[0]][start[1]]
+        captured_pos = end
+        captured = self.board[end[0]][end[1]]
+        is_pawn = type(piece).__name__ == "Pawn"
+        is_king = type(piece).__name__ == "King"
+
+        # A pawn moving diagonally onto an empty square is taking en passant
+        if is_pawn and captured is None and start[0] != end[0]:
+            captured_pos = (end[0], start[1])
+            captured = self.board[captured_pos[0]][captured_pos[1]]
+
+        rook_move = None
+        if is_king and (start[0] - end[0] > 1 or start[0] - end[0] < -1):
+            if end[0] == 6:
+                rook_move = ((7, end[1]), (5, end[1]))
 
-                self._change_turn()
-                           
             else:
-                raise ValueError("Not a legal move")
-            
-        else: 
-            raise ValueError("No piece selected")
+                rook_move = ((0, end[1]), (3, end[1]))
+
+        rook = None if rook_move is None else self.board[rook_move[0][0]][rook_move[0][1]]
+        # Decided before the board changes, None when only a search from the king after the move can tell
+        gives_check = None
+        if not self.debug and piece.color == self.to_move:
+            gives_check = self._quick_gives_check(move, piece, captured_pos != end or rook_move is not None)
+
+        old_key = self._key
+        old_rights = self.castling_rights() if old_key is not None else None
+
+        self.history.append((move, piece, piece.has_moved, captured, captured_pos, rook_move,
+                             None if rook is None else rook.has_moved, self.en_passant, self.en_passant_pos,
+                             self.white_king_pos, self.black_king_pos, self.check, self.halfmove_clock,
+                             self.fullmove_number, self.to_move, self._pawn_key, old_key))
+
+        self.board[captured_pos[0]][captured_pos[1]] = None
+        self.board[start[0]][start[1]] = None
+        placed = piece
+        if is_pawn and (end[1] == 0 or end[1] == 7):
+            placed = self._promotion_piece(promotion or "Q", piece.color)
+
+        self.board[end[0]][end[1]] = placed
+        piece.has_moved = True
+
+        # Finish castling by moving the rook
+        if rook is not None:
+            self.board[rook_move[1][0]][rook_move[1][1]] = rook
+            self.board[rook_move[0][0]][rook_move[0][1]] = None
+            rook.has_moved = True
+
+        # If the king moved update its position
+        if is_king:
+            if piece.color == Color.WHITE:
+                self.white_king_pos = end
+
+            else:
+                self.black_king_pos = end
+
+        if self.attacks is not None:
+            self.attacks.update(self.board, self._changed_squares(start, end, captured_pos, rook_move))
+
+        if old_key is not None:
+            key = old_key ^ zobrist.piece_key(piece, start) ^ zobrist.piece_key(placed, end) ^ zobrist.SIDE_KEY
+            if captured is not None:
+                key ^= zobrist.piece_key(captured, captured_pos)
+
+            if rook is not None:
+                key ^= zobrist.piece_key(rook, rook_move[0]) ^ zobrist.piece_key(rook, rook_move[1])
+
+            if self.en_passant:
+                key ^= zobrist.EN_PASSANT_KEYS[self.en_passant_pos[0]]
+
+        self._check_en_passant(piece, start, end)
+
+        if old_key is not None:
+            if self.en_passant:
+                key ^= zobrist.EN_PASSANT_KEYS[self.en_passant_pos[0]]
+
+            new_rights = self.castling_rights()
+            for right in "KQkq":
+                if (right in old_rights) != (right in new_rights):
+                    key ^= zobrist.CASTLING_KEYS[right]
+
+            self._key = key
+
+        if self._pawn_key is not None:
+            if is_pawn:
+                self._pawn_key ^= zobrist.piece_key(piece, start)
+                if placed is piece:
+                    self._pawn_key ^= zobrist.piece_key(piece, end)
+
+            if captured is not None and captured.symbol == "p":
+                self._pawn_key ^= zobrist.piece_key(captured, captured_pos)
+
+        if captured is not None or is_pawn:
+            self.halfmove_clock = 0
+
+        else:
+            self.halfmove_clock += 1
+
+        if piece.color == Color.BLACK:
+            self.fullmove_number += 1
+
+        # See if the player put their opponent in check.
+        if gives_check is not None:
+            self.check = (Color.BLACK if piece.color == Color.WHITE else Color.WHITE) if gives_check else None
+            self._change_turn()
+            return
+
+        if piece.color == Color.WHITE:
+            opp_king_pos = self.black_king_pos
+
+        else:
+            opp_king_pos = self.white_king_pos
+
+        opp_king = None if opp_king_pos is None else self.board[opp_king_pos[0]][opp_king_pos[1]]
+
+        if opp_king is not None and self.is_square_attacked(opp_king_pos, piece.color):
+            # King might be none durring debuging
+            self.check = opp_king.color
+
+        else:
+            self.check  = None
+
+        self._change_turn()
+
+    def make_null_move(self) -> None:
+        """Passes the turn to the other side without moving, for null move pruning. It can be taken back
+        with unmake_move
+
+        The halfmove clock starts again so repetitions are not looked for across the pass.
+        """
+        old_key = self._key
+        self.history.append((None, None, None, None, None, None, None, self.en_passant, self.en_passant_pos,
+                             self.white_king_pos, self.black_king_pos, self.check, self.halfmove_clock,
+                             self.fullmove_number, self.to_move, self._pawn_key, old_key))
+
+        if old_key is not None:
+            key = old_key ^ zobrist.SIDE_KEY
+            if self.en_passant:
+                key ^= zobrist.EN_PASSANT_KEYS[self.en_passant_pos[0]]
+
+            self._key = key
+
+        self.en_passant = False
+        self.en_passant_pos = None
+        self.check = None
+        self.halfmove_clock = 0
+        if self.to_move == Color.BLACK:
+            self.fullmove_number += 1
+
+        self._change_turn()
+
+    def unmake_move(self) -> Move | None:
+        """Takes back the last move played with move, make_move or make_null_move
+
+        Return:
+            The move that was taken back, None for a null move
+        """
+        if not self.history:
+            raise ValueError("There is no move to take back")
+
+        (move, piece, has_moved, captured, captured_pos, rook_move, rook_has_moved, self.en_passant,
+         self.en_passant_pos, self.white_king_pos, self.black_king_pos, self.check, self.halfmove_clock,
+         self.fullmove_number, self.to_move, self._pawn_key, self._key) = self.history.pop()
+
+        if move is None:
+            return None
+
+        start, end, _ = move
+        self.board[end[0]][end[1]] = None
+        self.board[start[0]][start[1]] = piece
+        self.board[captured_pos[0]][captured_pos[1]] = captured
+        piece.has_moved = has_moved
+
+        if rook_move is not None:
+            rook = self.board[rook_move[1][0]][rook_move[1][1]]
+            self.board[rook_move[0][0]][rook_move[0][1]] = rook
+            self.board[rook_move[1][0]][rook_move[1][1]] = None
+            rook.has_moved = rook_has_moved
+
+        if self.attacks is not None:
+            self.attacks.update(self.board, self._changed_squares(start, end, captured_pos, rook_move))
+
+        return move
+
+    @staticmethod
+    def _changed_squares(start, end, captured_pos, rook_move) -> list[tuple[int, int]]:
+        """Lists the squares a move changes, for updating the attack maps"""
+        changed = [start, end, captured_pos]
+        if rook_move is not None:
+            changed.extend(rook_move)
+
+        return changed
+
+    def enable_attack_maps(self) -> None:
+        """Starts keeping attack counts for every square, building them from the current position"""
+        self.attacks = AttackMap(self.board)
+
+    def disable_attack_maps(self) -> None:
+        """Stops keeping attack counts"""
+        self.attacks = None
+
+    def is_square_attacked(self, square: tuple[int, int], color: Color) -> bool:
+        """Checks if any piece of a color attacks a square
+
+        This is a lookup when attack maps are kept and a search outwards from the square otherwise.
+
+        Args:
+            square (tuple[int, int]): Square to test
+            color (Color): Side doing the attacking
+        """
+        if self.attacks is not None:
+            return self.attacks.is_attacked(square, color)
+
+        return is_attacked(self.board, square, color)
         
+    def legal_moves(self) -> list[Move]:
+        """Returns every legal move of the side to move
+
+        Pawn moves to the last rank are listed once for each piece the pawn can promote to.
+        """
+        cache = self._cache()
+        if cache is not None:
+            moves = cache.legal_moves(self.zobrist_key())
+            if moves is not None:
+                return list(moves)
+
+        moves = []
+        starts = []
+        pins = self.pin_info()
+        for x in range(8):
+            for y in range(8):
+                piece = self.board[x][y]
+                if piece is None or piece.color != self.to_move:
+                    continue
+
+                starts.append((x, y))
+                promotes = type(piece).__name__ == "Pawn"
+                ends = piece.generate_valid_moves((x, y), self, True)
+                if type(piece).__name__ == "King":
+                    ends = ends + piece.castling(self)
+
+                for end in ends:
+                    if not self._is_legal(Move((x, y), end), pins):
+                        continue
+
+                    if promotes and (end[1] == 0 or end[1] == 7):
+                        moves.extend(Move((x, y), end, symbol) for symbol in ("Q", "R", "B", "N"))
+
+                    else:
+                        moves.append(Move((x, y), end))
+
+        if cache is not None:
+            cache.store_legal_moves(self.zobrist_key(), list(moves), starts)
+
+        return moves
+
+    def piece_moves(self, start: tuple[int, int]) -> list[tuple[int, int]]:
+        """Returns the squares the piece on a square can legally move to
+
+        Args:
+            start (tuple[int, int]): Square of the piece
+
+        Return:
+            list of coordinates where the piece can end up, empty if the square is empty
+        """
+        piece = self.board[start[0]][start[1]]
+        if piece is None:
+            return []
+
+        cache = self._cache()
+        if cache is None:
+            return piece.generate_valid_moves(start, self)
+
+        ends = cache.piece_moves(self.zobrist_key(), start)
+        if ends is None:
+            ends = piece.generate_valid_moves(start, self)
+            cache.store_piece_moves(self.zobrist_key(), start, list(ends))
+            return ends
+
+        return list(ends)
+
+    def _cache(self) -> MoveCache | None:
+        """Returns the legal move cache, or None when it should not be used"""
+        return None if self.debug else self.move_cache
+
+    def is_capture(self, move: Move) -> bool:
+        """Checks if a move takes a piece, including en passant"""
+        if self.board[move.end[0]][move.end[1]] is not None:
+            return True
+
+        piece = self.board[move.start[0]][move.start[1]]
+        return type(piece).__name__ == "Pawn" and move.start[0] != move.end[0]
+
+    def see(self, move: Move) -> int:
+        """Static exchange evaluation: the material a move wins once the captures on its square run out
+
+        Both sides take back with their least valuable piece for as long as it pays, including sliders that
+        were lined up behind the pieces that already took. The board is only read, no moves are made.
+
+        Args:
+            move (Move): Move of the side to move, usually a capture
+
+        Return:
+            Material won in Piece.value points, negative if the move loses material
+        """
+        return static_exchange(self.board, move.start, move.end, move.promotion)
+
+    def staged_moves(self, hash_move: Move | None = None, killers: tuple = (), captures_only: bool = False,
+                     losing_captures: bool = True) -> Iterator[Move]:
+        """Yields the legal moves of the side to move in the order a search wants to try them
+
+        The stages are the hash move, then captures and queen promotions with the most valuable victim and
+        least valuable attacker first and the captures that lose material by static exchange evaluation last,
+        then the killer moves, then the remaining quiet moves with the ones that give check first. Moves are only
+        checked for legality when they are pulled, so a search that stops early after a cutoff never pays
+        for the legality of the moves it did not try.
+
+        Args:
+            hash_move (Move | None): Best move from an earlier search of the position, tried first
+            killers (tuple[Move | None, ...]): Quiet moves that caused cutoffs at the same ply
+            captures_only (bool): Stop after the captures and queen promotions, for quiescence search
+            losing_captures (bool): Also yield the captures that lose material, quiescence search leaves
+                them out
+
+        Return:
+            Iterator over the legal moves
+        """
+        captures = []
+        quiets = []
+        for x in range(8):
+            for y in range(8):
+                piece = self.board[x][y]
+                if piece is None or piece.color != self.to_move:
+                    continue
+
+                ends = piece.generate_valid_moves((x, y), self, True)
+                if type(piece).__name__ == "King":
+                    ends = ends + piece.castling(self)
+
+                is_pawn = type(piece).__name__ == "Pawn"
+                attacker = piece.value or 0
+                for end in ends:
+                    target = self.board[end[0]][end[1]]
+                    if is_pawn and (end[1] == 0 or end[1] == 7):
+                        # Queen promotions go with the captures, quiet under promotions with the quiet moves
+                        victim = 0 if target is None else target.value
+                        captures.append((victim * 10 + 90, Move((x, y), end, "Q"), False))
+                        for symbol in ("N", "R", "B"):
+                            if target is None:
+                                quiets.append(Move((x, y), end, symbol))
+
+                            else:
+                                captures.append((victim * 10 - 10, Move((x, y), end, symbol), False))
+
+                    elif target is not None:
+                        # Only a capture of a cheaper piece can lose material
+                        captures.append((target.value * 10 - attacker, Move((x, y), end), target.value < attacker))
+
+                    elif is_pawn and x != end[0]:
+                        # En passant
+                        captures.append((10 - attacker, Move((x, y), end), False))
+
+                    else:
+                        quiets.append(Move((x, y), end))
+
+        captures.sort(key=lambda scored: scored[0], reverse=True)
+        capture_moves = [move for _, move, _ in captures]
+
+        tried = set()
+        if hash_move is not None and (hash_move in quiets or hash_move in capture_moves):
+            if not captures_only or hash_move in capture_moves:
+                tried.add(hash_move)
+                if self._is_legal(hash_move):
+                    yield hash_move
+
+        losing = []
+        for _, move, cheaper_victim in captures:
+            if move in tried:
+                continue
+
+            if cheaper_victim:
+                exchange = self.see(move)
+                if exchange < 0:
+                    losing.append((exchange, move))
+                    continue
+
+            if self._is_legal(move):
+                yield move
+
+        if losing_captures:
+            losing.sort(key=lambda scored: scored[0], reverse=True)
+            for _, move in losing:
+                if self._is_legal(move):
+                    yield move
+
+        if captures_only:
+            return
+
+        for killer in killers:
+            if killer is not None and killer not in tried and killer in quiets:
+                tried.add(killer)
+                if self._is_legal(killer):
+                    yield killer
+
+        # Quiet checks first, they are the quiet moves most likely to refute the opponent's last move. A move
+        # is only tested for check when the caller gets to it, so a cutoff on a check skips the rest
+        rest = []
+        for move in quiets:
+            if move in tried:
+                continue
+
+            if not self.gives_check(move):
+                rest.append(move)
+
+            elif self._is_legal(move):
+                yield move
+
+        for move in rest:
+            if self._is_legal(move):
+                yield move
+
+    def gives_check(self, move: Move) -> bool:
+        """Checks if a move of the side to move puts the other king in check, without making it
+
+        Ordinary moves are looked up in the check squares and discovered check candidates of the position,
+        which are worked out once and reused for every move tried from it. Castling, en passant and
+        promotions are rare enough to be played and taken back instead.
+
+        Args:
+            move (Move): A legal move of the side to move
+
+        Return:
+            True if the move gives check
+        """
+        start, end, _ = move
+        piece = self.board[start[0]][start[1]]
+        is_pawn = type(piece).__name__ == "Pawn"
+        special = ((is_pawn and start[0] != end[0] and self.board[end[0]][end[1]] is None)
+                   or (type(piece).__name__ == "King" and (start[0] - end[0] > 1 or start[0] - end[0] < -1)))
+        gives_check = self._quick_gives_check(move, piece, special)
+        if gives_check is not None:
+            return gives_check
+
+        self.make_move(move)
+        gives_check = self.check is not None
+        self.unmake_move()
+        return gives_check
+
+    def _quick_gives_check(self, move: Move, piece: Piece, special: bool) -> bool | None:
+        """Looks up whether a move gives check, or returns None for castling, en passant and promotions"""
+        start, end, _ = move
+        if special or (piece.symbol == "p" and (end[1] == 0 or end[1] == 7)):
+            return None
+
+        return self.check_info().gives_check(piece.symbol, start, end)
+
+    def check_info(self) -> CheckInfo:
+        """Returns the check squares of the side to move against the other king in the current position"""
+        other = Color.BLACK if self.to_move == Color.WHITE else Color.WHITE
+        return self._per_ply(self._checks, lambda: CheckInfo(self.board, self._king_square(other), self.to_move))
+
+    def pin_info(self) -> PinInfo:
+        """Returns the pinned pieces and checkers of the side to move in the current position"""
+        return self._per_ply(self._pins, lambda: PinInfo(self.board, self._king_square(self.to_move), self.to_move))
+
+    def _king_square(self, color: Color) -> tuple[int, int] | None:
+        """Returns the square of a side's king, None if the king field does not point at its king"""
+        king = self.white_king_pos if color == Color.WHITE else self.black_king_pos
+        if king is not None and type(self.board[king[0]][king[1]]).__name__ != "King":
+            return None
+
+        return king
+
+    def _per_ply(self, cache: list, build):
+        """Returns what build makes for the current position, kept per ply and rebuilt when the key changes"""
+        if self.debug:
+            # Boards in debug mode are edited by hand, which the key does not follow
+            return build()
+
+        key = self.zobrist_key()
+        ply = len(self.history)
+        while len(cache) <= ply:
+            cache.append(None)
+
+        cached = cache[ply]
+        if cached is None or cached[0] != key:
+            cached = cache[ply] = (key, build())
+
+        return cached[1]
+
+    def _is_legal(self, move: Move, pins: PinInfo | None = None) -> bool:
+        """Checks that a pseudo legal move does not leave the mover's own king in check
+
+        Moves of the other pieces are tested against the pins and the check of the position. King moves and
+        en passant, which can uncover a check along the rank of both pawns, are played on the board.
+
+        Args:
+            move (Move): Pseudo legal move
+            pins (PinInfo | None): Pins of the position when the caller already has them
+        """
+        start, end, _ = move
+        piece = self.board[start[0]][start[1]]
+        if piece.symbol == "K" or (piece.symbol == "p" and start[0] != end[0] and self.board[end[0]][end[1]] is None):
+            return len(piece._remove_checks(start, [end], self)) == 1
+
+        if piece.color != self.to_move:
+            # Debug boards let either side move
+            return len(piece._remove_checks(start, [end], self)) == 1
+
+        return (pins or self.pin_info()).allows(start, end)
+
     def _change_turn(self):
         """Flips whos turn it is"""
         if self.to_move == Color.WHITE:
@@ -139,8 +742,21 @@ class BoardManager():
         if end[0] < 0 or end[0] > 7 or end[1] < 0 or end[1] > 7:
             raise ValueError("This square is off the board")
         
+        # The moves cached for the position before the edit could depend on piece flags the key does not
+        # cover, so they are dropped along with the ones of the position after it
+        old_key = None if self.move_cache is None else self.zobrist_key()
         self.board[end[0]][end[1]] = self.board[start[0]][start[1]]
         self.board[start[0]][start[1]] = None
+
+        # The board was edited by hand, so the cached key can no longer be trusted
+        self._key = None
+        self._pawn_key = None
+        if self.move_cache is not None:
+            self.move_cache.discard(old_key)
+            self.move_cache.discard(self.zobrist_key())
+
+        if self.attacks is not None:
+            self.attacks.update(self.board, (start, end))
         
     def _check_en_passant(self, piece: Piece, start: tuple[int, int], end: tuple[int, int]) -> None:
         """Checks if en passant is playable on the board next move and sets self.en_passant, and self.en_passant_pos to the correct values
@@ -171,27 +787,32 @@ class BoardManager():
         self.en_passant = False
         self.en_passant_pos = None
 
-    def _check_promotion(self, piece: Piece, end: tuple[int, int]) -> None:
-        """Checks if a pawn has reached the end of the board"""
-        if type(piece).__name__ == "Pawn" and (end[1] == 0 or end[1] == 7):
-            self._promote(end)
+    def _promotion_piece(self, promotion: str, color: Color) -> Piece:
+        """Creates the piece a pawn promotes to
 
-    def _promote(self, square: tuple[int, int]) -> None:
-        """Promotes a pawn to a piece of the users choice
-        
         Args:
-            square (tuple[int, int]): The coordinates of the square where the pawn promoted
-        """
-        keep_going = True
-        x = square[0]
-        y = square[1]
-        color = self.board[x][y].color
-        choice_to_piece = {1 : Queen,
-                           2 : Rook,
-                           3 : Bishop,
-                           4 : Knight}
-
-        while keep_going:
+            promotion (str): Symbol of the piece ("Q", "R", "B" or "N")
+            color (Color): Color of the promoting pawn
+        """
+        symbol_to_piece = {"Q" : Queen,
+                           "R" : Rook,
+                           "B" : Bishop,
+                           "N" : Knight}
+
+        return symbol_to_piece[promotion](color, True)
+
+    def _promote(self) -> str:
+        """Asks the user what piece a pawn should promote to
+
+        Return:
+            The symbol of the chosen piece
+        """
+        choice_to_symbol = {1 : "Q",
+                            2 : "R",
+                            3 : "B",
+                            4 : "N"}
+
+        while True:
             print("Please select what piece to turn the pawn into by typing the corrosponding number")
             ans_str = input("1) Queen\n2) Rook\n3) Bishop\n4) Knight\n")
 
@@ -204,18 +825,13 @@ class BoardManager():
                 print("Please select a valid option")
                 continue
 
-            try:
-                self.board[x][y] = choice_to_piece[ans](color)
-
-            except Exception as e:
-                # All data should have been validated by this point
-                raise e
-            
-            else:
-                keep_going = False
+            return choice_to_symbol[ans]
                 
     def generate_starting_position(self):
         """Adds all the pieces in their starting positions"""
+        self._key = None
+        self._pawn_key = None
+
         # Add Pawns
         for i in range(8):
             self.board[i][1] = Pawn(Color.WHITE)
@@ -246,4 +862,302 @@ class BoardManager():
         # Add Kings
         self.board[4][0] = King(Color.WHITE)
         self.board[4][7] = King(Color.BLACK)
-        
\ No newline at end of file
+
+        if self.attacks is not None:
+            self.attacks.rebuild(self.board)
+
+    def castling_rights(self) -> str:
+        """Returns the castling rights of the position in FEN order ("KQkq"), empty if there are none"""
+        rights = ""
+        for color, y, letters in ((Color.WHITE, 0, "KQ"), (Color.BLACK, 7, "kq")):
+            king = self.board[4][y]
+            if type(king).__name__ != "King" or king.color != color or king.has_moved:
+                continue
+
+            for x, letter in ((7, letters[0]), (0, letters[1])):
+                rook = self.board[x][y]
+                if type(rook).__name__ == "Rook" and rook.color == color and not rook.has_moved:
+                    rights += letter
+
+        return rights
+
+    def zobrist_key(self) -> int:
+        """Returns the Zobrist key of the current position
+
+        The key is computed once and then kept up to date by make_move and unmake_move.
+        """
+        if self._key is None:
+            self._key = zobrist.compute_key(self)
+
+        return self._key
+
+    def pawn_key(self) -> int:
+        """Returns the Zobrist key of the pawns of the current position
+
+        Like zobrist_key it is computed once and then kept up to date by make_move and unmake_move.
+        """
+        if self._pawn_key is None:
+            self._pawn_key = zobrist.compute_pawn_key(self)
+
+        return self._pawn_key
+
+    def load_fen(self, fen: str, validate: bool = False) -> None:
+        """Replaces the current position with the one described by a FEN string
+
+        Args:
+            fen (str): Position in Forsyth-Edwards Notation
+            validate (bool): Raise InvalidPositionError if the position could not come up in a game
+        """
+        fields = fen.split()
+        if len(fields) < 4:
+            raise ValueError("A FEN needs at least 4 fields")
+
+        ranks = fields[0].split("/")
+        if len(ranks) != 8:
+            raise ValueError("A FEN needs 8 ranks")
+
+        symbol_to_piece = {"p" : Pawn,
+                           "N" : Knight,
+                           "B" : Bishop,
+                           "R" : Rook,
+                           "Q" : Queen,
+                           "K" : King}
+        board = [[None] * 8 for _ in range(8)]
+        for i, row in enumerate(ranks):
+            y = 7 - i
+            x = 0
+            for char in row:
+                if char.isdigit():
+                    x += int(char)
+                    continue
+
+                if char.upper() not in LETTER_TO_SYMBOL or x > 7:
+                    raise ValueError(f"Not a valid FEN: {fen}")
+
+                color = Color.WHITE if char.isupper() else Color.BLACK
+                board[x][y] = symbol_to_piece[LETTER_TO_SYMBOL[char.upper()]](color, True)
+                x += 1
+
+            if x != 8:
+                raise ValueError(f"Not a valid FEN: {fen}")
+
+        if fields[1] not in ("w", "b"):
+            raise ValueError(f"Not a valid FEN: {fen}")
+
+        self.board = board
+        self.to_move = Color.WHITE if fields[1] == "w" else Color.BLACK
+        self.history = []
+
+        # Pieces that have not moved are the ones that still hold castling rights and unpushed pawns
+        for x in range(8):
+            for y, color in ((1, Color.WHITE), (6, Color.BLACK)):
+                pawn = board[x][y]
+                if type(pawn).__name__ == "Pawn" and pawn.color == color:
+                    pawn.has_moved = False
+
+        for letter in fields[2].replace("-", ""):
+            if letter not in "KQkq":
+                raise ValueError(f"Not a valid FEN: {fen}")
+
+            y = 0 if letter.isupper() else 7
+            color = Color.WHITE if letter.isupper() else Color.BLACK
+            rook_x = 7 if letter.lower() == "k" else 0
+            for (x, y), symbol in (((4, y), "K"), ((rook_x, y), "R")):
+                piece = board[x][y]
+                if piece is None or piece.symbol != symbol or piece.color != color:
+                    raise ValueError(f"Castling rights do not match the board: {fen}")
+
+                piece.has_moved = False
+
+        self.en_passant = False
+        self.en_passant_pos = None
+        # A target square without a pawn that could be taken is ignored, and reported when validating
+        en_passant_problem = None
+        if fields[3] != "-":
+            target = square_to_coord(fields[3])
+            direction = -1 if self.to_move == Color.WHITE else 1
+            pawn_pos = (target[0], target[1] + direction)
+            pawn = None
+            if target[1] != (5 if self.to_move == Color.WHITE else 2):
+                en_passant_problem = f"En passant square {fields[3]} is on the wrong rank for the side to move"
+
+            else:
+                en_passant_problem = self._en_passant_problem(pawn_pos)
+                pawn = board[pawn_pos[0]][pawn_pos[1]]
+
+            if type(pawn).__name__ == "Pawn" and pawn.color != self.to_move:
+                for x in (pawn_pos[0] - 1, pawn_pos[0] + 1):
+                    if 0 <= x <= 7:
+                        neighbour = board[x][pawn_pos[1]]
+                        if type(neighbour).__name__ == "Pawn" and neighbour.color == self.to_move:
+                            self.en_passant = True
+                            self.en_passant_pos = pawn_pos
+
+        self.halfmove_clock = int(fields[4]) if len(fields) > 4 else 0
+        self.fullmove_number = int(fields[5]) if len(fields) > 5 else 1
+        self.sync()
+        if validate:
+            problems = self.validation_errors()
+            if en_passant_problem is not None and en_passant_problem not in problems:
+                problems.append(en_passant_problem)
+
+            if problems:
+                raise InvalidPositionError(problems)
+
+    def sync(self) -> None:
+        """Rebuilds every field worked out from the pieces, for boards that were edited by hand
+
+        The king squares, the check flag, the Zobrist keys, the check and pin caches and the attack counts
+        are taken from the board again. Castling rights and en passant are left alone, validate reports
+        them when they do not fit the board.
+        """
+        self.white_king_pos = None
+        self.black_king_pos = None
+        for x in range(8):
+            for y in range(8):
+                piece = self.board[x][y]
+                if piece is not None and piece.symbol == "K":
+                    if piece.color == Color.WHITE:
+                        self.white_king_pos = (x, y)
+
+                    else:
+                        self.black_king_pos = (x, y)
+
+        self._key = None
+        self._pawn_key = None
+        self._checks = []
+        self._pins = []
+        if self.attacks is not None:
+            self.attacks.rebuild(self.board)
+
+        self.check = None
+        other = Color.BLACK if self.to_move == Color.WHITE else Color.WHITE
+        king = self._king_square(self.to_move)
+        if king is not None and self.is_square_attacked(king, other):
+            self.check = self.to_move
+
+    def validation_errors(self) -> list[str]:
+        """Lists what keeps the position from coming up in a game, empty when nothing does
+
+        One pass over the board and two attack tests, cheap enough to run on every position of an import.
+        The checks are: one king of each color and the king fields pointing at them, kings not next to each
+        other, no pawns on the first or last rank, the side not to move not in check, the check flag right,
+        an unmoved king, which could castle, only on its starting square, nothing but an unmoved rook of its
+        color to castle with, and an en passant pawn that just moved two squares.
+        """
+        problems = []
+        kings = {Color.WHITE : [], Color.BLACK : []}
+        for x in range(8):
+            for y in range(8):
+                piece = self.board[x][y]
+                if piece is None:
+                    continue
+
+                if piece.symbol == "K":
+                    kings[piece.color].append((x, y))
+                    if not piece.has_moved and (x, y) != (4, 0 if piece.color == Color.WHITE else 7):
+                        problems.append(f"Unmoved king away from its starting square on {coord_to_square((x, y))}")
+
+                elif piece.symbol == "p" and y in (0, 7):
+                    problems.append(f"Pawn on the back rank on {coord_to_square((x, y))}")
+
+        for color, field in ((Color.WHITE, self.white_king_pos), (Color.BLACK, self.black_king_pos)):
+            name = "White" if color == Color.WHITE else "Black"
+            if len(kings[color]) != 1:
+                problems.append(f"{name} has {len(kings[color])} kings")
+
+            elif field != kings[color][0]:
+                problems.append(f"{name} king field points at {field} but the king is on {kings[color][0]}")
+
+        if problems:
+            # The remaining checks need both kings where the fields say
+            return problems
+
+        white, black = kings[Color.WHITE][0], kings[Color.BLACK][0]
+        if max(abs(white[0] - black[0]), abs(white[1] - black[1])) == 1:
+            problems.append("The kings are next to each other")
+
+        # King.castling takes any unmoved piece in the corner for the rook
+        for color, king in ((Color.WHITE, white), (Color.BLACK, black)):
+            y = 0 if color == Color.WHITE else 7
+            if king != (4, y) or self.board[4][y].has_moved:
+                continue
+
+            for x in (0, 7):
+                piece = self.board[x][y]
+                if piece is not None and not piece.has_moved and (piece.symbol != "R" or piece.color != color):
+                    problems.append(f"The unmoved piece on {coord_to_square((x, y))} can castle but is not a rook "
+                                    "of the king's color")
+
+        other = Color.BLACK if self.to_move == Color.WHITE else Color.WHITE
+        if self.is_square_attacked(black if other == Color.BLACK else white, self.to_move):
+            problems.append("The side not to move is in check")
+
+        in_check = self.is_square_attacked(white if self.to_move == Color.WHITE else black, other)
+        if (self.check == self.to_move) != in_check or self.check not in (None, self.to_move):
+            problems.append("The check flag does not match the board")
+
+        if self.en_passant:
+            if self.en_passant_pos is None:
+                problems.append("En passant is set without a pawn")
+
+            else:
+                problem = self._en_passant_problem(self.en_passant_pos)
+                if problem is not None:
+                    problems.append(problem)
+
+        return problems
+
+    def _en_passant_problem(self, pawn_pos: tuple[int, int]) -> str | None:
+        """Says what is wrong with a pawn to take en passant, None if it could have just moved two squares"""
+        other = Color.BLACK if self.to_move == Color.WHITE else Color.WHITE
+        x, y = pawn_pos
+        rank = 4 if other == Color.BLACK else 3
+        pawn = self.board[x][y]
+        if y != rank or pawn is None or pawn.symbol != "p" or pawn.color != other:
+            return f"No pawn that just moved two squares on {coord_to_square((x, y))}"
+
+        direction = 1 if other == Color.BLACK else -1
+        if self.board[x][y + direction] is not None or self.board[x][y + 2 * direction] is not None:
+            return f"The squares the pawn on {coord_to_square((x, y))} passed are not empty"
+
+        return None
+
+    def validate(self) -> None:
+        """Raises InvalidPositionError listing every problem validation_errors finds"""
+        problems = self.validation_errors()
+        if problems:
+            raise InvalidPositionError(problems)
+
+    def to_fen(self) -> str:
+        """Returns the current position as a FEN string"""
+        rows = []
+        for y in range(7, -1, -1):
+            row = ""
+            empty = 0
+            for x in range(8):
+                piece = self.board[x][y]
+                if piece is None:
+                    empty += 1
+                    continue
+
+                if empty:
+                    row += str(empty)
+                    empty = 0
+
+                letter = piece.symbol.upper()
+                row += letter if piece.color == Color.WHITE else letter.lower()
+
+            if empty:
+                row += str(empty)
+
+            rows.append(row)
+
+        side = "w" if self.to_move == Color.WHITE else "b"
+        rights = self.castling_rights() or "-"
+        target = "-"
+        if self.en_passant:
+            direction = 1 if self.to_move == Color.WHITE else -1
+            target = coord_to_square((self.en_passant_pos[0], self.en_passant_pos[1] + direction))
+
+        return f"{'/'.join(rows)} {side} {rights} {target} {self.halfmove_clock} {self.fullmove_number}"
@@ -0,0 +1,181 @@
+from .attacks import BISHOP_DIRECTIONS, KNIGHT_STEPS, ROOK_DIRECTIONS
+from .lines import BETWEEN, LINE, square_bit, square_index
+from .pieces import Color
+
+
+class CheckInfo():
+    """What it takes for one side to check the other side's king in a position
+
+    Worked out once per position, after which whether a move gives check is a lookup instead of a search
+    outwards from the king after the move is made.
+
+    Attributes:
+        king (tuple[int, int] | None): Square of the king that would be in check
+        squares (dict[str, set[tuple[int, int]]]): For each piece symbol, the squares from which a piece of
+            that kind attacks the king
+        discoverers (dict[tuple[int, int], tuple[int, int]]): Squares of the checking side's pieces that are
+            the only thing between the king and one of its own sliders, with the direction from the king.
+            Moving such a piece off that line uncovers a check
+    """
+    def __init__(self, board: list[list], king: tuple[int, int] | None, color: Color):
+        """Works out the check squares
+
+        Args:
+            board (list[list[None|pieces]]): The board
+            king (tuple[int, int] | None): Square of the king that would be in check, None if it has no king
+            color (Color): Side giving the check
+        """
+        self.king = king
+        self.squares = {"p" : set(), "N" : set(), "B" : set(), "R" : set(), "Q" : set(), "K" : set()}
+        self.discoverers = {}
+        if king is None:
+            return
+
+        x, y = king
+        # A pawn checks from one rank behind the king, seen from the checking side
+        behind = y - 1 if color == Color.WHITE else y + 1
+        if 0 <= behind <= 7:
+            for file in (x - 1, x + 1):
+                if 0 <= file <= 7:
+                    self.squares["p"].add((file, behind))
+
+        for dx, dy in KNIGHT_STEPS:
+            if 0 <= x + dx <= 7 and 0 <= y + dy <= 7:
+                self.squares["N"].add((x + dx, y + dy))
+
+        for directions, symbol in ((ROOK_DIRECTIONS, "R"), (BISHOP_DIRECTIONS, "B")):
+            for direction in directions:
+                self._walk(board, direction, symbol, color)
+
+            self.squares["Q"] |= self.squares[symbol]
+
+    def _walk(self, board: list[list], direction: tuple[int, int], symbol: str, color: Color) -> None:
+        """Follows one ray out of the king, collecting check squares and a possible discoverer"""
+        dx, dy = direction
+        i, j = self.king[0] + dx, self.king[1] + dy
+        blocker = None
+        while 0 <= i <= 7 and 0 <= j <= 7:
+            piece = board[i][j]
+            if blocker is None:
+                # Every square up to and including the first piece, which could be taken
+                self.squares[symbol].add((i, j))
+
+            if piece is not None:
+                if blocker is not None:
+                    if piece.color == color and piece.symbol in (symbol, "Q"):
+                        self.discoverers[blocker] = direction
+
+                    return
+
+                if piece.color != color:
+                    return
+
+                blocker = (i, j)
+
+            i += dx
+            j += dy
+
+    def gives_check(self, symbol: str, start: tuple[int, int], end: tuple[int, int]) -> bool:
+        """Checks if an ordinary move, not castling, en passant or a promotion, gives check
+
+        Args:
+            symbol (str): Symbol of the moving piece
+            start (tuple[int, int]): Square the piece leaves
+            end (tuple[int, int]): Square the piece goes to
+        """
+        if self.king is None:
+            return False
+
+        if end in self.squares[symbol]:
+            return True
+
+        direction = self.discoverers.get(start)
+        if direction is None:
+            return False
+
+        # Still a discovered check unless the piece stays on the line through the king
+        return (end[0] - self.king[0]) * direction[1] != (end[1] - self.king[1]) * direction[0]
+
+
+class PinInfo():
+    """What the side to move may do without leaving its own king in check
+
+    Worked out once per position, after which a move of any piece but the king, other than en passant, is
+    legal exactly when it ends inside two masks: the evasion mask when in check, and the line of its pin
+    when it is pinned. Nothing has to be played on the board.
+
+    Attributes:
+        king (tuple[int, int] | None): Square of the king of the side to move
+        checkers (list[tuple[int, int]]): Squares of the pieces giving check
+        evasions (int | None): Squares a move that is not a king move has to end on to deal with the check,
+            the checker and the squares between it and the king. 0 in double check and None when not in check
+        pinned (dict[tuple[int, int], int]): Pieces of the side to move that are the only thing between their
+            king and an enemy slider, with the LINE mask through the king and the slider they have to stay on
+    """
+    def __init__(self, board: list[list], king: tuple[int, int] | None, color: Color):
+        """Works out the pins and checks
+
+        Args:
+            board (list[list[None|pieces]]): The board
+            king (tuple[int, int] | None): Square of the king, None if the side has no king
+            color (Color): Side to move
+        """
+        self.king = king
+        self.checkers = []
+        self.evasions = None
+        self.pinned = {}
+        if king is None:
+            return
+
+        x, y = king
+        # Enemy pawns check from one rank in front of the king
+        ahead = y + 1 if color == Color.WHITE else y - 1
+        steps = [((-1, ahead - y), "p"), ((1, ahead - y), "p")] + [(step, "N") for step in KNIGHT_STEPS]
+        for (dx, dy), symbol in steps:
+            i, j = x + dx, y + dy
+            if 0 <= i <= 7 and 0 <= j <= 7:
+                piece = board[i][j]
+                if piece is not None and piece.color != color and piece.symbol == symbol:
+                    self.checkers.append((i, j))
+
+        for directions, symbol in ((ROOK_DIRECTIONS, "R"), (BISHOP_DIRECTIONS, "B")):
+            for dx, dy in directions:
+                i, j = x + dx, y + dy
+                blocker = None
+                while 0 <= i <= 7 and 0 <= j <= 7:
+                    piece = board[i][j]
+                    if piece is not None:
+                        if piece.color == color:
+                            if blocker is not None:
+                                break
+
+                            blocker = (i, j)
+
+                        else:
+                            if piece.symbol in (symbol, "Q"):
+                                if blocker is None:
+                                    self.checkers.append((i, j))
+
+                                else:
+                                    self.pinned[blocker] = LINE[square_index(king)][square_index((i, j))]
+
+                            break
+
+                    i += dx
+                    j += dy
+
+        if len(self.checkers) == 1:
+            checker = self.checkers[0]
+            self.evasions = BETWEEN[square_index(king)][square_index(checker)] | square_bit(checker)
+
+        elif self.checkers:
+            self.evasions = 0
+
+    def allows(self, start: tuple[int, int], end: tuple[int, int]) -> bool:
+        """Checks if a pseudo legal move of a piece other than the king, and not en passant, is legal"""
+        bit = square_bit(end)
+        if self.evasions is not None and not self.evasions & bit:
+            return False
+
+        line = self.pinned.get(start)
+        return line is None or bool(line & bit)
@@ -0,0 +1,62 @@
+# Squares in the masks are bits numbered file * 8 + rank, like the Zobrist tables and the pawn masks
+
+# The pieces module uses these tables, so the directions are not taken from the attacks module, which
+# imports the pieces
+_DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+
+
+def square_index(square: tuple[int, int]) -> int:
+    """Returns the bit number of a square"""
+    return square[0] * 8 + square[1]
+
+
+def square_bit(square: tuple[int, int]) -> int:
+    """Returns the mask holding only the given square"""
+    return 1 << (square[0] * 8 + square[1])
+
+
+def mask_squares(mask: int) -> list[tuple[int, int]]:
+    """Lists the squares of a mask, lowest bit first"""
+    squares = []
+    while mask:
+        low = mask & -mask
+        index = low.bit_length() - 1
+        squares.append((index >> 3, index & 7))
+        mask ^= low
+
+    return squares
+
+
+def _build_tables() -> tuple[list[list[int]], list[list[int]]]:
+    """Works out the between and line masks of every pair of squares"""
+    between = [[0] * 64 for _ in range(64)]
+    line = [[0] * 64 for _ in range(64)]
+    for x in range(8):
+        for y in range(8):
+            a = x * 8 + y
+            for dx, dy in _DIRECTIONS:
+                # The whole line through the square along this direction, both ways
+                full = 1 << a
+                for sign in (1, -1):
+                    i, j = x + sign * dx, y + sign * dy
+                    while 0 <= i <= 7 and 0 <= j <= 7:
+                        full |= 1 << (i * 8 + j)
+                        i += sign * dx
+                        j += sign * dy
+
+                passed = 0
+                i, j = x + dx, y + dy
+                while 0 <= i <= 7 and 0 <= j <= 7:
+                    b = i * 8 + j
+                    between[a][b] = passed
+                    line[a][b] = full
+                    passed |= 1 << b
+                    i += dx
+                    j += dy
+
+    return between, line
+
+
+# BETWEEN[a][b] holds the squares strictly between a and b when they share a rank, file or diagonal, and
+# LINE[a][b] the whole rank, file or diagonal through both, ends included. Both are 0 for other pairs
+BETWEEN, LINE = _build_tables()
@@ -0,0 +1,118 @@
+import threading
+from collections import OrderedDict
+
+
+class MoveCache():
+    """Bounded least recently used cache of legal moves keyed by Zobrist key
+
+    Every position has the full list of legal moves, once something asked for it, and the squares each piece
+    can move to, filled in piece by piece as moves are validated. Boards use a cache only when given one,
+    and front ends that rebuild a board for every request can give each board the same cache to find the
+    moves of a position they asked about before.
+
+    Attributes:
+        capacity (int): Most positions kept
+        hits (int): Lookups answered from the cache
+        misses (int): Lookups that had to generate the moves
+    """
+    def __init__(self, capacity: int = 4096):
+        """Creates an empty cache
+
+        Args:
+            capacity (int): Most positions kept
+        """
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        # key -> [list of Move or None, {start square : end squares}]
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups answered from the cache, 0 before the first lookup"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def legal_moves(self, key: int) -> list | None:
+        """Returns the cached legal moves of a position, or None if they are not known"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def piece_moves(self, key: int, start: tuple[int, int]) -> list | None:
+        """Returns the cached squares the piece on start can move to, or None if they are not known"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or start not in entry[1]:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1][start]
+
+    def store_legal_moves(self, key: int, moves: list, starts: list[tuple[int, int]] = ()) -> None:
+        """Keeps every legal move of a position, which also gives the moves of each of its pieces
+
+        Args:
+            key (int): Zobrist key of the position
+            moves (list[Move]): Every legal move of the side to move
+            starts (list[tuple[int, int]]): Squares of all the pieces of the side to move, so the ones that
+                cannot move are known too
+        """
+        by_piece = {start : [] for start in starts}
+        for move in moves:
+            ends = by_piece.setdefault(move.start, [])
+            if move.end not in ends:
+                ends.append(move.end)
+
+        with self._lock:
+            entry = self._entry(key)
+            entry[0] = moves
+            entry[1].update(by_piece)
+
+    def store_piece_moves(self, key: int, start: tuple[int, int], ends: list) -> None:
+        """Keeps the squares the piece on start can move to"""
+        with self._lock:
+            self._entry(key)[1][start] = ends
+
+    def discard(self, key: int) -> None:
+        """Forgets one position, if it is kept"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Forgets every position, the statistics are kept"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Returns the size and hit rate of the cache"""
+        return {"positions" : len(self._entries),
+                "capacity" : self.capacity,
+                "hits" : self.hits,
+                "misses" : self.misses,
+                "hit_rate" : self.hit_rate}
+
+    def _entry(self, key: int) -> list:
+        """Returns the entry of a position, making room for it if it is new. Call with the lock held"""
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = [None, {}]
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+        else:
+            self._entries.move_to_end(key)
+
+        return entry
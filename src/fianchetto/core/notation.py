@@ -0,0 +1,221 @@
+from typing import TYPE_CHECKING
+
+from .pieces import Color
+
+if TYPE_CHECKING:
+    from fianchetto import BoardManager
+
+FILES = "abcdefgh"
+
+# Maps the upper case letter used in SAN and FEN to the symbol stored on the piece
+LETTER_TO_SYMBOL = {"P" : "p",
+                    "N" : "N",
+                    "B" : "B",
+                    "R" : "R",
+                    "Q" : "Q",
+                    "K" : "K"}
+
+PROMOTION_SYMBOLS = ("Q", "R", "B", "N")
+
+
+def square_to_coord(square: str) -> tuple[int, int]:
+    """Converts a square name such as "e4" into board coordinates
+
+    Args:
+        square (str): Name of the square, file letter followed by rank number
+
+    Return:
+        (file, rank) coordinates of the square
+    """
+    if len(square) != 2 or square[0] not in FILES or square[1] not in "12345678":
+        raise ValueError(f"Not a valid square: {square}")
+
+    return (FILES.index(square[0]), int(square[1]) - 1)
+
+
+def coord_to_square(coord: tuple[int, int]) -> str:
+    """Converts board coordinates into a square name such as "e4"
+
+    Args:
+        coord (tuple[int, int]): (file, rank) coordinates of the square
+
+    Return:
+        Name of the square
+    """
+    return f"{FILES[coord[0]]}{coord[1] + 1}"
+
+
+def move_to_uci(start: tuple[int, int], end: tuple[int, int], promotion: str | None = None) -> str:
+    """Formats a move in long algebraic (UCI) notation, for example "e7e8q"
+
+    Args:
+        start (tuple[int, int]): Square the piece starts on
+        end (tuple[int, int]): Square the piece ends on
+        promotion (str | None): Symbol of the piece a pawn promotes to
+
+    Return:
+        The move as a string
+    """
+    text = coord_to_square(start) + coord_to_square(end)
+    if promotion is not None:
+        text += promotion.lower()
+
+    return text
+
+
+def uci_to_move(text: str) -> tuple[tuple[int, int], tuple[int, int], str | None]:
+    """Parses a move in long algebraic (UCI) notation
+
+    Args:
+        text (str): Move such as "g1f3" or "e7e8q"
+
+    Return:
+        (start, end, promotion) where promotion is an upper case symbol or None
+    """
+    text = text.strip()
+    if len(text) not in (4, 5):
+        raise ValueError(f"Not a valid move: {text}")
+
+    promotion = None
+    if len(text) == 5:
+        promotion = text[4].upper()
+        if promotion not in PROMOTION_SYMBOLS:
+            raise ValueError(f"Not a valid promotion: {text}")
+
+    return (square_to_coord(text[0:2]), square_to_coord(text[2:4]), promotion)
+
+
+def san_to_move(san: str, game: 'BoardManager') -> tuple[tuple[int, int], tuple[int, int], str | None]:
+    """Resolves a move in standard algebraic notation against the current position
+
+    Args:
+        san (str): Move such as "Nbd7", "exd5", "O-O" or "e8=Q+"
+        game (BoardManager): The position the move is played in
+
+    Return:
+        (start, end, promotion) for the side to move
+    """
+    text = san.strip().rstrip("+#!?")
+    color = game.to_move
+    rank = 0 if color == Color.WHITE else 7
+
+    if text in ("O-O", "0-0"):
+        return ((4, rank), (6, rank), None)
+
+    if text in ("O-O-O", "0-0-0"):
+        return ((4, rank), (2, rank), None)
+
+    promotion = None
+    if "=" in text:
+        text, promotion = text.split("=")
+        promotion = promotion.upper()
+
+    elif len(text) > 2 and text[-1] in "QRBN" and text[-2] in "18":
+        # Some writers leave out the "="
+        promotion = text[-1]
+        text = text[:-1]
+
+    if promotion is not None and promotion not in PROMOTION_SYMBOLS:
+        raise ValueError(f"Not a valid promotion: {san}")
+
+    letter = "P"
+    if text and text[0] in "NBRQK":
+        letter = text[0]
+        text = text[1:]
+
+    text = text.replace("x", "").replace("-", "")
+    if len(text) < 2:
+        raise ValueError(f"Not a valid move: {san}")
+
+    end = square_to_coord(text[-2:])
+    hint = text[:-2]
+    hint_file = None
+    hint_rank = None
+    for char in hint:
+        if char in FILES:
+            hint_file = FILES.index(char)
+
+        elif char in "12345678":
+            hint_rank = int(char) - 1
+
+        else:
+            raise ValueError(f"Not a valid move: {san}")
+
+    symbol = LETTER_TO_SYMBOL[letter]
+    candidates = []
+    for x in range(8):
+        if hint_file is not None and x != hint_file:
+            continue
+
+        for y in range(8):
+            if hint_rank is not None and y != hint_rank:
+                continue
+
+            piece = game.board[x][y]
+            if piece is None or piece.color != color or piece.symbol != symbol:
+                continue
+
+            if end in piece.generate_valid_moves((x, y), game):
+                candidates.append((x, y))
+
+    if len(candidates) != 1:
+        raise ValueError(f"Not a legal move: {san}")
+
+    return (candidates[0], end, promotion)
+
+
+
+def move_to_san(move: tuple, game: 'BoardManager') -> str:
+    """Formats a legal move of the side to move in standard algebraic notation
+
+    Args:
+        move (tuple): (start, end, promotion) of the move, promotion may be left out
+        game (BoardManager): The position the move is played in, it is left unchanged
+
+    Return:
+        The move such as "Nbd7", "exd5", "O-O" or "e8=Q+"
+    """
+    # The board module imports this one, so Move can only be imported once both are loaded
+    from .board_manager import Move
+
+    move = Move(*move)
+    start, end, promotion = move
+    piece = game.board[start[0]][start[1]]
+    if piece is None:
+        raise ValueError(f"No piece on {coord_to_square(start)}")
+
+    capture = game.is_capture(move)
+    if piece.symbol == "K" and abs(start[0] - end[0]) == 2:
+        san = "O-O" if end[0] == 6 else "O-O-O"
+
+    elif piece.symbol == "p":
+        san = f"{FILES[start[0]]}x" if capture else ""
+        san += coord_to_square(end)
+        if end[1] in (0, 7):
+            promotion = promotion or "Q"
+            san += f"={promotion}"
+
+    else:
+        # Name the file, rank or both when another piece of the same kind can reach the square
+        rivals = [other.start for other in game.legal_moves()
+                  if other.end == end and other.start != start
+                  and game.board[other.start[0]][other.start[1]].symbol == piece.symbol]
+        hint = ""
+        if rivals:
+            if all(rival[0] != start[0] for rival in rivals):
+                hint = FILES[start[0]]
+
+            elif all(rival[1] != start[1] for rival in rivals):
+                hint = str(start[1] + 1)
+
+            else:
+                hint = coord_to_square(start)
+
+        san = f"{piece.symbol}{hint}{'x' if capture else ''}{coord_to_square(end)}"
+
+    game.make_move(Move(start, end, promotion))
+    if game.check == game.to_move:
+        san += "+" if game.legal_moves() else "#"
+
+    game.unmake_move()
+    return san
@@ -0,0 +1,45 @@
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from fianchetto import BoardManager
+
+
+def perft(game: 'BoardManager', depth: int) -> int:
+    """Counts the leaf nodes of the legal move tree, used to check and time move generation
+
+    Args:
+        game (BoardManager): Position to start from, it is left unchanged
+        depth (int): Number of plies to look ahead
+
+    Return:
+        Number of move sequences of exactly depth plies
+    """
+    if depth == 0:
+        return 1
+
+    moves = game.legal_moves()
+    if depth == 1:
+        return len(moves)
+
+    nodes = 0
+    for move in moves:
+        game.make_move(move)
+        nodes += perft(game, depth - 1)
+        game.unmake_move()
+
+    return nodes
+
+
+def divide(game: 'BoardManager', depth: int) -> dict:
+    """Splits the perft count by the first move, to find which move a wrong count comes from
+
+    Return:
+        {move : leaf nodes below it}
+    """
+    counts = {}
+    for move in game.legal_moves():
+        game.make_move(move)
+        counts[move] = perft(game, depth - 1)
+        game.unmake_move()
+
+    return counts
@@ -0,0 +1,281 @@
+import os
+import re
+from typing import BinaryIO, Iterator
+
+from .board_manager import BoardManager
+from .notation import san_to_move
+
+_TAG = re.compile(r'^\[(\w+)\s+"(.*)"\]\s*$')
+_RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+
+
+class PgnGame():
+    """A single game read from a PGN file
+
+    Attributes:
+        headers (dict[str, str]): The tag pairs of the game
+        moves (list[str]): The main line of the game in standard algebraic notation
+        result (str): The result token, one of "1-0", "0-1", "1/2-1/2" or "*"
+        offset (int): Byte offset of the start of the game in the source file
+    """
+    def __init__(self, headers: dict[str, str], moves: list[str], result: str, offset: int = 0):
+        """Creates a game from its parsed parts
+
+        Args:
+            headers (dict[str, str]): The tag pairs of the game
+            moves (list[str]): The main line of the game in standard algebraic notation
+            result (str): The result token
+            offset (int): Byte offset of the start of the game in the source file
+        """
+        self.headers = headers
+        self.moves = moves
+        self.result = result
+        self.offset = offset
+
+    def start_position(self) -> BoardManager:
+        """Returns a board set up with the starting position of the game
+
+        Raises ValueError when the FEN header is not a position that could come up in a game.
+        """
+        game = BoardManager()
+        if "FEN" in self.headers:
+            game.load_fen(self.headers["FEN"], validate=True)
+
+        else:
+            game.generate_starting_position()
+
+        return game
+
+    def replay(self) -> Iterator[tuple[BoardManager, tuple[tuple[int, int], tuple[int, int], str | None]]]:
+        """Plays through the game one move at a time
+
+        The same board is yielded every time, showing the position before the move that is yielded
+        with it. The move is played once the caller asks for the next one.
+
+        Return:
+            Iterator of (board, (start, end, promotion)) pairs
+        """
+        game = self.start_position()
+        for san in self.moves:
+            move = san_to_move(san, game)
+            yield game, move
+            game.move(move[0], move[1], move[2] or ("Q" if _is_promotion(game, move) else None))
+
+    def final_position(self) -> BoardManager:
+        """Returns the board after the last move of the game"""
+        game = None
+        for game, _ in self.replay():
+            pass
+
+        return game if game is not None else self.start_position()
+
+
+def _is_promotion(game: BoardManager, move: tuple[tuple[int, int], tuple[int, int], str | None]) -> bool:
+    """Checks if a move is a pawn reaching the last rank"""
+    piece = game.board[move[0][0]][move[0][1]]
+    return type(piece).__name__ == "Pawn" and move[1][1] in (0, 7)
+
+
+def parse_movetext(text: str) -> tuple[list[str], str]:
+    """Pulls the main line out of PGN movetext
+
+    Comments, variations, move numbers and numeric annotation glyphs are dropped.
+
+    Args:
+        text (str): The movetext of a single game
+
+    Return:
+        (moves, result) where result is "*" if the movetext does not end with one
+    """
+    text = re.sub(r"\{[^}]*\}", " ", text)
+    text = re.sub(r";[^\n]*", " ", text)
+
+    # Variations can nest, so strip them from the inside out
+    previous = None
+    while previous != text:
+        previous = text
+        text = re.sub(r"\([^()]*\)", " ", text)
+
+    moves = []
+    result = "*"
+    for token in text.split():
+        token = re.sub(r"^\d+\.+", "", token)
+        if not token or token.startswith("$"):
+            continue
+
+        if token in _RESULTS:
+            result = token
+            continue
+
+        moves.append(token)
+
+    return moves, result
+
+
+def iter_games(stream: BinaryIO) -> Iterator[PgnGame]:
+    """Streams the games of a PGN file one at a time
+
+    Args:
+        stream (BinaryIO): PGN file opened in binary mode
+
+    Return:
+        Iterator over the games in the file
+    """
+    headers = {}
+    movetext = []
+    offset = stream.tell()
+    start = None
+    for raw in stream:
+        line = raw.decode("utf-8", errors="replace").strip()
+        match = _TAG.match(line)
+        if match is not None:
+            if movetext:
+                moves, result = parse_movetext(" ".join(movetext))
+                yield PgnGame(headers, moves, headers.get("Result", result) if result == "*" else result, start)
+                headers = {}
+                movetext = []
+                start = None
+
+            if start is None:
+                start = offset
+
+            headers[match.group(1)] = match.group(2)
+
+        elif line and not line.startswith("%"):
+            if start is None:
+                start = offset
+
+            movetext.append(line)
+
+        offset += len(raw)
+
+    if headers or movetext:
+        moves, result = parse_movetext(" ".join(movetext))
+        yield PgnGame(headers, moves, headers.get("Result", result) if result == "*" else result, start)
+
+
+def read_games(path: str) -> Iterator[PgnGame]:
+    """Streams the games of the PGN file at the given path
+
+    Args:
+        path (str): Location of the PGN file
+
+    Return:
+        Iterator over the games in the file
+    """
+    with open(path, "rb") as stream:
+        yield from iter_games(stream)
+
+
+def split_ranges(path: str, parts: int) -> list[tuple[int, int]]:
+    """Cuts a PGN file into byte ranges that each start at a game, so workers can read it in parallel
+
+    Args:
+        path (str): Location of the PGN file
+        parts (int): Number of ranges wanted, fewer come back for small files
+
+    Return:
+        (start, end) byte offsets covering the whole file
+    """
+    size = os.path.getsize(path)
+    starts = [0]
+    with open(path, "rb") as stream:
+        for i in range(1, parts):
+            stream.seek(max(size * i // parts, starts[-1]))
+            stream.readline()
+            # Games start with a tag line right after a blank line
+            blank = False
+            while True:
+                offset = stream.tell()
+                line = stream.readline()
+                if not line:
+                    offset = size
+                    break
+
+                if blank and line.startswith(b"["):
+                    break
+
+                blank = not line.strip()
+
+            if offset >= size:
+                break
+
+            if offset > starts[-1]:
+                starts.append(offset)
+
+    return [(start, end) for start, end in zip(starts, starts[1:] + [size])]
+
+
+def read_games_range(path: str, start: int, end: int) -> Iterator[PgnGame]:
+    """Streams the games that start inside a byte range of a PGN file
+
+    Args:
+        path (str): Location of the PGN file
+        start (int): Offset of the first game, as given by split_ranges
+        end (int): Games starting at or after this offset are left for the next range
+
+    Return:
+        Iterator over the games
+    """
+    with open(path, "rb") as stream:
+        stream.seek(start)
+        for pgn_game in iter_games(stream):
+            if pgn_game.offset is not None and pgn_game.offset >= end:
+                return
+
+            yield pgn_game
+
+
+def format_pgn(headers: dict[str, str], moves: list[str], result: str, fullmove_number: int = 1,
+               black_first: bool = False, annotations: list[str] | None = None) -> str:
+    """Writes a game as PGN text
+
+    Args:
+        headers (dict[str, str]): Tag pairs, written in the order given
+        moves (list[str]): Moves in standard algebraic notation
+        result (str): The result token, one of "1-0", "0-1", "1/2-1/2" or "*"
+        fullmove_number (int): Number of the first move
+        black_first (bool): True if the first move is black's
+        annotations (list[str] | None): Glyphs and comments written after each move, such as
+            "$2 {[%eval 0.35]}", an empty string or a missing entry for none
+
+    Return:
+        The game followed by a blank line
+    """
+    lines = [f'[{name} "{value}"]' for name, value in headers.items()]
+    lines.append("")
+
+    tokens = []
+    number = fullmove_number
+    white = not black_first
+    for i, san in enumerate(moves):
+        if white:
+            tokens.append(f"{number}.")
+
+        elif i == 0 or (annotations is not None and i <= len(annotations) and annotations[i - 1]):
+            # Black's move number is given again after anything that follows white's move
+            tokens.append(f"{number}...")
+
+        tokens.append(san)
+        if annotations is not None and i < len(annotations) and annotations[i]:
+            tokens.append(annotations[i])
+
+        if not white:
+            number += 1
+
+        white = not white
+
+    tokens.append(result)
+
+    # Keep movetext lines under 80 characters
+    line = ""
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > 79:
+            lines.append(line)
+            line = token
+
+        else:
+            line = f"{line} {token}" if line else token
+
+    lines.append(line)
+    return "\n".join(lines) + "\n\n"
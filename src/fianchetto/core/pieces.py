@@ -3,6 +3,8 @@ from abc import ABC, abstractmethod
 
 from typing import TYPE_CHECKING
 
+from .lines import BETWEEN, mask_squares
+
 if TYPE_CHECKING:
     from fianchetto import BoardManager
 
@@ -67,7 +69,7 @@ class Piece(ABC):
         else:
             king_pos = game.black_king_pos
 
-        king = game.board[king_pos[0]][king_pos[1]]
+        king = None if king_pos is None else game.board[king_pos[0]][king_pos[1]]
 
         for move in moves:
             #If its a king move, update the kings position
@@ -80,12 +82,22 @@ class Piece(ABC):
 
             # Create a temp to hold what was on the destination square
             temp = game.board[move[0]][move[1]]
-            game._free_move(position, move)
+            # A pawn moving diagonally onto an empty square takes en passant, the taken pawn leaves its rank too
+            passed = None
+            if temp is None and move[0] != pos_x and type(piece).__name__ == "Pawn":
+                passed = game.board[move[0]][pos_y]
+                game.board[move[0]][pos_y] = None
+
+            game.board[move[0]][move[1]] = piece
+            game.board[pos_x][pos_y] = None
 
             if king is None or not king.in_check(game):
                 # King might be none durring debuging
                 result.append(move)
 
+            if passed is not None:
+                game.board[move[0]][pos_y] = passed
+
             # Reset king position
             if type(piece).__name__ == "King":
                 if piece.color == Color.WHITE:
@@ -94,7 +106,7 @@ class Piece(ABC):
                 else:
                     game.black_king_pos = (pos_x, pos_y)
             
-            game._free_move(move, position)
+            game.board[pos_x][pos_y] = piece
             game.board[move[0]][move[1]] = temp
             
         
@@ -155,12 +167,17 @@ class Pawn(Piece):
             
         # Check forward movement
         moves = []
+
+        # Pawns can only stand on the last rank while they are used to look for checks
+        if position[1] + move_direction > 7 or position[1] + move_direction < 0:
+            return moves
+
         next_square = game.board[position[0]][position[1] + move_direction]
 
         if next_square is None:
             moves.append((position[0], position[1] + move_direction))
 
-            if not self.has_moved:
+            if not self.has_moved and 0 <= position[1] + (move_direction * 2) <= 7:
 
                 next_square = game.board[position[0]][position[1] + (move_direction * 2)]
 
@@ -552,12 +569,14 @@ class King(Piece):
         self._symbol = 'K'
         self._value = None
 
-    def generate_valid_moves(self, position: tuple[int, int], game: 'BoardManager') -> list[tuple[int, int]]:
+    def generate_valid_moves(self, position: tuple[int, int], game: 'BoardManager', checks: bool = False) -> list[tuple[int, int]]:
         """Returns a list of all the valid moves the piece can make
 
         Args:
             position (tuple[int, int]): A tuple contating 2 ints that give where on the board this piece is.
             game (BoardManager): A representation of the board itself.
+            checks (bool): Is true if it is being used to look for checks and not make a move. Castling
+                is left out since it never attacks a square
 
         Return:
             list of coordinates where the piece can end up
@@ -573,15 +592,28 @@ class King(Piece):
                     if game.board[x + i][y + j] is None or game.board[x + i][y + j].color != self.color:
                         moves.append((x + i, y + j))
 
+        # If we are looking for checks, dont try to look for checks again
+        if checks:
+            return moves
+
         moves.extend(self.castling(game))
 
         return self._remove_checks(position, moves, game)
     
     def castling(self, game: 'BoardManager') -> list[tuple[int, int]]:
+        """Returns the squares the king can castle to
+
+        The squares between the king and rook are tested with one lookup in the BETWEEN table, and
+        whether the king is in check comes from the pins and checks of the position.
+
+        Args:
+            game (BoardManager): A representation of the board itself.
+
+        Return:
+            list of the castling destinations of the king
+        """
         moves = []
-        # Ensure king is not in check and hasnt moved
-        if self.has_moved or self.in_check(game):
-            return moves
+        enemy = Color.BLACK if self.color == Color.WHITE else Color.WHITE
 
         # Select correct side of the board
         if self.color == Color.WHITE:
@@ -592,43 +624,40 @@ class King(Piece):
             pos = game.black_king_pos
             y = 7
 
-        # Check kingside rook
-        if game.board[7][y] is not None and not game.board[7][y].has_moved:
-            # Check path is clear
-            is_clear = True
-            for i in range(5,7):
-                if game.board[i][y] is not None:
-                    is_clear = False
-                    break
-            
-            if is_clear:
-                # Check if crossing check
-                path = self._remove_checks(pos,[(5, y)], game)
+        # Ensure king is not in check and hasnt moved
+        if self.has_moved:
+            return moves
+
+        if self.color == game.to_move and game.board[pos[0]][pos[1]] is self:
+            in_check = bool(game.pin_info().checkers)
 
-                if len(path) == 1:
-                    moves.append((6, y))
+        else:
+            in_check = game.is_square_attacked(pos, enemy)
+
+        if in_check:
+            return moves
+
+        # (rook file, king destination, square the king crosses)
+        for rook_file, end, crossed in ((7, 6, 5), (0, 2, 3)):
+            rook = game.board[rook_file][y]
+            if rook is None or rook.has_moved or rook.symbol != "R" or rook.color != self.color:
+                continue
 
-        # Check queenside rook
-        if game.board[0][y] is not None and not game.board[0][y].has_moved:
             # Check path is clear
-            is_clear = True
-            for i in range(1,4):
-                if game.board[i][y] is not None:
-                    is_clear = False
-                    break
-            
-            if is_clear:
-                # Check if crossing check
-                path = self._remove_checks(pos,[(3, y)], game)
+            if any(game.board[i][j] is not None for i, j in mask_squares(BETWEEN[4 * 8 + y][rook_file * 8 + y])):
+                continue
 
-                if len(path) == 1:
-                    moves.append((2, y))
+            # Check if crossing check
+            if not game.is_square_attacked((crossed, y), enemy):
+                moves.append((end, y))
 
         return moves
 
-    
     def in_check(self, game: 'BoardManager') -> bool:
-        """Returns if true if in check and false otherwise"""    
+        """Returns if true if in check and false otherwise
+
+        The squares next to the other king count as attacked by it, so a king can not move next to it.
+        """
         if self.color == Color.WHITE:
             x = game.white_king_pos[0]
             y = game.white_king_pos[1]
@@ -663,6 +692,11 @@ class King(Piece):
         vision = bishop.generate_valid_moves((x, y), game, True)
         if self._check_vision(vision, game, [type(queen), type(bishop)]):
             return True
+
+        # King checks, a king can never step next to the other king
+        vision = King(self.color).generate_valid_moves((x, y), game, True)
+        if self._check_vision(vision, game, [King]):
+            return True
         
         return False
 
@@ -0,0 +1,80 @@
+import random
+from typing import TYPE_CHECKING
+
+from .pieces import Color, Piece
+
+if TYPE_CHECKING:
+    from fianchetto import BoardManager
+
+# Order of the piece types inside the key tables, shared with the packed position format
+PIECE_ORDER = ("p", "N", "B", "R", "Q", "K")
+
+_rng = random.Random(0x46494E43)
+
+# PIECE_KEYS[color][piece][square] where square is file * 8 + rank
+PIECE_KEYS = [[[_rng.getrandbits(64) for _ in range(64)] for _ in PIECE_ORDER] for _ in range(2)]
+SIDE_KEY = _rng.getrandbits(64)
+CASTLING_KEYS = {right : _rng.getrandbits(64) for right in "KQkq"}
+EN_PASSANT_KEYS = [_rng.getrandbits(64) for _ in range(8)]
+
+
+def piece_index(piece: Piece) -> int:
+    """Returns the index of the piece type inside the key tables"""
+    return PIECE_ORDER.index(piece.symbol)
+
+
+def color_index(color: Color) -> int:
+    """Returns 0 for white and 1 for black"""
+    return 0 if color == Color.WHITE else 1
+
+
+def piece_key(piece: Piece, square: tuple[int, int]) -> int:
+    """Returns the key for the given piece standing on the given square"""
+    return PIECE_KEYS[color_index(piece.color)][piece_index(piece)][square[0] * 8 + square[1]]
+
+
+def compute_key(game: 'BoardManager') -> int:
+    """Computes the Zobrist key of a position from scratch
+
+    Args:
+        game (BoardManager): Position to hash
+
+    Return:
+        64 bit key of the position
+    """
+    key = 0
+    for x in range(8):
+        for y in range(8):
+            piece = game.board[x][y]
+            if piece is not None:
+                key ^= piece_key(piece, (x, y))
+
+    if game.to_move == Color.BLACK:
+        key ^= SIDE_KEY
+
+    for right in game.castling_rights():
+        key ^= CASTLING_KEYS[right]
+
+    if game.en_passant:
+        key ^= EN_PASSANT_KEYS[game.en_passant_pos[0]]
+
+    return key
+
+
+def compute_pawn_key(game: 'BoardManager') -> int:
+    """Computes a key of the pawns alone from scratch, for caching pawn structure evaluations
+
+    Args:
+        game (BoardManager): Position to hash
+
+    Return:
+        64 bit key of the pawns of both sides
+    """
+    key = 0
+    for x in range(8):
+        for y in range(8):
+            piece = game.board[x][y]
+            if piece is not None and piece.symbol == "p":
+                key ^= piece_key(piece, (x, y))
+
+    return key
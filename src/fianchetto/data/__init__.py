@@ -0,0 +1,3 @@
+from .dataset import DatasetReader, DatasetWriter, build_index
+from .explorer import OpeningExplorer, build_explorer
+from .game_index import GameIndex, build_game_index
\ No newline at end of file
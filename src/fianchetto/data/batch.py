@@ -0,0 +1,325 @@
+"""Attacks, check flags and move counts of many positions at once with NumPy bitboards
+
+This module needs NumPy (pip install fianchetto[numpy]). Every position is a set of 64 bit masks, one per
+piece type and color, with squares numbered file * 8 + rank as in the rest of the package. A step to the
+next rank is then a shift by 1 and a step to the next file a shift by 8. Each operation works on the
+masks of all positions together, so the Python overhead is paid once per batch instead of once per board.
+"""
+import numpy as np
+
+from fianchetto.core.attacks import attacked_squares
+from fianchetto.core.board_manager import BoardManager
+from fianchetto.core.pieces import Color
+from fianchetto.core.zobrist import PIECE_ORDER, color_index, piece_index
+
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
+_ALL = np.uint64(0xFFFF_FFFF_FFFF_FFFF)
+
+
+def _rank_mask(*ranks: int) -> np.uint64:
+    """Returns the mask of every square on the given ranks"""
+    return np.uint64(sum(1 << (x * 8 + y) for x in range(8) for y in ranks))
+
+
+RANK_3 = _rank_mask(2)
+RANK_6 = _rank_mask(5)
+BACK_RANKS = _rank_mask(0, 7)
+
+# Squares a step by this many ranks may land on, the others would have wrapped onto the next file
+_LANDING = {-2 : ~_rank_mask(6, 7), -1 : ~_rank_mask(7), 0 : _ALL, 1 : ~_rank_mask(0), 2 : ~_rank_mask(0, 1)}
+
+KNIGHT_STEPS = ((1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2))
+KING_STEPS = ((1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1))
+ROOK_DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+BISHOP_DIRECTIONS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+
+# (castling right bit, king destination file, files that must be empty, file the king crosses) by color
+_CASTLING = (((1, 6, (5, 6), 5), (2, 2, (1, 2, 3), 3)),
+             ((4, 6, (5, 6), 5), (8, 2, (1, 2, 3), 3)))
+
+
+def _shift(masks: np.ndarray, amount: int) -> np.ndarray:
+    """Shifts every mask towards higher squares for a positive amount and lower squares otherwise"""
+    if amount > 0:
+        return masks << np.uint64(amount)
+
+    return masks >> np.uint64(-amount)
+
+
+def step(masks: np.ndarray, files: int, ranks: int) -> np.ndarray:
+    """Moves every square of the masks by a number of files and ranks, dropping squares that leave the board"""
+    return _shift(masks, files * 8 + ranks) & _LANDING[ranks]
+
+
+def slide(sliders: np.ndarray, empty: np.ndarray, files: int, ranks: int) -> np.ndarray:
+    """Squares the sliders reach in one direction, up to and including the first occupied square
+
+    A Kogge-Stone fill: the sliders are spread through the empty squares in three doubling steps. On one
+    ray the first slider stops the ones behind it, so the rays of different sliders never overlap.
+
+    Args:
+        sliders (np.ndarray): Masks of the sliding pieces
+        empty (np.ndarray): Masks of the empty squares
+        files (int): File step of the direction, -1, 0 or 1
+        ranks (int): Rank step of the direction, -1, 0 or 1
+    """
+    amount = files * 8 + ranks
+    landing = _LANDING[ranks]
+    empty = empty & landing
+    sliders = sliders | (empty & _shift(sliders, amount))
+    empty = empty & _shift(empty, amount)
+    sliders = sliders | (empty & _shift(sliders, 2 * amount))
+    empty = empty & _shift(empty, 2 * amount)
+    sliders = sliders | (empty & _shift(sliders, 4 * amount))
+    return _shift(sliders, amount) & landing
+
+
+# Set bits of every byte value, for NumPy releases before 2.0 that have no bitwise_count
+_BYTE_COUNTS = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+_HAS_BITWISE_COUNT = hasattr(np, "bitwise_count")
+
+
+def table_popcount(masks: np.ndarray) -> np.ndarray:
+    """Counts the squares of every mask by looking up each of its bytes"""
+    masks = np.ascontiguousarray(masks, dtype=np.uint64)
+    return _BYTE_COUNTS[masks.view(np.uint8).reshape(masks.shape + (8,))].sum(axis=-1, dtype=np.int64)
+
+
+def popcount(masks: np.ndarray) -> np.ndarray:
+    """Counts the squares of every mask"""
+    if _HAS_BITWISE_COUNT:
+        return np.bitwise_count(masks).astype(np.int64)
+
+    return table_popcount(masks)
+
+
+class BoardBatch():
+    """Many positions held as bitboards
+
+    Attributes:
+        pieces (np.ndarray): uint64 masks of shape (N, 2, 6), indexed by color (white first) and piece
+            type in zobrist.PIECE_ORDER
+        white_to_move (np.ndarray): Bool array of shape (N,)
+        castling (np.ndarray): uint8 array of shape (N,), bits 0 - 3 are the KQkq castling rights
+        en_passant (np.ndarray): int8 array of shape (N,), the file of the pawn that can be taken en
+            passant or -1
+    """
+    def __init__(self, pieces: np.ndarray, white_to_move: np.ndarray, castling: np.ndarray,
+                 en_passant: np.ndarray):
+        self.pieces = pieces
+        self.white_to_move = white_to_move
+        self.castling = castling
+        self.en_passant = en_passant
+
+    def __len__(self) -> int:
+        return len(self.pieces)
+
+    @classmethod
+    def from_boards(cls, boards: list[BoardManager]) -> 'BoardBatch':
+        """Packs the positions of a list of boards"""
+        pieces = np.zeros((len(boards), 2, 6), dtype=np.uint64)
+        white_to_move = np.zeros(len(boards), dtype=bool)
+        castling = np.zeros(len(boards), dtype=np.uint8)
+        en_passant = np.full(len(boards), -1, dtype=np.int8)
+        for i, game in enumerate(boards):
+            masks = [[0] * 6, [0] * 6]
+            for x in range(8):
+                for y in range(8):
+                    piece = game.board[x][y]
+                    if piece is not None:
+                        masks[color_index(piece.color)][piece_index(piece)] |= 1 << (x * 8 + y)
+
+            pieces[i] = masks
+            white_to_move[i] = game.to_move == Color.WHITE
+            rights = game.castling_rights()
+            castling[i] = sum(1 << bit for bit, letter in enumerate("KQkq") if letter in rights)
+            if game.en_passant:
+                en_passant[i] = game.en_passant_pos[0]
+
+        return cls(pieces, white_to_move, castling, en_passant)
+
+    @classmethod
+    def from_fens(cls, fens: list[str]) -> 'BoardBatch':
+        """Packs positions given as FEN strings"""
+        boards = []
+        for fen in fens:
+            game = BoardManager()
+            game.load_fen(fen)
+            boards.append(game)
+
+        return cls.from_boards(boards)
+
+    @classmethod
+    def from_records(cls, records: np.ndarray) -> 'BoardBatch':
+        """Unpacks the records of a dataset, as given by DatasetReader.to_numpy, without a loop per position
+
+        Castling rights are taken from the flags and the en passant file from the record.
+        """
+        packed = records["board"]
+        # Square 2i is the low half of byte i and square 2i + 1 the high half
+        codes = np.empty((len(records), 64), dtype=np.uint8)
+        codes[:, 0::2] = packed & 0x0F
+        codes[:, 1::2] = packed >> 4
+        bits = np.uint64(1) << np.arange(64, dtype=np.uint64)
+        pieces = np.zeros((len(records), 2, 6), dtype=np.uint64)
+        for color in range(2):
+            for kind in range(6):
+                present = codes == color * 8 + kind + 1
+                pieces[:, color, kind] = np.bitwise_or.reduce(np.where(present, bits, np.uint64(0)), axis=1)
+
+        flags = records["flags"]
+        en_passant = records["en_passant"].astype(np.int16)
+        en_passant[en_passant == 0xFF] = -1
+        return cls(pieces, (flags & 1) == 0, ((flags >> 1) & 0x0F).astype(np.uint8), en_passant.astype(np.int8))
+
+    def occupancy(self, color: int | None = None) -> np.ndarray:
+        """Masks of the squares held by one color, 0 for white and 1 for black, or by either"""
+        if color is None:
+            return np.bitwise_or.reduce(self.pieces, axis=(1, 2))
+
+        return np.bitwise_or.reduce(self.pieces[:, color], axis=1)
+
+    def attacks(self, color: int) -> np.ndarray:
+        """Masks of the squares one color attacks in every position, defended squares of its own included
+
+        Args:
+            color (int): 0 for white and 1 for black
+        """
+        own = self.pieces[:, color]
+        empty = ~self.occupancy()
+        forward = 1 if color == 0 else -1
+        attacked = step(own[:, PAWN], 1, forward) | step(own[:, PAWN], -1, forward)
+        for files, ranks in KNIGHT_STEPS:
+            attacked |= step(own[:, KNIGHT], files, ranks)
+
+        for files, ranks in KING_STEPS:
+            attacked |= step(own[:, KING], files, ranks)
+
+        for directions, kind in ((ROOK_DIRECTIONS, ROOK), (BISHOP_DIRECTIONS, BISHOP)):
+            sliders = own[:, kind] | own[:, QUEEN]
+            for files, ranks in directions:
+                attacked |= slide(sliders, empty, files, ranks)
+
+        return attacked
+
+    def in_check(self) -> np.ndarray:
+        """Bool array telling if the side to move is in check in each position"""
+        white = (self.pieces[:, 0, KING] & self.attacks(1)) != 0
+        black = (self.pieces[:, 1, KING] & self.attacks(0)) != 0
+        return np.where(self.white_to_move, white, black)
+
+    def pseudo_legal_counts(self) -> np.ndarray:
+        """Counts the pseudo legal moves of the side to move in each position
+
+        The moves are the ones BoardManager works out before checking that the king is left safe: every
+        piece move, promotions once for each piece, en passant, and castling when the king is not in check,
+        the path is empty and the king does not cross an attacked square.
+        """
+        white = self._counts(0)
+        black = self._counts(1)
+        return np.where(self.white_to_move, white, black)
+
+    def _counts(self, color: int) -> np.ndarray:
+        """Counts the pseudo legal moves of one color as if it were to move in every position"""
+        own_pieces = self.pieces[:, color]
+        own = self.occupancy(color)
+        enemy = self.occupancy(1 - color)
+        empty = ~(own | enemy)
+        counts = np.zeros(len(self), dtype=np.int64)
+
+        # Every step or direction moves each piece to a different square, so the counts add up
+        for kind, steps in ((KNIGHT, KNIGHT_STEPS), (KING, KING_STEPS)):
+            for files, ranks in steps:
+                counts += popcount(step(own_pieces[:, kind], files, ranks) & ~own)
+
+        for directions, kind in ((ROOK_DIRECTIONS, ROOK), (BISHOP_DIRECTIONS, BISHOP)):
+            sliders = own_pieces[:, kind] | own_pieces[:, QUEEN]
+            for files, ranks in directions:
+                counts += popcount(slide(sliders, empty, files, ranks) & ~own)
+
+        pawns = own_pieces[:, PAWN]
+        forward = 1 if color == 0 else -1
+        pushes = step(pawns, 0, forward) & empty
+        doubles = step(pushes & (RANK_3 if color == 0 else RANK_6), 0, forward) & empty
+        captures = [step(pawns, files, forward) & enemy for files in (-1, 1)]
+        for targets in [pushes] + captures:
+            # A move to the last rank is listed once for each promotion piece
+            counts += popcount(targets & ~BACK_RANKS) + 4 * popcount(targets & BACK_RANKS)
+
+        counts += popcount(doubles)
+
+        # The pawn that can be taken en passant stands on the fifth rank seen from the side taking it
+        rank = 4 if color == 0 else 3
+        files = self.en_passant.astype(np.int64)
+        victims = np.where(files >= 0, np.uint64(1) << (np.maximum(files, 0) * 8 + rank).astype(np.uint64),
+                           np.uint64(0))
+        counts += popcount((step(victims, 1, 0) | step(victims, -1, 0)) & pawns)
+
+        counts += self._castling_counts(color, own | enemy)
+        return counts
+
+    def _castling_counts(self, color: int, occupied: np.ndarray) -> np.ndarray:
+        """Counts the castling moves of one color, 0 to 2 in every position"""
+        attacked = self.attacks(1 - color)
+        y = 0 if color == 0 else 7
+        king = np.uint64(1 << (4 * 8 + y))
+        safe = (attacked & king) == 0
+        counts = np.zeros(len(self), dtype=np.int64)
+        for right, _, path, crossed in _CASTLING[color]:
+            path_mask = np.uint64(sum(1 << (x * 8 + y) for x in path))
+            crossed_mask = np.uint64(1 << (crossed * 8 + y))
+            allowed = (((self.castling & right) != 0) & safe & ((occupied & path_mask) == 0)
+                       & ((attacked & crossed_mask) == 0))
+            counts += allowed
+
+        return counts
+
+
+def board_results(game: BoardManager) -> tuple[int, int, bool, int]:
+    """Works out what BoardBatch gives for one board with the board's own methods, to check the batch against
+
+    Return:
+        (squares white attacks, squares black attacks, side to move in check, pseudo legal move count)
+    """
+    attacked = [0, 0]
+    count = 0
+    for x in range(8):
+        for y in range(8):
+            piece = game.board[x][y]
+            if piece is None:
+                continue
+
+            for square in attacked_squares(game.board, (x, y)):
+                attacked[color_index(piece.color)] |= 1 << square
+
+            if piece.color == game.to_move:
+                ends = piece.generate_valid_moves((x, y), game, True)
+                if piece.symbol == "K":
+                    ends = ends + piece.castling(game)
+
+                count += sum(4 if piece.symbol == "p" and end[1] in (0, 7) else 1 for end in ends)
+
+    king = game.white_king_pos if game.to_move == Color.WHITE else game.black_king_pos
+    enemy = Color.BLACK if game.to_move == Color.WHITE else Color.WHITE
+    in_check = king is not None and game.is_square_attacked(king, enemy)
+    return attacked[0], attacked[1], in_check, count
+
+
+def verify(boards: list[BoardManager]) -> list[int]:
+    """Compares the batch results of some boards with the results of their own methods
+
+    Return:
+        Indexes of the boards that disagree, empty when all agree
+    """
+    batch = BoardBatch.from_boards(boards)
+    white = batch.attacks(0)
+    black = batch.attacks(1)
+    in_check = batch.in_check()
+    counts = batch.pseudo_legal_counts()
+    wrong = []
+    for i, game in enumerate(boards):
+        if board_results(game) != (int(white[i]), int(black[i]), bool(in_check[i]), int(counts[i])):
+            wrong.append(i)
+
+    return wrong
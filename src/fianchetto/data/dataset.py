@@ -0,0 +1,444 @@
+import bisect
+import mmap
+import os
+import struct
+from typing import NamedTuple
+
+from fianchetto.core.board_manager import BoardManager
+from fianchetto.core.pieces import Color
+from fianchetto.core.notation import coord_to_square
+from fianchetto.core.pgn import read_games
+from fianchetto.core.zobrist import color_index, piece_index
+
+MAGIC = b"FPDS"
+VERSION = 1
+
+# Header: magic, version, record size, 8 reserved bytes
+HEADER = struct.Struct("<4sHH8x")
+
+# Record: key, packed board, eval, move, flags, en passant file, halfmove clock, result
+RECORD = struct.Struct("<Q32shHBBBb")
+
+# Index entry: key, record number
+INDEX_ENTRY = struct.Struct("<QQ")
+
+NO_EVAL = -32768
+NO_RESULT = -128
+NO_EN_PASSANT = 0xFF
+
+_PROMOTION_CODES = {None : 0, "Q" : 1, "R" : 2, "B" : 3, "N" : 4}
+_CODE_TO_PROMOTION = {code : symbol for symbol, code in _PROMOTION_CODES.items()}
+_RESULT_CODES = {"1-0" : 1, "0-1" : -1, "1/2-1/2" : 0}
+_FEN_LETTERS = "PNBRQK"
+
+
+def numpy_dtype():
+    """Returns the NumPy structured dtype that matches the record layout
+
+    Raises ImportError if NumPy is not installed.
+    """
+    import numpy as np
+
+    return np.dtype([("key", "<u8"),
+                     ("board", "u1", (32,)),
+                     ("eval", "<i2"),
+                     ("move", "<u2"),
+                     ("flags", "u1"),
+                     ("en_passant", "u1"),
+                     ("halfmove", "u1"),
+                     ("result", "i1")])
+
+
+class PositionRecord(NamedTuple):
+    """One packed position of a dataset
+
+    The full move number is not stored, fen gives 1 for it.
+
+    Attributes:
+        key (int): Zobrist key of the position
+        board (bytes): 64 squares packed two per byte, indexed by file * 8 + rank. 0 is an empty square,
+            1 - 6 are white pieces and 9 - 14 black pieces in zobrist.PIECE_ORDER
+        eval (int): Evaluation in centipawns from white's point of view or NO_EVAL
+        move (int): Move played from the position, see encode_move, or 0 if unknown
+        flags (int): Bit 0 is set when black is to move, bits 1 - 4 are the KQkq castling rights
+        en_passant (int): File of the pawn capturable en passant or NO_EN_PASSANT
+        halfmove (int): Half move clock, capped at 255
+        result (int): 1, 0 or -1 for a white win, draw or black win, or NO_RESULT
+    """
+    key: int
+    board: bytes
+    eval: int
+    move: int
+    flags: int
+    en_passant: int
+    halfmove: int
+    result: int
+
+    def fen(self) -> str:
+        """Returns the position as a FEN string, with the full move number lost and written as 1"""
+        rows = []
+        for y in range(7, -1, -1):
+            row = ""
+            empty = 0
+            for x in range(8):
+                code = _square_code(self.board, x * 8 + y)
+                if code == 0:
+                    empty += 1
+                    continue
+
+                if empty:
+                    row += str(empty)
+                    empty = 0
+
+                letter = _FEN_LETTERS[(code & 7) - 1]
+                row += letter if code < 8 else letter.lower()
+
+            if empty:
+                row += str(empty)
+
+            rows.append(row)
+
+        black = self.flags & 1
+        rights = "".join(letter for bit, letter in enumerate("KQkq") if self.flags & (2 << bit)) or "-"
+        target = "-"
+        if self.en_passant != NO_EN_PASSANT:
+            target = coord_to_square((self.en_passant, 2 if black else 5))
+
+        return f"{'/'.join(rows)} {'b' if black else 'w'} {rights} {target} {self.halfmove} 1"
+
+    def board_manager(self) -> BoardManager:
+        """Returns a board set up with the position"""
+        game = BoardManager()
+        game.load_fen(self.fen())
+        return game
+
+    def decoded_move(self) -> tuple[tuple[int, int], tuple[int, int], str | None] | None:
+        """Returns the move played as (start, end, promotion) or None if it is unknown"""
+        return decode_move(self.move)
+
+
+def _square_code(board: bytes, square: int) -> int:
+    """Reads the 4 bit code of a square out of a packed board"""
+    byte = board[square >> 1]
+    return byte >> 4 if square & 1 else byte & 0x0F
+
+
+def encode_move(start: tuple[int, int], end: tuple[int, int], promotion: str | None = None) -> int:
+    """Packs a move into 16 bits: 6 bits start square, 6 bits end square and 3 bits promotion piece"""
+    return (start[0] * 8 + start[1]) | ((end[0] * 8 + end[1]) << 6) | (_PROMOTION_CODES[promotion] << 12)
+
+
+def decode_move(code: int) -> tuple[tuple[int, int], tuple[int, int], str | None] | None:
+    """Unpacks a move made with encode_move, returning None for 0"""
+    if code == 0:
+        return None
+
+    start = code & 63
+    end = (code >> 6) & 63
+    return ((start >> 3, start & 7), (end >> 3, end & 7), _CODE_TO_PROMOTION[code >> 12])
+
+
+def pack_position(game: BoardManager, eval: int | None = None, result: int | None = None,
+                  move: tuple[tuple[int, int], tuple[int, int], str | None] | None = None) -> bytes:
+    """Packs a position and its metadata into a fixed size record
+
+    Args:
+        game (BoardManager): Position to pack
+        eval (int | None): Evaluation in centipawns from white's point of view
+        result (int | None): 1, 0 or -1 for a white win, draw or black win
+        move (tuple | None): The (start, end, promotion) move played from the position
+
+    Return:
+        RECORD.size bytes
+    """
+    board = bytearray(32)
+    for x in range(8):
+        for y in range(8):
+            piece = game.board[x][y]
+            if piece is not None:
+                square = x * 8 + y
+                code = piece_index(piece) + 1 + 8 * color_index(piece.color)
+                board[square >> 1] |= code << 4 if square & 1 else code
+
+    flags = 1 if game.to_move == Color.BLACK else 0
+    rights = game.castling_rights()
+    for bit, letter in enumerate("KQkq"):
+        if letter in rights:
+            flags |= 2 << bit
+
+    return RECORD.pack(game.zobrist_key(),
+                       bytes(board),
+                       NO_EVAL if eval is None else max(-32767, min(32767, eval)),
+                       0 if move is None else encode_move(*move),
+                       flags,
+                       game.en_passant_pos[0] if game.en_passant else NO_EN_PASSANT,
+                       min(game.halfmove_clock, 255),
+                       NO_RESULT if result is None else result)
+
+
+class DatasetWriter():
+    """Appends packed positions to a dataset file
+
+    Attributes:
+        path (str): Location of the dataset file
+        count (int): Number of records in the file, including ones written before it was opened
+    """
+    def __init__(self, path: str):
+        """Opens a dataset for appending, creating it if it does not exist
+
+        A record left half written by a run that was killed is cut off, so the new records line up.
+
+        Args:
+            path (str): Location of the dataset file
+        """
+        self.path = path
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            _check_header(path)
+            self.count = (os.path.getsize(path) - HEADER.size) // RECORD.size
+            os.truncate(path, HEADER.size + self.count * RECORD.size)
+
+        self._file = open(path, "ab")
+        if not exists:
+            self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+            self.count = 0
+
+    def append(self, game: BoardManager, eval: int | None = None, result: int | None = None,
+               move: tuple[tuple[int, int], tuple[int, int], str | None] | None = None) -> int:
+        """Appends one position, see pack_position for the arguments
+
+        Return:
+            The record number of the new position
+        """
+        self._file.write(pack_position(game, eval, result, move))
+        self.count += 1
+        return self.count - 1
+
+    def add_fen_file(self, path: str) -> int:
+        """Appends every position of a file holding one FEN per line
+
+        Blank lines and lines starting with "#" are skipped. Every position is validated, and
+        InvalidPositionError is raised for one that could not come up in a game.
+
+        Args:
+            path (str): Location of the FEN file
+
+        Return:
+            Number of positions added
+        """
+        added = 0
+        game = BoardManager()
+        with open(path) as stream:
+            for line in stream:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+
+                game.load_fen(line, validate=True)
+                self.append(game)
+                added += 1
+
+        return added
+
+    def add_pgn_file(self, path: str) -> int:
+        """Replays every game of a PGN file and appends each position with the move played and the result
+
+        Args:
+            path (str): Location of the PGN file
+
+        Return:
+            Number of positions added
+        """
+        added = 0
+        for pgn_game in read_games(path):
+            result = _RESULT_CODES.get(pgn_game.result)
+            for game, move in pgn_game.replay():
+                self.append(game, result=result, move=move)
+                added += 1
+
+        return added
+
+    def close(self) -> None:
+        """Flushes and closes the file"""
+        self._file.close()
+
+    def __enter__(self) -> 'DatasetWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _check_header(path: str) -> None:
+    """Raises ValueError if the file does not start with a dataset header of this version"""
+    with open(path, "rb") as stream:
+        header = stream.read(HEADER.size)
+
+    if len(header) < HEADER.size:
+        raise ValueError(f"{path} is not a version {VERSION} position dataset")
+
+    magic, version, record_size = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"{path} is not a version {VERSION} position dataset")
+
+
+def index_path(path: str) -> str:
+    """Returns the location of the key index belonging to a dataset"""
+    return path + ".idx"
+
+
+def build_index(path: str) -> int:
+    """Writes the sorted key index of a dataset next to it
+
+    The index is a flat file of (key, record number) pairs sorted by key. It is rebuilt from scratch, so
+    call this again after appending to keep lookups fast.
+
+    Args:
+        path (str): Location of the dataset file
+
+    Return:
+        Number of indexed records
+    """
+    with DatasetReader(path, use_index=False) as reader:
+        try:
+            import numpy as np
+
+        except ImportError:
+            entries = sorted((reader.key(i), i) for i in range(len(reader)))
+            with open(index_path(path), "wb") as stream:
+                for key, number in entries:
+                    stream.write(INDEX_ENTRY.pack(key, number))
+
+            return len(entries)
+
+        keys = reader.to_numpy()["key"]
+        order = np.argsort(keys, kind="stable")
+        entries = np.empty(len(keys), dtype=[("key", "<u8"), ("record", "<u8")])
+        entries["key"] = keys[order]
+        entries["record"] = order
+
+        # The view has to be released before the reader can unmap the file
+        del keys
+
+    entries.tofile(index_path(path))
+    return len(entries)
+
+
+class DatasetReader():
+    """Memory mapped random access to a dataset file
+
+    The reader sees the records that were in the file when it was opened.
+
+    Attributes:
+        path (str): Location of the dataset file
+    """
+    def __init__(self, path: str, use_index: bool = True):
+        """Maps a dataset and its index, if there is one
+
+        Args:
+            path (str): Location of the dataset file
+            use_index (bool): Set to False to ignore the key index
+        """
+        _check_header(path)
+        self.path = path
+        self._file = open(path, "rb")
+        self._length = (os.path.getsize(path) - HEADER.size) // RECORD.size
+        self._map = None
+        if self._length:
+            self._map = mmap.mmap(self._file.fileno(), HEADER.size + self._length * RECORD.size,
+                                  access=mmap.ACCESS_READ)
+
+        self._index_file = None
+        self._index = None
+        self._indexed = 0
+        if use_index and os.path.exists(index_path(path)) and os.path.getsize(index_path(path)) > 0:
+            self._index_file = open(index_path(path), "rb")
+            self._index = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._indexed = min(len(self._index) // INDEX_ENTRY.size, self._length)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, item: int | slice) -> PositionRecord | list[PositionRecord]:
+        if isinstance(item, slice):
+            return [self[i] for i in range(*item.indices(self._length))]
+
+        if item < 0:
+            item += self._length
+
+        if item < 0 or item >= self._length:
+            raise IndexError("Record out of range")
+
+        return PositionRecord(*RECORD.unpack_from(self._map, HEADER.size + item * RECORD.size))
+
+    def key(self, item: int) -> int:
+        """Returns only the key of a record, without unpacking the rest"""
+        return struct.unpack_from("<Q", self._map, HEADER.size + item * RECORD.size)[0]
+
+    def lookup(self, key: int) -> list[int]:
+        """Finds every record of a position
+
+        Uses a binary search over the index, then scans records appended after the index was built.
+
+        Args:
+            key (int): Zobrist key of the position
+
+        Return:
+            Record numbers holding the position, in file order
+        """
+        matches = []
+        if self._indexed:
+            keys = _IndexKeys(self._index, self._indexed)
+            i = bisect.bisect_left(keys, key)
+            while i < self._indexed and keys[i] == key:
+                matches.append(INDEX_ENTRY.unpack_from(self._index, i * INDEX_ENTRY.size)[1])
+                i += 1
+
+        for i in range(self._indexed, self._length):
+            if self.key(i) == key:
+                matches.append(i)
+
+        return sorted(matches)
+
+    def lookup_fen(self, fen: str) -> list[int]:
+        """Finds every record of the position described by a FEN string"""
+        game = BoardManager()
+        game.load_fen(fen)
+        return self.lookup(game.zobrist_key())
+
+    def to_numpy(self):
+        """Returns the records as a NumPy structured array that shares memory with the file
+
+        The array has to be deleted before the reader is closed. Raises ImportError if NumPy is not installed.
+        """
+        import numpy as np
+
+        if self._map is None:
+            return np.empty(0, dtype=numpy_dtype())
+
+        return np.frombuffer(self._map, dtype=numpy_dtype(), count=self._length, offset=HEADER.size)
+
+    def close(self) -> None:
+        """Unmaps the files"""
+        for handle in (self._map, self._file, self._index, self._index_file):
+            if handle is not None:
+                handle.close()
+
+    def __enter__(self) -> 'DatasetReader':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class _IndexKeys():
+    """Sequence view over the keys of an index so bisect can search it in place"""
+    def __init__(self, index: mmap.mmap, length: int):
+        self._index = index
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, item: int) -> int:
+        return struct.unpack_from("<Q", self._index, item * INDEX_ENTRY.size)[0]
@@ -0,0 +1,212 @@
+import bisect
+import mmap
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+from fianchetto.core.board_manager import BoardManager, Move
+from fianchetto.core.notation import san_to_move
+from fianchetto.core.pgn import read_games_range, split_ranges
+from .dataset import decode_move, encode_move
+
+MAGIC = b"FPOE"
+VERSION = 1
+
+# Header: magic, version, entry size, number of games, 4 reserved bytes
+HEADER = struct.Struct("<4sHHQ4x")
+
+# Entry: key, move, white wins, draws, black wins. Entries are sorted by key and then move
+ENTRY = struct.Struct("<QHxxIII")
+
+_RESULT_SLOTS = {"1-0" : 0, "1/2-1/2" : 1, "0-1" : 2}
+
+
+class ExplorerMove(NamedTuple):
+    """How a move played from a position scored
+
+    Attributes:
+        move (tuple): (start, end, promotion) of the move
+        white (int): Games white won after it
+        draws (int): Games drawn after it
+        black (int): Games black won after it
+    """
+    move: tuple[tuple[int, int], tuple[int, int], str | None]
+    white: int
+    draws: int
+    black: int
+
+    @property
+    def games(self) -> int:
+        return self.white + self.draws + self.black
+
+    @property
+    def score(self) -> float:
+        """Share of the points white scored"""
+        return (self.white + self.draws / 2) / self.games if self.games else 0.0
+
+
+def _count_range(path: str, start: int, end: int, plies: int) -> tuple[dict, int]:
+    """Map step, run inside the worker processes: counts the moves of the games in one byte range
+
+    Return:
+        ({(key, move code) : [white, draws, black]}, number of games counted)
+    """
+    counts = {}
+    games = 0
+    for pgn_game in read_games_range(path, start, end):
+        slot = _RESULT_SLOTS.get(pgn_game.result)
+        if slot is None:
+            continue
+
+        try:
+            game = pgn_game.start_position()
+
+        except ValueError:
+            continue
+
+        games += 1
+        for san in pgn_game.moves[:plies]:
+            try:
+                move = san_to_move(san, game)
+
+            except ValueError:
+                # The rest of a game with a bad move can not be followed
+                break
+
+            entry = counts.setdefault((game.zobrist_key(), encode_move(*move)), [0, 0, 0])
+            entry[slot] += 1
+            game.make_move(Move(*move))
+
+    return counts, games
+
+
+def build_explorer(pgn_path: str, path: str, plies: int = 20, workers: int | None = None) -> int:
+    """Builds an opening explorer index from a PGN archive
+
+    The archive is cut into ranges that are counted in parallel and the counts are merged and written
+    sorted by key, so a lookup is a binary search over the mapped file.
+
+    Args:
+        pgn_path (str): Location of the PGN archive
+        path (str): Where the index is written
+        plies (int): How many moves of each game are counted
+        workers (int | None): Processes to use, None for one per CPU and 0 to count in this process
+
+    Return:
+        Number of games counted
+    """
+    parts = 1 if workers == 0 else (workers or os.cpu_count())
+    ranges = split_ranges(pgn_path, parts * 4)
+    if workers == 0:
+        results = [_count_range(pgn_path, start, end, plies) for start, end in ranges]
+
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            futures = [executor.submit(_count_range, pgn_path, start, end, plies) for start, end in ranges]
+            results = [future.result() for future in futures]
+
+    # Reduce step
+    merged = {}
+    games = 0
+    for counts, counted in results:
+        games += counted
+        for item, (white, draws, black) in counts.items():
+            entry = merged.get(item)
+            if entry is None:
+                merged[item] = [white, draws, black]
+
+            else:
+                entry[0] += white
+                entry[1] += draws
+                entry[2] += black
+
+    with open(path, "wb") as stream:
+        stream.write(HEADER.pack(MAGIC, VERSION, ENTRY.size, games))
+        for (key, code), (white, draws, black) in sorted(merged.items()):
+            stream.write(ENTRY.pack(key, code, white, draws, black))
+
+    return games
+
+
+class OpeningExplorer():
+    """Memory mapped read access to an opening explorer index
+
+    Attributes:
+        path (str): Location of the index
+        games (int): Number of games the index was built from
+    """
+    def __init__(self, path: str):
+        """Maps an index made by build_explorer
+
+        Args:
+            path (str): Location of the index
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        magic, version, entry_size, self.games = HEADER.unpack(self._file.read(HEADER.size))
+        if magic != MAGIC or version != VERSION or entry_size != ENTRY.size:
+            self._file.close()
+            raise ValueError(f"{path} is not a version {VERSION} opening explorer index")
+
+        self._length = (os.path.getsize(path) - HEADER.size) // ENTRY.size
+        self._map = None
+        if self._length:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        """Number of (position, move) entries"""
+        return self._length
+
+    def lookup(self, key: int) -> list[ExplorerMove]:
+        """Returns the moves played from a position, most played first
+
+        Args:
+            key (int): Zobrist key of the position
+        """
+        if self._map is None:
+            return []
+
+        i = bisect.bisect_left(_EntryKeys(self._map, self._length), key)
+        moves = []
+        while i < self._length:
+            entry_key, code, white, draws, black = ENTRY.unpack_from(self._map, HEADER.size + i * ENTRY.size)
+            if entry_key != key:
+                break
+
+            moves.append(ExplorerMove(decode_move(code), white, draws, black))
+            i += 1
+
+        return sorted(moves, key=lambda move: move.games, reverse=True)
+
+    def lookup_fen(self, fen: str) -> list[ExplorerMove]:
+        """Returns the moves played from the position described by a FEN string"""
+        game = BoardManager()
+        game.load_fen(fen)
+        return self.lookup(game.zobrist_key())
+
+    def close(self) -> None:
+        """Unmaps the file"""
+        if self._map is not None:
+            self._map.close()
+
+        self._file.close()
+
+    def __enter__(self) -> 'OpeningExplorer':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class _EntryKeys():
+    """Sequence view over the keys of the entries so bisect can search the mapped file in place"""
+    def __init__(self, data: mmap.mmap, length: int):
+        self._data = data
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, item: int) -> int:
+        return struct.unpack_from("<Q", self._data, HEADER.size + item * ENTRY.size)[0]
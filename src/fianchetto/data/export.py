@@ -0,0 +1,239 @@
+"""Training data from PGN games, written as NumPy shards
+
+This module needs NumPy (pip install fianchetto[numpy]). Games are replayed through BoardManager and the
+sampled positions are packed as dataset records, see pack_position, until a shard is full. The shard is
+then unpacked into bitboards or planes with BoardBatch and saved as one .npz file, so memory never holds
+more than one shard per process.
+
+Every shard holds these arrays, one row per position:
+
+    pieces      uint64 (N, 12) piece masks, white then black in zobrist.PIECE_ORDER, bit file * 8 + rank,
+                or planes: uint8 (N, 12, 8, 8) indexed by piece, file and rank
+    white_to_move, castling, en_passant   as in BoardBatch
+    move        uint16, the move played, see dataset.encode_move
+    result      int8, 1, 0 or -1 for a white win, draw or black win, dataset.NO_RESULT if unknown
+    eval        int16, engine score in centipawns from white's point of view, dataset.NO_EVAL if not searched
+"""
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from fianchetto.core.pgn import iter_games
+from fianchetto.engine.annotate import evaluate_position
+from .batch import BoardBatch
+from .dataset import _RESULT_CODES, RECORD, numpy_dtype, pack_position
+
+ENCODINGS = ("bitboards", "planes")
+
+
+def encode_shard(records: bytes, encoding: str = "bitboards") -> dict[str, np.ndarray]:
+    """Turns packed dataset records into the arrays of a shard
+
+    Args:
+        records (bytes): Records made by pack_position, one after the other
+        encoding (str): "bitboards" for uint64 masks or "planes" for 8 x 8 uint8 planes
+
+    Return:
+        Array name to array
+    """
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown encoding {encoding!r}, expected one of {', '.join(ENCODINGS)}")
+
+    array = np.frombuffer(records, dtype=numpy_dtype())
+    batch = BoardBatch.from_records(array)
+    pieces = batch.pieces.reshape(len(array), 12)
+    if encoding == "planes":
+        # Little endian bytes of a mask unpacked low bit first give the squares in bit order
+        bits = np.unpackbits(pieces.astype("<u8").view(np.uint8), axis=1, bitorder="little")
+        pieces = bits.reshape(len(array), 12, 8, 8)
+
+    return {"pieces" : pieces,
+            "white_to_move" : batch.white_to_move,
+            "castling" : batch.castling,
+            "en_passant" : batch.en_passant,
+            "move" : array["move"].copy(),
+            "result" : array["result"].copy(),
+            "eval" : array["eval"].copy()}
+
+
+def shard_path(output_dir: str, name: str, number: int) -> str:
+    """Returns where a shard of an input file is written"""
+    return os.path.join(output_dir, f"{name}-{number:05d}.npz")
+
+
+def checkpoint_path(output_dir: str, name: str) -> str:
+    """Returns where the progress through an input file is saved"""
+    return os.path.join(output_dir, f"{name}.checkpoint")
+
+
+def _input_name(path: str) -> str:
+    """Names the shards of an input file after the file without its extension"""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _write_json(path: str, content: dict) -> None:
+    """Replaces a file in one step, so a run killed while writing it leaves the old one"""
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as stream:
+        json.dump(content, stream)
+
+    os.replace(temporary, path)
+
+
+def _write_shard(path: str, arrays: dict[str, np.ndarray], compress: bool) -> None:
+    """Writes a shard to a temporary file first, so a shard that exists is always complete"""
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as stream:
+        (np.savez_compressed if compress else np.savez)(stream, **arrays)
+
+    os.replace(temporary, path)
+
+
+def export_pgn_file(path: str, output_dir: str, shard_size: int = 65536, sample_rate: float = 1.0,
+                    skip_plies: int = 0, encoding: str = "bitboards", seed: int = 0, compress: bool = False,
+                    nodes: int | None = None, movetime: float | None = None, depth: int | None = None,
+                    options: dict | None = None) -> int:
+    """Streams the positions of one PGN file into shards
+
+    Shards are named after the file, games-00000.npz, games-00001.npz and so on, and all but the last
+    hold exactly shard_size positions. After each shard the checkpoint records the game the next shard
+    starts in and how many of its positions went into earlier shards, along with the settings that decide
+    what goes into a shard. Sampling is seeded by the game's offset in the file, so a run with the same
+    settings that finds the checkpoint picks the same positions and goes on where the killed one stopped.
+    A run with other settings raises ValueError rather than mix shards that do not fit together. A file
+    that was finished is skipped.
+
+    Games are replayed up to their first illegal move.
+
+    Args:
+        path (str): Location of the PGN file
+        output_dir (str): Directory the shards are written to
+        shard_size (int): Positions per shard
+        sample_rate (float): Chance of keeping each position
+        skip_plies (int): Opening plies of every game that are never kept
+        encoding (str): "bitboards" or "planes", see encode_shard
+        seed (int): Seed of the sampling
+        compress (bool): Compress the shards
+        nodes (int | None): Nodes to search each kept position for its eval, no search without a limit
+        movetime (float | None): Seconds to search each kept position
+        depth (int | None): Deepest iteration to search each kept position
+        options (dict | None): Keyword arguments for the searcher, see evaluate_position
+
+    Return:
+        Number of positions in the shards of the file, including ones written by an earlier run
+    """
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown encoding {encoding!r}, expected one of {', '.join(ENCODINGS)}")
+
+    name = _input_name(path)
+    source = os.path.abspath(path)
+    progress_path = checkpoint_path(output_dir, name)
+    settings = {"shard_size" : shard_size, "sample_rate" : sample_rate, "skip_plies" : skip_plies,
+                "encoding" : encoding, "seed" : seed, "nodes" : nodes, "movetime" : movetime, "depth" : depth,
+                "options" : options}
+    # Written and read back through JSON, so it compares equal to the settings of a checkpoint
+    settings = json.loads(json.dumps(settings))
+    progress = {"input" : source, "settings" : settings, "shards" : 0, "positions" : 0, "offset" : 0, "skip" : 0,
+                "done" : False}
+    if os.path.exists(progress_path):
+        with open(progress_path) as stream:
+            progress = json.load(stream)
+
+        if progress["input"] != source:
+            raise ValueError(f"{progress_path} belongs to a run over {progress['input']}")
+
+        changed = sorted(key for key in settings if progress["settings"].get(key) != settings[key])
+        if changed:
+            raise ValueError(f"{progress_path} belongs to a run with other settings: {', '.join(changed)}")
+
+        if progress["done"]:
+            return progress["positions"]
+
+    search = nodes is not None or movetime is not None or depth is not None
+    records = bytearray()
+
+    def flush(offset: int, skip: int) -> None:
+        # offset and skip are the game the next shard starts in and how many of its positions are written
+        nonlocal records
+        count = len(records) // RECORD.size
+        _write_shard(shard_path(output_dir, name, progress["shards"]), encode_shard(bytes(records), encoding),
+                     compress)
+        records = bytearray()
+        progress.update(shards=progress["shards"] + 1, positions=progress["positions"] + count,
+                        offset=offset, skip=skip)
+        _write_json(progress_path, progress)
+
+    with open(path, "rb") as stream:
+        stream.seek(progress["offset"])
+        skip = progress["skip"]
+        for pgn_game in iter_games(stream):
+            rng = random.Random(f"{seed}:{pgn_game.offset}")
+            result = _RESULT_CODES.get(pgn_game.result)
+            kept = 0
+            try:
+                for ply, (game, move) in enumerate(pgn_game.replay()):
+                    if rng.random() >= sample_rate or ply < skip_plies:
+                        continue
+
+                    kept += 1
+                    if kept <= skip:
+                        continue
+
+                    evaluation = None
+                    if search:
+                        evaluation = evaluate_position(game.to_fen(), nodes, movetime, depth, options).score
+
+                    records += pack_position(game, evaluation, result, move)
+                    if len(records) == shard_size * RECORD.size:
+                        flush(pgn_game.offset, kept)
+
+            except ValueError:
+                pass
+
+            skip = 0
+
+    if records:
+        flush(progress["offset"], progress["skip"])
+
+    progress["done"] = True
+    _write_json(progress_path, progress)
+    return progress["positions"]
+
+
+def export_training_data(paths: list[str], output_dir: str, workers: int | None = None, **settings) -> int:
+    """Exports several PGN files into shards, one file per process at a time
+
+    Args:
+        paths (list[str]): Locations of the PGN files, the names without extension must differ
+        output_dir (str): Directory the shards are written to, created if needed
+        workers (int | None): Processes to use, None for one per CPU and 0 to export in this process
+        settings: Keyword arguments for export_pgn_file
+
+    Return:
+        Number of positions written
+    """
+    names = [_input_name(path) for path in paths]
+    if len(set(names)) != len(names):
+        raise ValueError("Input files must have different names, their shards are named after them")
+
+    os.makedirs(output_dir, exist_ok=True)
+    if workers == 0:
+        return sum(export_pgn_file(path, output_dir, **settings) for path in paths)
+
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(export_pgn_file, path, output_dir, **settings) for path in paths]
+        return sum(future.result() for future in futures)
+
+
+def load_shards(paths: list[str]) -> dict[str, np.ndarray]:
+    """Loads shards and joins their arrays, for data small enough to hold at once"""
+    arrays = {}
+    for path in paths:
+        with np.load(path) as shard:
+            for key in shard.files:
+                arrays.setdefault(key, []).append(shard[key])
+
+    return {key : np.concatenate(parts) for key, parts in arrays.items()}
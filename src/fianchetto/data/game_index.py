@@ -0,0 +1,246 @@
+import bisect
+import mmap
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator
+
+from fianchetto.core.board_manager import BoardManager, Move
+from fianchetto.core.notation import san_to_move
+from fianchetto.core.pgn import PgnGame, iter_games, read_games_range, split_ranges
+from fianchetto.core.pieces import Color
+
+MAGIC = b"FPGI"
+VERSION = 1
+
+# Header: magic, version, entry size, games, position entries, material entries
+HEADER = struct.Struct("<4sHHQQQ")
+
+# Entry: key, byte offset of the game in the PGN file. The position entries come first, then the
+# material entries, each sorted by key and then offset
+ENTRY = struct.Struct("<QQ")
+
+# Letters of a material signature, strongest first, with the symbol stored on the piece
+_SIGNATURE_LETTERS = (("K", "K"), ("Q", "Q"), ("R", "R"), ("B", "B"), ("N", "N"), ("P", "p"))
+_COUNTED = ("Q", "R", "B", "N", "p")
+
+
+def _pack_counts(white: dict[str, int], black: dict[str, int]) -> int:
+    """Packs piece counts into a material key, 4 bits for each kind of piece of each side"""
+    key = 0
+    for counts in (white, black):
+        for symbol in _COUNTED:
+            key = (key << 4) | min(counts.get(symbol, 0), 15)
+
+    return key
+
+
+def material_key(game: BoardManager) -> int:
+    """Returns a key for the pieces on the board, ignoring where they stand"""
+    counts = ({}, {})
+    for column in game.board:
+        for piece in column:
+            if piece is not None:
+                side = counts[0 if piece.color == Color.WHITE else 1]
+                side[piece.symbol] = side.get(piece.symbol, 0) + 1
+
+    return _pack_counts(*counts)
+
+
+def parse_material(signature: str) -> int:
+    """Turns a material signature such as "KRPvKR" into the key material_key gives such positions
+
+    Args:
+        signature (str): White's pieces, a "v", then black's pieces
+
+    Return:
+        The material key
+    """
+    letters = dict(_SIGNATURE_LETTERS)
+    sides = signature.upper().split("V")
+    if len(sides) != 2:
+        raise ValueError(f"Not a valid material signature: {signature}")
+
+    counts = ({}, {})
+    for side, text in zip(counts, sides):
+        for letter in text:
+            if letter not in letters:
+                raise ValueError(f"Not a valid material signature: {signature}")
+
+            side[letters[letter]] = side.get(letters[letter], 0) + 1
+
+    return _pack_counts(*counts)
+
+
+def _index_range(path: str, start: int, end: int) -> tuple[list, list, int]:
+    """Map step, run inside the worker processes: lists the positions and material of the games in a range
+
+    Return:
+        ([(position key, offset)], [(material key, offset)], number of games)
+    """
+    positions = []
+    materials = []
+    games = 0
+    for pgn_game in read_games_range(path, start, end):
+        try:
+            game = pgn_game.start_position()
+
+        except ValueError:
+            continue
+
+        games += 1
+        keys = {game.zobrist_key()}
+        material = {material_key(game)}
+        for san in pgn_game.moves:
+            try:
+                move = san_to_move(san, game)
+
+            except ValueError:
+                break
+
+            move = Move(*move)
+            piece = game.board[move.start[0]][move.start[1]]
+            # Material only changes with captures and promotions
+            changes = game.is_capture(move) or (piece.symbol == "p" and move.end[1] in (0, 7))
+            game.make_move(move)
+            keys.add(game.zobrist_key())
+            if changes:
+                material.add(material_key(game))
+
+        positions.extend((key, pgn_game.offset) for key in keys)
+        materials.extend((key, pgn_game.offset) for key in material)
+
+    return positions, materials, games
+
+
+def build_game_index(pgn_path: str, path: str, workers: int | None = None) -> int:
+    """Builds an inverted index from positions and material signatures to the games that reached them
+
+    Args:
+        pgn_path (str): Location of the PGN archive
+        path (str): Where the index is written
+        workers (int | None): Processes to use, None for one per CPU and 0 to index in this process
+
+    Return:
+        Number of games indexed
+    """
+    parts = 1 if workers == 0 else (workers or os.cpu_count())
+    ranges = split_ranges(pgn_path, parts * 4)
+    if workers == 0:
+        results = [_index_range(pgn_path, start, end) for start, end in ranges]
+
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            futures = [executor.submit(_index_range, pgn_path, start, end) for start, end in ranges]
+            results = [future.result() for future in futures]
+
+    positions = sorted(entry for result in results for entry in result[0])
+    materials = sorted(entry for result in results for entry in result[1])
+    games = sum(result[2] for result in results)
+    with open(path, "wb") as stream:
+        stream.write(HEADER.pack(MAGIC, VERSION, ENTRY.size, games, len(positions), len(materials)))
+        for key, offset in positions + materials:
+            stream.write(ENTRY.pack(key, offset))
+
+    return games
+
+
+class GameIndex():
+    """Finds the games of a PGN archive that reached a position or a material signature
+
+    Only the index is mapped, games are read from the archive one at a time as they are asked for.
+
+    Attributes:
+        path (str): Location of the index
+        pgn_path (str): Location of the archive it was built from
+        games (int): Number of games indexed
+    """
+    def __init__(self, path: str, pgn_path: str):
+        """Maps an index made by build_game_index
+
+        Args:
+            path (str): Location of the index
+            pgn_path (str): Location of the archive it was built from
+        """
+        self.path = path
+        self.pgn_path = pgn_path
+        self._file = open(path, "rb")
+        magic, version, entry_size, self.games, self._positions, self._materials = \
+            HEADER.unpack(self._file.read(HEADER.size))
+        if magic != MAGIC or version != VERSION or entry_size != ENTRY.size:
+            self._file.close()
+            raise ValueError(f"{path} is not a version {VERSION} game index")
+
+        self._map = None
+        if self._positions or self._materials:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def position_offsets(self, key: int) -> list[int]:
+        """Returns the offsets of the games that reached the position with the given Zobrist key"""
+        return self._offsets(key, 0, self._positions)
+
+    def material_offsets(self, signature: str | int) -> list[int]:
+        """Returns the offsets of the games that reached a material signature such as "KRPvKR" or its key"""
+        key = parse_material(signature) if isinstance(signature, str) else signature
+        return self._offsets(key, self._positions, self._materials)
+
+    def find_position(self, key: int) -> Iterator[PgnGame]:
+        """Streams the games that reached the position with the given Zobrist key, in archive order"""
+        return self._read(self.position_offsets(key))
+
+    def find_fen(self, fen: str) -> Iterator[PgnGame]:
+        """Streams the games that reached the position described by a FEN string"""
+        game = BoardManager()
+        game.load_fen(fen)
+        return self.find_position(game.zobrist_key())
+
+    def find_material(self, signature: str | int) -> Iterator[PgnGame]:
+        """Streams the games that reached a material signature such as "KRPvKR", in archive order"""
+        return self._read(self.material_offsets(signature))
+
+    def _offsets(self, key: int, first: int, length: int) -> list[int]:
+        if self._map is None or length == 0:
+            return []
+
+        keys = _EntryKeys(self._map, first, length)
+        i = bisect.bisect_left(keys, key)
+        offsets = []
+        while i < length and keys[i] == key:
+            offsets.append(ENTRY.unpack_from(self._map, HEADER.size + (first + i) * ENTRY.size)[1])
+            i += 1
+
+        return offsets
+
+    def _read(self, offsets: list[int]) -> Iterator[PgnGame]:
+        """Reads the games starting at the given offsets, one at a time"""
+        with open(self.pgn_path, "rb") as stream:
+            for offset in offsets:
+                stream.seek(offset)
+                yield next(iter_games(stream))
+
+    def close(self) -> None:
+        """Unmaps the index"""
+        if self._map is not None:
+            self._map.close()
+
+        self._file.close()
+
+    def __enter__(self) -> 'GameIndex':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class _EntryKeys():
+    """Sequence view over the keys of one table of the index so bisect can search it in place"""
+    def __init__(self, data: mmap.mmap, first: int, length: int):
+        self._data = data
+        self._first = first
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, item: int) -> int:
+        return struct.unpack_from("<Q", self._data, HEADER.size + (self._first + item) * ENTRY.size)[0]
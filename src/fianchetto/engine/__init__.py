@@ -0,0 +1,2 @@
+from .mcts import MctsSearcher, create_searcher
+from .search import Searcher, SearchLimits, SearchResult
\ No newline at end of file
@@ -0,0 +1,318 @@
+import json
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Callable, NamedTuple
+
+from fianchetto.core.board_manager import BoardManager
+from fianchetto.core.notation import move_to_san
+from fianchetto.core.pgn import PgnGame, format_pgn, iter_games
+from .mcts import create_searcher
+from .search import SearchLimits, mate_in
+
+# Centipawns a move may lose against the engine's choice before it gets a glyph, worst first:
+# $4 is a blunder (??), $2 a mistake (?) and $6 a dubious move (?!)
+MARKERS = ((300, "$4"), (100, "$2"), (50, "$6"))
+
+# Scores are capped at this many centipawns when working out what a move lost, so that going from a
+# mate to a winning position, or from a lost position to a slightly more lost one, is not marked
+LOSS_CAP = 1000
+
+
+class PositionEval(NamedTuple):
+    """Engine verdict on one position of a game
+
+    Attributes:
+        score (int): Score in centipawns from white's point of view
+        mate (int | None): Moves until mate, negative when black mates, or None
+        best (str | None): The engine's move in SAN, None if the game is over in the position
+    """
+    score: int
+    mate: int | None
+    best: str | None
+
+
+def evaluate_position(fen: str, nodes: int | None = None, movetime: float | None = None,
+                      depth: int | None = None, options: dict | None = None) -> PositionEval:
+    """Searches one position, run inside the worker processes
+
+    Args:
+        fen (str): The position
+        nodes (int | None): Most nodes to search
+        movetime (float | None): Seconds to search
+        depth (int | None): Deepest iteration to search
+        options (dict | None): Keyword arguments for Searcher, or for MctsSearcher with algorithm=mcts
+
+    Return:
+        The score from white's point of view and the move the engine would play
+    """
+    game = BoardManager()
+    game.load_fen(fen)
+    with create_searcher(options) as searcher:
+        result = searcher.search(game, SearchLimits(depth, nodes, movetime))
+
+    sign = 1 if fen.split()[1] == "w" else -1
+    mate = mate_in(result.score)
+    best = None if result.best_move is None else move_to_san(result.best_move, game)
+    return PositionEval(sign * result.score, None if mate is None else sign * mate, best)
+
+
+def format_eval(evaluation: PositionEval) -> str:
+    """Writes a score the way the [%eval] comment command expects, "0.35" or "#-3" """
+    if evaluation.mate is not None:
+        return f"#{evaluation.mate}"
+
+    return f"{evaluation.score / 100:.2f}"
+
+
+def move_loss(before: PositionEval, after: PositionEval, white: bool) -> int:
+    """Works out how many centipawns a move gave away
+
+    Args:
+        before (PositionEval): Verdict on the position the move was played in
+        after (PositionEval): Verdict on the position the move led to
+        white (bool): True if white played the move
+
+    Return:
+        The drop in the score of the side that moved, 0 if it did not drop
+    """
+    sign = 1 if white else -1
+    start = max(-LOSS_CAP, min(LOSS_CAP, sign * before.score))
+    end = max(-LOSS_CAP, min(LOSS_CAP, sign * after.score))
+    return max(0, start - end)
+
+
+def move_annotation(san: str, before: PositionEval, after: PositionEval, white: bool) -> str:
+    """Writes the glyph and comment that follow a move
+
+    Every move gets the score of the position it led to. Moves that lose enough get a glyph and the
+    move the engine preferred.
+
+    Args:
+        san (str): The move that was played
+        before (PositionEval): Verdict on the position the move was played in
+        after (PositionEval): Verdict on the position the move led to
+        white (bool): True if white played the move
+
+    Return:
+        Annotation such as "$2 {[%eval -1.20] Best: Nf3}", or an empty string
+    """
+    loss = move_loss(before, after, white)
+    glyph = next((nag for threshold, nag in MARKERS if loss >= threshold), None)
+    comment = []
+    # No score once the game is over, the result already tells it
+    if after.best is not None:
+        comment.append(f"[%eval {format_eval(after)}]")
+
+    if glyph is not None and before.best is not None and before.best != san:
+        comment.append(f"Best: {before.best}")
+
+    tokens = [] if glyph is None else [glyph]
+    if comment:
+        tokens.append("{" + " ".join(comment) + "}")
+
+    return " ".join(tokens)
+
+
+def game_positions(pgn_game: PgnGame) -> list[str]:
+    """Lists the FEN of the position before every move of a game and of the one after the last
+
+    Return:
+        The positions, stopping after the last legal move, or empty if the game cannot be set up
+    """
+    fens = []
+    game = None
+    try:
+        for game, _ in pgn_game.replay():
+            fens.append(game.to_fen())
+
+        if game is None:
+            return []
+
+    except ValueError:
+        if game is None:
+            return []
+
+    fens.append(game.to_fen())
+    return fens
+
+
+def annotate_game(pgn_game: PgnGame, fens: list[str], evaluations: list[PositionEval]) -> str:
+    """Writes a game as PGN with the annotation of every move that could be searched
+
+    Args:
+        pgn_game (PgnGame): The game
+        fens (list[str]): Positions of the game, as given by game_positions
+        evaluations (list[PositionEval]): Verdict on each of the positions
+
+    Return:
+        The annotated game followed by a blank line
+    """
+    annotations = [move_annotation(san, evaluations[ply], evaluations[ply + 1], fens[ply].split()[1] == "w")
+                   for ply, san in enumerate(pgn_game.moves[:len(fens) - 1])]
+    fullmove_number = int(fens[0].split()[5]) if fens else 1
+    black_first = bool(fens) and fens[0].split()[1] == "b"
+    return format_pgn(pgn_game.headers, pgn_game.moves, pgn_game.result, fullmove_number, black_first, annotations)
+
+
+class _OpenGame():
+    """A game that has been read but not yet written, with the positions that came back so far"""
+    def __init__(self, pgn_game: PgnGame):
+        self.pgn_game = pgn_game
+        self.fens = game_positions(pgn_game) if pgn_game.moves else []
+        self.evaluations = [None] * len(self.fens)
+        self.submitted = 0
+        self.remaining = len(self.fens)
+
+
+def load_checkpoint(path: str) -> dict | None:
+    """Reads the progress saved by an earlier run, None if there is none"""
+    if not os.path.exists(path):
+        return None
+
+    with open(path) as stream:
+        return json.load(stream)
+
+
+def _save_checkpoint(path: str, checkpoint: dict) -> None:
+    """Replaces the checkpoint in one step, so a run killed while writing it leaves the old one"""
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as stream:
+        json.dump(checkpoint, stream)
+
+    os.replace(temporary, path)
+
+
+def annotate_pgn(input_path: str, output_path: str, checkpoint_path: str | None = None,
+                 workers: int | None = None, queue_size: int | None = None, nodes: int | None = None,
+                 movetime: float | None = None, depth: int | None = None, options: dict | None = None,
+                 on_game: Callable[[int, PgnGame], None] | None = None) -> int:
+    """Annotates every game of a PGN archive with engine scores and marks the moves that lose ground
+
+    Games are streamed from the archive and their positions are searched across a process pool. At most
+    queue_size positions are searched at once and at most queue_size games are held back waiting for an
+    earlier one, so reading never runs far ahead of writing however large the archive is. Games are
+    written in archive order as soon as they are complete, and after each one the checkpoint records
+    how far the run got and the search settings. A run that finds a checkpoint from the same archive and
+    settings picks up after the last game written, and the checkpoint is removed once the archive is done.
+    A run with other settings raises ValueError rather than mix scores of two searches in one output.
+
+    Args:
+        input_path (str): Location of the PGN archive
+        output_path (str): Where the annotated games are written
+        checkpoint_path (str | None): Where progress is saved, None to not save it
+        workers (int | None): Processes to use, None for one per CPU and 0 to search in this process
+        queue_size (int | None): Positions searched at once, None for four per process
+        nodes (int | None): Most nodes per position
+        movetime (float | None): Seconds per position
+        depth (int | None): Deepest iteration per position
+        options (dict | None): Keyword arguments for Searcher, or for MctsSearcher with algorithm=mcts
+        on_game (Callable | None): Called with the number of games written so far and the game after
+            each game is written
+
+    Return:
+        Number of games in the output
+    """
+    if nodes is None and movetime is None and depth is None:
+        raise ValueError("A node, time or depth limit per position is needed")
+
+    source = os.path.abspath(input_path)
+    checkpoint = None if checkpoint_path is None else load_checkpoint(checkpoint_path)
+    settings = {"nodes" : nodes, "movetime" : movetime, "depth" : depth, "options" : options}
+    # Written and read back through JSON, so it compares equal to the settings of a checkpoint
+    settings = json.loads(json.dumps(settings))
+    if checkpoint is not None:
+        if checkpoint["input"] != source:
+            raise ValueError(f"{checkpoint_path} belongs to a run over {checkpoint['input']}")
+
+        changed = sorted(key for key in settings if checkpoint.get("settings", {}).get(key) != settings[key])
+        if changed:
+            raise ValueError(f"{checkpoint_path} belongs to a run with other settings: {', '.join(changed)}")
+
+    if queue_size is None:
+        queue_size = 1 if workers == 0 else 4 * (workers or os.cpu_count())
+
+    queue_size = max(1, queue_size)
+    executor = None if workers == 0 else ProcessPoolExecutor(workers or os.cpu_count())
+
+    def submit(fen: str) -> Future:
+        if executor is not None:
+            return executor.submit(evaluate_position, fen, nodes, movetime, depth, options)
+
+        future = Future()
+        future.set_result(evaluate_position(fen, nodes, movetime, depth, options))
+        return future
+
+    written = 0
+    with open(input_path, "rb") as pgn, open(output_path, "r+b" if checkpoint else "wb") as output:
+        games = iter_games(pgn)
+        if checkpoint is not None:
+            # Start again at the last game written and skip it
+            written = checkpoint["games"]
+            pgn.seek(checkpoint["input_offset"])
+            output.truncate(checkpoint["output_offset"])
+            output.seek(checkpoint["output_offset"])
+            next(games, None)
+
+        open_games = deque()
+        in_flight = {}
+        feeding = None
+        exhausted = False
+        try:
+            while True:
+                # Read and submit positions while there is room, in archive order
+                while len(in_flight) < queue_size:
+                    if feeding is None or feeding.submitted == len(feeding.fens):
+                        if exhausted or len(open_games) >= queue_size:
+                            break
+
+                        pgn_game = next(games, None)
+                        if pgn_game is None:
+                            exhausted = True
+                            break
+
+                        feeding = _OpenGame(pgn_game)
+                        open_games.append(feeding)
+                        continue
+
+                    future = submit(feeding.fens[feeding.submitted])
+                    in_flight[future] = (feeding, feeding.submitted)
+                    feeding.submitted += 1
+
+                # Write every finished game that has no unfinished game before it
+                while open_games and open_games[0].remaining == 0:
+                    done = open_games.popleft()
+                    text = annotate_game(done.pgn_game, done.fens, done.evaluations)
+                    output.write(text.encode("utf-8"))
+                    output.flush()
+                    written += 1
+                    if checkpoint_path is not None:
+                        _save_checkpoint(checkpoint_path, {"input" : source,
+                                                           "settings" : settings,
+                                                           "games" : written,
+                                                           "input_offset" : done.pgn_game.offset,
+                                                           "output_offset" : output.tell()})
+
+                    if on_game is not None:
+                        on_game(written, done.pgn_game)
+
+                if not in_flight:
+                    if exhausted and not open_games:
+                        break
+
+                    continue
+
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    open_game, ply = in_flight.pop(future)
+                    open_game.evaluations[ply] = future.result()
+                    open_game.remaining -= 1
+
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+    if checkpoint_path is not None and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    return written
@@ -0,0 +1,234 @@
+import os
+import shlex
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, NamedTuple
+
+from fianchetto.core.board_manager import BoardManager, Move
+from fianchetto.core.notation import move_to_san, san_to_move
+from .mcts import create_searcher
+from .search import SearchInfo, SearchLimits
+
+
+class EpdRecord(NamedTuple):
+    """One test position of an EPD suite
+
+    Attributes:
+        fen (str): The position, with move counters taken from the hmvc and fmvn operations or 0 and 1
+        operations (dict[str, list[str]]): Operands of every operation, such as {"bm" : ["Qg6"]}
+    """
+    fen: str
+    operations: dict[str, list[str]]
+
+    @property
+    def id(self) -> str | None:
+        """Name of the position from its id operation"""
+        return self.operations.get("id", [None])[0]
+
+    @property
+    def best_moves(self) -> list[str]:
+        """Moves that solve the position, in SAN"""
+        return self.operations.get("bm", [])
+
+    @property
+    def avoid_moves(self) -> list[str]:
+        """Moves that fail the position, in SAN"""
+        return self.operations.get("am", [])
+
+
+class EpdResult(NamedTuple):
+    """Outcome of one test position
+
+    Attributes:
+        index (int): Index of the position inside its suite
+        id (str | None): Name of the position
+        solved (bool): The engine ended on a best move, or not on a move to avoid
+        move (str | None): Move the engine chose, in SAN
+        solved_after (float | None): Seconds until the engine settled on a solving move for good
+        seconds (float): Seconds the search took
+        nodes (int): Nodes searched
+    """
+    index: int
+    id: str | None
+    solved: bool
+    move: str | None
+    solved_after: float | None
+    seconds: float
+    nodes: int
+
+
+class SuiteSummary(NamedTuple):
+    """Totals of one suite
+
+    Attributes:
+        name (str): Name of the suite
+        solved (int): Positions solved
+        total (int): Positions tried
+        average_solution_time (float | None): Mean seconds to solution over the solved positions
+        nodes_per_second (float): Nodes per second over the whole suite
+    """
+    name: str
+    solved: int
+    total: int
+    average_solution_time: float | None
+    nodes_per_second: float
+
+
+def parse_epd(line: str) -> EpdRecord | None:
+    """Reads one EPD line
+
+    Args:
+        line (str): Four FEN fields followed by operations such as bm Qg6; id "WAC.001";
+
+    Return:
+        The record, or None for blank and comment lines. Raises ValueError when the position can not be
+        set up or could not come up in a game
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+
+    fields = line.split(None, 4)
+    if len(fields) < 4:
+        raise ValueError(f"Not a valid EPD record: {line}")
+
+    operations = {}
+    rest = fields[4] if len(fields) > 4 else ""
+    for operation in rest.split(";"):
+        tokens = shlex.split(operation)
+        if tokens:
+            operations[tokens[0]] = tokens[1:]
+
+    halfmove = operations.get("hmvc", ["0"])[0]
+    fullmove = operations.get("fmvn", ["1"])[0]
+    fen = " ".join(fields[:4] + [halfmove, fullmove])
+    try:
+        BoardManager().load_fen(fen, validate=True)
+
+    except ValueError as e:
+        raise ValueError(f"Not a valid EPD record: {line} ({e})") from e
+
+    return EpdRecord(fen, operations)
+
+
+def load_epd(path: str) -> list[EpdRecord]:
+    """Reads every record of an EPD file"""
+    records = []
+    with open(path) as stream:
+        for line in stream:
+            record = parse_epd(line)
+            if record is not None:
+                records.append(record)
+
+    return records
+
+
+def _moves(sans: list[str], game: BoardManager) -> set[Move]:
+    """Turns the SAN operands of an operation into moves, leaving out the ones that are not legal"""
+    moves = set()
+    for san in sans:
+        try:
+            moves.add(Move(*san_to_move(san, game)))
+
+        except ValueError:
+            continue
+
+    return moves
+
+
+def solve(index: int, record: EpdRecord, nodes: int | None = None, movetime: float | None = None,
+          depth: int | None = None, options: dict | None = None) -> EpdResult:
+    """Searches one test position, run inside the worker processes
+
+    Args:
+        index (int): Index of the position inside its suite
+        record (EpdRecord): The position
+        nodes (int | None): Most nodes to search
+        movetime (float | None): Seconds to search
+        depth (int | None): Deepest iteration to search
+        options (dict | None): Keyword arguments for Searcher, or for MctsSearcher with algorithm=mcts
+
+    Return:
+        Whether the position was solved and how long it took
+    """
+    game = BoardManager()
+    game.load_fen(record.fen)
+    best = _moves(record.best_moves, game)
+    avoid = _moves(record.avoid_moves, game)
+
+    def solves(move: Move | None) -> bool:
+        if move is None or not (best or avoid):
+            return False
+
+        return (not best or move in best) and move not in avoid
+
+    # Seconds of the first iteration of the unbroken run of solving iterations that ends the search
+    settled = [None]
+
+    def iteration(info: SearchInfo) -> None:
+        if info.pv and solves(info.pv[0]):
+            if settled[0] is None:
+                settled[0] = info.seconds
+
+        else:
+            settled[0] = None
+
+    started = time.monotonic()
+    with create_searcher(options) as searcher:
+        result = searcher.search(game, SearchLimits(depth, nodes, movetime), iteration)
+        seconds = time.monotonic() - started
+
+    solved = solves(result.best_move)
+    move = None if result.best_move is None else move_to_san(result.best_move, game)
+    solved_after = (seconds if settled[0] is None else settled[0]) if solved else None
+    return EpdResult(index, record.id, solved, move, solved_after, seconds, result.nodes)
+
+
+def run_suite(records: list[EpdRecord], workers: int | None = None, nodes: int | None = None,
+              movetime: float | None = None, depth: int | None = None, options: dict | None = None,
+              on_result: Callable[[EpdResult], None] | None = None) -> list[EpdResult]:
+    """Solves every position of a suite across a process pool
+
+    Args:
+        records (list[EpdRecord]): The positions
+        workers (int | None): Processes to use, None for one per CPU and 0 to solve in this process
+        nodes (int | None): Most nodes per position
+        movetime (float | None): Seconds per position
+        depth (int | None): Deepest iteration per position
+        options (dict | None): Keyword arguments for Searcher, or for MctsSearcher with algorithm=mcts
+        on_result (Callable | None): Called with every result as it comes in
+
+    Return:
+        The results in suite order
+    """
+    if nodes is None and movetime is None and depth is None:
+        raise ValueError("A node, time or depth limit per position is needed")
+
+    results = []
+
+    def finished(result: EpdResult) -> None:
+        results.append(result)
+        if on_result is not None:
+            on_result(result)
+
+    if workers == 0:
+        for index, record in enumerate(records):
+            finished(solve(index, record, nodes, movetime, depth, options))
+
+    else:
+        with ProcessPoolExecutor(workers or os.cpu_count()) as executor:
+            futures = [executor.submit(solve, index, record, nodes, movetime, depth, options)
+                       for index, record in enumerate(records)]
+            for future in as_completed(futures):
+                finished(future.result())
+
+    return sorted(results, key=lambda result: result.index)
+
+
+def summarize(name: str, results: list[EpdResult]) -> SuiteSummary:
+    """Totals the results of one suite"""
+    solved = [result for result in results if result.solved]
+    seconds = sum(result.seconds for result in results)
+    average = sum(result.solved_after for result in solved) / len(solved) if solved else None
+    nodes_per_second = sum(result.nodes for result in results) / seconds if seconds else 0.0
+    return SuiteSummary(name, len(solved), len(results), average, nodes_per_second)
@@ -0,0 +1,148 @@
+from typing import TYPE_CHECKING
+
+from fianchetto.core.pieces import Color
+from .pawns import PawnTable, pawn_score
+
+if TYPE_CHECKING:
+    from fianchetto import BoardManager
+
+# Centipawns per point of Piece.value
+PAWN_VALUE = 100
+
+# Piece square tables from white's point of view, written as the board is printed: the first row is
+# the 8th rank and the first column the a file
+_PAWN_TABLE = [
+    [  0,   0,   0,   0,   0,   0,   0,   0],
+    [ 50,  50,  50,  50,  50,  50,  50,  50],
+    [ 10,  10,  20,  30,  30,  20,  10,  10],
+    [  5,   5,  10,  25,  25,  10,   5,   5],
+    [  0,   0,   0,  20,  20,   0,   0,   0],
+    [  5,  -5, -10,   0,   0, -10,  -5,   5],
+    [  5,  10,  10, -20, -20,  10,  10,   5],
+    [  0,   0,   0,   0,   0,   0,   0,   0],
+]
+
+_KNIGHT_TABLE = [
+    [-50, -40, -30, -30, -30, -30, -40, -50],
+    [-40, -20,   0,   0,   0,   0, -20, -40],
+    [-30,   0,  10,  15,  15,  10,   0, -30],
+    [-30,   5,  15,  20,  20,  15,   5, -30],
+    [-30,   0,  15,  20,  20,  15,   0, -30],
+    [-30,   5,  10,  15,  15,  10,   5, -30],
+    [-40, -20,   0,   5,   5,   0, -20, -40],
+    [-50, -40, -30, -30, -30, -30, -40, -50],
+]
+
+_BISHOP_TABLE = [
+    [-20, -10, -10, -10, -10, -10, -10, -20],
+    [-10,   0,   0,   0,   0,   0,   0, -10],
+    [-10,   0,   5,  10,  10,   5,   0, -10],
+    [-10,   5,   5,  10,  10,   5,   5, -10],
+    [-10,   0,  10,  10,  10,  10,   0, -10],
+    [-10,  10,  10,  10,  10,  10,  10, -10],
+    [-10,   5,   0,   0,   0,   0,   5, -10],
+    [-20, -10, -10, -10, -10, -10, -10, -20],
+]
+
+_ROOK_TABLE = [
+    [  0,   0,   0,   0,   0,   0,   0,   0],
+    [  5,  10,  10,  10,  10,  10,  10,   5],
+    [ -5,   0,   0,   0,   0,   0,   0,  -5],
+    [ -5,   0,   0,   0,   0,   0,   0,  -5],
+    [ -5,   0,   0,   0,   0,   0,   0,  -5],
+    [ -5,   0,   0,   0,   0,   0,   0,  -5],
+    [ -5,   0,   0,   0,   0,   0,   0,  -5],
+    [  0,   0,   0,   5,   5,   0,   0,   0],
+]
+
+_QUEEN_TABLE = [
+    [-20, -10, -10,  -5,  -5, -10, -10, -20],
+    [-10,   0,   0,   0,   0,   0,   0, -10],
+    [-10,   0,   5,   5,   5,   5,   0, -10],
+    [ -5,   0,   5,   5,   5,   5,   0,  -5],
+    [  0,   0,   5,   5,   5,   5,   0,  -5],
+    [-10,   5,   5,   5,   5,   5,   0, -10],
+    [-10,   0,   5,   0,   0,   0,   0, -10],
+    [-20, -10, -10,  -5,  -5, -10, -10, -20],
+]
+
+_KING_TABLE = [
+    [-30, -40, -40, -50, -50, -40, -40, -30],
+    [-30, -40, -40, -50, -50, -40, -40, -30],
+    [-30, -40, -40, -50, -50, -40, -40, -30],
+    [-30, -40, -40, -50, -50, -40, -40, -30],
+    [-20, -30, -30, -40, -40, -30, -30, -20],
+    [-10, -20, -20, -20, -20, -20, -20, -10],
+    [ 20,  20,   0,   0,   0,   0,  20,  20],
+    [ 20,  30,  10,   0,   0,  10,  30,  20],
+]
+
+TABLES = {"p" : _PAWN_TABLE,
+          "N" : _KNIGHT_TABLE,
+          "B" : _BISHOP_TABLE,
+          "R" : _ROOK_TABLE,
+          "Q" : _QUEEN_TABLE,
+          "K" : _KING_TABLE}
+
+
+def piece_value(piece) -> int:
+    """Returns the material value of a piece in centipawns, kings are worth 0"""
+    return 0 if piece.value is None else piece.value * PAWN_VALUE
+
+
+def square_bonus(piece, square: tuple[int, int]) -> int:
+    """Returns the piece square table bonus of a piece standing on a square"""
+    row = 7 - square[1] if piece.color == Color.WHITE else square[1]
+    return TABLES[piece.symbol][row][square[0]]
+
+
+# Centipawns per attacked square, and per enemy attack on the squares around a king
+MOBILITY_WEIGHT = 2
+KING_ATTACK_WEIGHT = 8
+
+
+def king_danger(game: 'BoardManager', color: Color) -> int:
+    """Counts the enemy attacks on a king and the squares next to it, read from the board's attack maps"""
+    king_pos = game.white_king_pos if color == Color.WHITE else game.black_king_pos
+    if king_pos is None:
+        return 0
+
+    enemy = 1 if color == Color.WHITE else 0
+    counts = game.attacks.counts[enemy]
+    danger = 0
+    for x in range(max(0, king_pos[0] - 1), min(7, king_pos[0] + 1) + 1):
+        for y in range(max(0, king_pos[1] - 1), min(7, king_pos[1] + 1) + 1):
+            danger += counts[x * 8 + y]
+
+    return danger
+
+
+def evaluate(game: 'BoardManager', pawns: PawnTable | None = None) -> int:
+    """Scores a position with material, piece square tables and the pawn structure
+
+    When the board keeps attack maps, as Searcher turns on while searching, mobility and king safety terms
+    are added since they are only a few lookups there.
+
+    Args:
+        game (BoardManager): Position to score
+        pawns (PawnTable | None): Cache of pawn structure evaluations, None to work the structure out
+
+    Return:
+        Score in centipawns from the point of view of the side to move
+    """
+    score = 0
+    for x in range(8):
+        for y in range(8):
+            piece = game.board[x][y]
+            if piece is None:
+                continue
+
+            value = piece_value(piece) + square_bonus(piece, (x, y))
+            score += value if piece.color == Color.WHITE else -value
+
+    score += pawn_score(game, pawns)
+    if game.attacks is not None:
+        score += MOBILITY_WEIGHT * (game.attacks.mobility(Color.WHITE) - game.attacks.mobility(Color.BLACK))
+        score += KING_ATTACK_WEIGHT * (king_danger(game, Color.BLACK) - king_danger(game, Color.WHITE))
+
+    return score if game.to_move == Color.WHITE else -score
@@ -0,0 +1,544 @@
+import inspect
+import math
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+from fianchetto.core.attacks import is_attacked
+from fianchetto.core.board_manager import BoardManager, Move
+from fianchetto.core.pieces import Color
+from .evaluation import evaluate
+from .search import MATE, Searcher, SearchInfo, SearchLimits, SearchResult
+
+# Exploration constant of UCT, the square root of two balances trying new moves against the best ones
+EXPLORATION = 1.4
+
+# Playouts that reach this many plies stop and are scored by the static evaluation
+PLAYOUT_PLIES = 80
+
+# Chance that the captures policy takes the most valuable piece on offer instead of a random move
+CAPTURE_BIAS = 0.75
+
+# Playouts a depth limit allows per ply of depth, since the tree has no iterations to count
+PLAYOUTS_PER_DEPTH = 250
+
+# Playouts between progress reports and between checks of the stop conditions
+_REPORT_EVERY = 256
+
+
+def random_policy(game: BoardManager, moves: list[tuple], rng: random.Random) -> int:
+    """Rollout policy that picks any pseudo legal move with the same chance
+
+    Return:
+        Index of the move to try
+    """
+    return rng.randrange(len(moves))
+
+
+def capture_policy(game: BoardManager, moves: list[tuple], rng: random.Random) -> int:
+    """Rollout policy that mostly takes the most valuable piece it can and otherwise plays at random
+
+    Return:
+        Index of the move to try
+    """
+    if rng.random() < CAPTURE_BIAS:
+        best = None
+        best_value = 0
+        for i, move in enumerate(moves):
+            target = game.board[move[1][0]][move[1][1]]
+            value = 0 if target is None or target.value is None else target.value
+            if move[2] is not None:
+                value += 8
+
+            if value > best_value:
+                best = i
+                best_value = value
+
+        if best is not None:
+            return best
+
+    return rng.randrange(len(moves))
+
+
+# Rollout policies by the name given to MctsSearcher
+ROLLOUT_POLICIES = {"random" : random_policy, "captures" : capture_policy}
+
+
+def win_probability(score: int) -> float:
+    """Turns a score in centipawns into the chance of winning for the side it is scored for"""
+    return 1 / (1 + 10 ** (-score / 400))
+
+
+def probability_score(probability: float) -> int:
+    """Turns a chance of winning back into centipawns, the inverse of win_probability"""
+    probability = min(0.999, max(0.001, probability))
+    return round(-400 * math.log10(1 / probability - 1))
+
+
+def pseudo_legal_moves(game: BoardManager) -> list[tuple]:
+    """Lists the moves of the side to move without checking that they leave the king safe
+
+    Castling is only listed when it is legal, and promotions are always to a queen. The moves are plain
+    (start, end, promotion) tuples, a playout only turns the one it plays into a Move.
+    """
+    moves = []
+    for x in range(8):
+        for y in range(8):
+            piece = game.board[x][y]
+            if piece is None or piece.color != game.to_move:
+                continue
+
+            ends = piece.generate_valid_moves((x, y), game, True)
+            if piece.symbol == "K":
+                ends = ends + piece.castling(game)
+
+            if piece.symbol == "p":
+                moves.extend(((x, y), end, "Q" if end[1] in (0, 7) else None) for end in ends)
+
+            else:
+                start = (x, y)
+                moves.extend((start, end, None) for end in ends)
+
+    return moves
+
+
+def leaves_king_safe(game: BoardManager, move: tuple) -> bool:
+    """Checks that a pseudo legal move does not leave the mover's king attacked
+
+    The move is played on the board array alone and taken back, which is much cheaper than make_move.
+    """
+    board = game.board
+    start, end, _ = move
+    piece = board[start[0]][start[1]]
+    color = piece.color
+    king = end if piece.symbol == "K" else (game.white_king_pos if color == Color.WHITE else game.black_king_pos)
+    if king is None:
+        return True
+
+    target = board[end[0]][end[1]]
+    passed = None
+    if target is None and piece.symbol == "p" and start[0] != end[0]:
+        passed = board[end[0]][start[1]]
+        board[end[0]][start[1]] = None
+
+    board[end[0]][end[1]] = piece
+    board[start[0]][start[1]] = None
+    safe = not is_attacked(board, king, Color.BLACK if color == Color.WHITE else Color.WHITE)
+    board[start[0]][start[1]] = piece
+    board[end[0]][end[1]] = target
+    if passed is not None:
+        board[end[0]][start[1]] = passed
+
+    return safe
+
+
+def insufficient_material(game: BoardManager) -> bool:
+    """Checks for bare kings or a king and one minor piece against a bare king"""
+    minors = 0
+    for column in game.board:
+        for piece in column:
+            if piece is None or piece.symbol == "K":
+                continue
+
+            if piece.symbol in "NB":
+                minors += 1
+                if minors > 1:
+                    return False
+
+            else:
+                return False
+
+    return True
+
+
+def playout(game: BoardManager, rng: random.Random, policy: Callable = random_policy,
+            max_plies: int = PLAYOUT_PLIES) -> float:
+    """Plays quick moves from a position until the game ends or the ply limit is hit, then takes them back
+
+    Every ply only lists the pseudo legal moves and checks the legality of the move the policy picks,
+    dropping it and asking again when it turns out to leave the king in check. The full list of legal
+    moves is never built.
+
+    Args:
+        game (BoardManager): Position to play out, left as it was
+        rng (random.Random): Source of the random choices
+        policy (Callable): Picks the index of the move to try from a list of pseudo legal moves
+        max_plies (int): Plies after which the static evaluation decides
+
+    Return:
+        Result for the side to move in the position, 1 for a win, 0 for a loss and 0.5 for a draw
+    """
+    plies = 0
+    result = None
+    while result is None:
+        if game.halfmove_clock >= 100 or insufficient_material(game):
+            result = 0.5
+            break
+
+        if plies >= max_plies:
+            result = win_probability(evaluate(game))
+            break
+
+        moves = pseudo_legal_moves(game)
+        move = None
+        while moves:
+            i = policy(game, moves, rng)
+            if leaves_king_safe(game, moves[i]):
+                move = Move(*moves[i])
+                break
+
+            moves[i] = moves[-1]
+            moves.pop()
+
+        if move is None:
+            king = game.white_king_pos if game.to_move == Color.WHITE else game.black_king_pos
+            enemy = Color.BLACK if game.to_move == Color.WHITE else Color.WHITE
+            result = 0.0 if king is not None and is_attacked(game.board, king, enemy) else 0.5
+            break
+
+        game.make_move(move)
+        plies += 1
+
+    for _ in range(plies):
+        game.unmake_move()
+
+    # The result is for the side to move where the playout stopped
+    return result if plies % 2 == 0 else 1 - result
+
+
+def playout_budget(limits: SearchLimits) -> int | None:
+    """Returns the most playouts a search may run, taken from the node limit or else the depth limit"""
+    if limits.nodes is not None:
+        return limits.nodes
+
+    if limits.depth is not None:
+        return max(1, limits.depth) * PLAYOUTS_PER_DEPTH
+
+    return None
+
+
+class MctsNode():
+    """A position in the search tree
+
+    Attributes:
+        move (Move | None): Move that leads here from the parent, None at the root
+        parent (MctsNode | None): Node this one was expanded from
+        children (list[MctsNode]): Expanded children
+        untried (list[Move] | None): Legal moves not expanded yet, None until the node is first visited
+        visits (int): Playouts through this node
+        wins (float): Sum of their results for the side that played move
+        key (int | None): Zobrist key of the position, set when the node is added
+    """
+    __slots__ = ("move", "parent", "children", "untried", "visits", "wins", "key")
+
+    def __init__(self, move: Move | None = None, parent: 'MctsNode | None' = None):
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = None
+        self.visits = 0
+        self.wins = 0.0
+        self.key = None
+
+    def select(self, exploration: float) -> 'MctsNode':
+        """Picks the child with the highest upper confidence bound"""
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: child.wins / child.visits
+                   + exploration * math.sqrt(log_visits / child.visits))
+
+    def best_child(self) -> 'MctsNode | None':
+        """Returns the most visited child, None if there are none"""
+        return max(self.children, key=lambda child: child.visits, default=None)
+
+
+def _search_worker(fen: str, playouts: int | None, seconds: float | None, seed: int,
+                   options: dict) -> dict[Move, tuple[int, float]]:
+    """Builds a tree from a position in a worker process and returns the statistics of the root moves"""
+    game = BoardManager()
+    game.load_fen(fen)
+    searcher = MctsSearcher(**options, seed=seed)
+    searcher.search(game, SearchLimits(nodes=playouts, movetime=seconds))
+    return {child.move : (child.visits, child.wins) for child in searcher.root.children}
+
+
+class MctsSearcher():
+    """Monte Carlo tree search with UCT selection and fast random playouts
+
+    It can be used in place of Searcher: the node limit counts playouts and the depth limit is ignored.
+    The tree of the last search is kept, and a later search from a position inside it, such as the one
+    after the engine's move and the opponent's reply, starts from that subtree.
+
+    With workers, every process grows its own tree from the root with its own random playouts and share
+    of the playouts, and the visits and wins of the root moves are added up (root parallelism). The trees
+    built by the workers are not kept, and a stop request only reaches the search in this process.
+
+    Attributes:
+        exploration (float): UCT exploration constant
+        policy (Callable): Rollout policy picking the index of the move to try
+        playout_plies (int): Plies after which a playout is scored by the static evaluation
+        workers (int): Processes to search in, 0 to search in this process
+        root (MctsNode | None): Root of the last search
+        nodes (int): Playouts of the current or last search
+        playouts_per_second (float): Speed of the last search
+        stop_event (threading.Event): Set from any thread to stop the search early. It stays set, whoever
+            starts the next search clears it first, so a stop sent before that search begins is not lost
+    """
+    def __init__(self, exploration: float = EXPLORATION, rollout: str | Callable = "random",
+                 playout_plies: int = PLAYOUT_PLIES, workers: int = 0, reuse: bool = True,
+                 seed: int | None = None):
+        """Creates a searcher
+
+        Args:
+            exploration (float): UCT exploration constant
+            rollout (str | Callable): Name of a policy in ROLLOUT_POLICIES or a policy function
+            playout_plies (int): Plies after which a playout is scored by the static evaluation
+            workers (int): Processes to search in, 0 to search in this process
+            reuse (bool): Keep the tree between searches
+            seed (int | None): Seed of the random playouts
+        """
+        if isinstance(rollout, str):
+            if rollout not in ROLLOUT_POLICIES:
+                raise ValueError(f"Unknown rollout policy: {rollout}")
+
+            policy = ROLLOUT_POLICIES[rollout]
+
+        else:
+            policy = rollout
+
+        self.exploration = exploration
+        self.rollout = rollout
+        self.policy = policy
+        self.playout_plies = playout_plies
+        self.workers = workers
+        self.reuse = reuse
+        self.rng = random.Random(seed)
+        self.root = None
+        self.nodes = 0
+        self.playouts_per_second = 0.0
+        self.stop_event = threading.Event()
+        self._executor = None
+
+    def stop(self) -> None:
+        """Asks a running search to stop as soon as possible"""
+        self.stop_event.set()
+
+    def close(self) -> None:
+        """Shuts down the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> 'MctsSearcher':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def search(self, game: BoardManager, limits: SearchLimits | None = None,
+               info: Callable[[SearchInfo], None] | None = None) -> SearchResult:
+        """Runs playouts from a position until a limit is hit and picks the most visited move
+
+        Args:
+            game (BoardManager): Position to search, left as it was
+            limits (SearchLimits | None): When to stop, nodes counts playouts and a depth allows
+                PLAYOUTS_PER_DEPTH playouts per ply. Without any the search runs until stop is called
+            info (Callable[[SearchInfo], None] | None): Called with progress every few hundred playouts
+
+        Return:
+            The best move, the score worked out from its win rate and the number of playouts
+        """
+        limits = limits or SearchLimits()
+        self.nodes = 0
+        started = time.monotonic()
+        root_moves = game.legal_moves()
+        if not root_moves:
+            return SearchResult(None, None, -MATE if game.check == game.to_move else 0, 0, 0)
+
+        if self.workers:
+            self.root = self._parallel_search(game, limits)
+
+        else:
+            self.root = self._find_root(game)
+            while not self._should_stop(limits, started):
+                self._playout_once(game)
+                if info is not None and self.nodes % _REPORT_EVERY == 0:
+                    info(self._info(game, started))
+
+        seconds = time.monotonic() - started
+        self.playouts_per_second = self.nodes / seconds if seconds else 0.0
+        if info is not None:
+            info(self._info(game, started))
+
+        best = self.root.best_child()
+        if best is None:
+            return SearchResult(root_moves[0], None, 0, 0, self.nodes)
+
+        ponder = best.best_child()
+        score = probability_score(best.wins / best.visits) if best.visits else 0
+        return SearchResult(best.move, None if ponder is None else ponder.move, score, self._depth(), self.nodes)
+
+    def _should_stop(self, limits: SearchLimits, started: float) -> bool:
+        """Checks the playout, time and stop conditions"""
+        if self.stop_event.is_set():
+            return True
+
+        budget = playout_budget(limits)
+        if budget is not None and self.nodes >= budget:
+            return True
+
+        return limits.deadline is not None and self.nodes % 16 == 0 and limits.clock() >= limits.deadline
+
+    def _find_root(self, game: BoardManager) -> MctsNode:
+        """Returns the node of the position in the kept tree, looking two plies deep, or a new root"""
+        key = game.zobrist_key()
+        if self.reuse and self.root is not None:
+            candidates = [self.root]
+            for child in self.root.children:
+                candidates.append(child)
+                candidates.extend(child.children)
+
+            for node in candidates:
+                if node.key == key:
+                    node.parent = None
+                    node.move = None
+                    return node
+
+        return MctsNode()
+
+    def _playout_once(self, game: BoardManager) -> None:
+        """Selects a path down the tree, expands one move, plays it out and backs the result up"""
+        node = self.root
+        played = 0
+        while True:
+            if node.untried is None:
+                node.key = game.zobrist_key()
+                node.untried = [] if game.halfmove_clock >= 100 else game.legal_moves()
+                self.rng.shuffle(node.untried)
+
+            if node.untried or not node.children:
+                break
+
+            node = node.select(self.exploration)
+            game.make_move(node.move)
+            played += 1
+
+        if node.untried:
+            move = node.untried.pop()
+            child = MctsNode(move, node)
+            node.children.append(child)
+            game.make_move(move)
+            played += 1
+            child.key = game.zobrist_key()
+            node = child
+            result = playout(game, self.rng, self.policy, self.playout_plies)
+
+        elif game.halfmove_clock >= 100 or game.check != game.to_move:
+            # Stalemate or the fifty move rule
+            result = 0.5
+
+        else:
+            result = 0.0
+
+        for _ in range(played):
+            game.unmake_move()
+
+        # result is for the side to move at node, the wins of a node count for the side that moved into it
+        while node is not None:
+            node.visits += 1
+            node.wins += 1 - result
+            result = 1 - result
+            node = node.parent
+
+        self.nodes += 1
+
+    def _parallel_search(self, game: BoardManager, limits: SearchLimits) -> MctsNode:
+        """Grows a tree in every worker process and adds up the statistics of the root moves"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers)
+
+        budget = playout_budget(limits)
+        playouts = None if budget is None else max(1, budget // self.workers)
+        seconds = None if limits.deadline is None else max(0.0, limits.deadline - limits.clock())
+        if playouts is None and seconds is None:
+            raise ValueError("Searching in worker processes needs a playout or time limit")
+
+        options = {"exploration" : self.exploration, "rollout" : self.rollout,
+                   "playout_plies" : self.playout_plies}
+        fen = game.to_fen()
+        futures = [self._executor.submit(_search_worker, fen, playouts, seconds, self.rng.getrandbits(32), options)
+                   for _ in range(self.workers)]
+        totals = {}
+        for future in futures:
+            for move, (visits, wins) in future.result().items():
+                before = totals.get(move, (0, 0.0))
+                totals[move] = (before[0] + visits, before[1] + wins)
+
+        root = MctsNode()
+        for move, (visits, wins) in totals.items():
+            child = MctsNode(move, root)
+            child.visits = visits
+            child.wins = wins
+            root.children.append(child)
+            root.visits += visits
+            self.nodes += visits
+
+        return root
+
+    def _depth(self) -> int:
+        """Returns the length of the most visited line of the tree"""
+        depth = 0
+        node = self.root.best_child()
+        while node is not None:
+            depth += 1
+            node = node.best_child()
+
+        return depth
+
+    def _info(self, game: BoardManager, started: float) -> SearchInfo:
+        """Reports the most visited line and its score"""
+        pv = []
+        node = self.root.best_child()
+        while node is not None and node.visits > 1:
+            pv.append(node.move)
+            node = node.best_child()
+
+        best = self.root.best_child()
+        score = probability_score(best.wins / best.visits) if best is not None and best.visits else 0
+        return SearchInfo(len(pv), score, None, self.nodes, time.monotonic() - started, pv)
+
+
+def create_searcher(options: dict | None = None) -> Searcher | MctsSearcher:
+    """Makes the searcher an engine option set asks for, MCTS when it has algorithm=mcts
+
+    Args:
+        options (dict | None): Keyword arguments for Searcher or MctsSearcher, with an optional
+            "algorithm" of "alphabeta" or "mcts"
+
+    Return:
+        The searcher
+    """
+    options = dict(options or {})
+    algorithm = options.pop("algorithm", "alphabeta")
+    check_options({"algorithm" : algorithm, **options})
+    return (MctsSearcher if algorithm == "mcts" else Searcher)(**options)
+
+
+def check_options(options: dict | None) -> None:
+    """Raises ValueError when engine options name an unknown algorithm or an argument its searcher does not take
+
+    Args:
+        options (dict | None): Options as given to create_searcher
+    """
+    options = dict(options or {})
+    algorithm = options.pop("algorithm", "alphabeta")
+    searchers = {"alphabeta" : Searcher, "mcts" : MctsSearcher}
+    if algorithm not in searchers:
+        raise ValueError(f"Unknown search algorithm: {algorithm}")
+
+    accepted = list(inspect.signature(searchers[algorithm]).parameters)
+    unknown = [key for key in options if key not in accepted]
+    if unknown:
+        raise ValueError(f"Unknown {algorithm} option {', '.join(unknown)}, expected one of algorithm, "
+                         f"{', '.join(accepted)}")
@@ -0,0 +1,186 @@
+from typing import TYPE_CHECKING
+
+from fianchetto.core.pieces import Color
+
+if TYPE_CHECKING:
+    from fianchetto import BoardManager
+
+# Centipawns for each term of the pawn structure
+DOUBLED_PENALTY = 12
+ISOLATED_PENALTY = 15
+SHIELD_BONUS = 10
+
+# Bonus of a passed pawn by how many ranks it has come from its starting rank
+PASSED_BONUS = (0, 0, 5, 10, 20, 35, 60, 100)
+
+
+class PawnEntry():
+    """Evaluation of one pawn structure
+
+    Squares in the masks are bits numbered file * 8 + rank, like the Zobrist tables.
+
+    Attributes:
+        key (int): Pawn key of the structure
+        score (int): Doubled, isolated and passed pawn terms in centipawns from white's point of view
+        pawns (tuple[int, int]): Bit masks of the white and black pawns
+        passed (tuple[int, int]): Bit masks of the white and black passed pawns
+    """
+    __slots__ = ("key", "score", "pawns", "passed", "_shields")
+
+    def __init__(self, key: int, score: int, pawns: tuple[int, int], passed: tuple[int, int]):
+        self.key = key
+        self.score = score
+        self.pawns = pawns
+        self.passed = passed
+        # (king square, shield) of the last king square asked about for each color
+        self._shields = [None, None]
+
+    def shield(self, color: Color, king: tuple[int, int] | None) -> int:
+        """Counts the pawns of a color on the two ranks in front of its king and the files next to it
+
+        The count only depends on the pawns and the king square, so it is kept with the entry until the
+        king is asked about on another square.
+        """
+        if king is None:
+            return 0
+
+        index = 0 if color == Color.WHITE else 1
+        cached = self._shields[index]
+        if cached is not None and cached[0] == king:
+            return cached[1]
+
+        step = 1 if color == Color.WHITE else -1
+        mask = self.pawns[index]
+        count = 0
+        for x in range(max(0, king[0] - 1), min(7, king[0] + 1) + 1):
+            for y in (king[1] + step, king[1] + 2 * step):
+                if 0 <= y <= 7 and mask >> (x * 8 + y) & 1:
+                    count += 1
+
+        self._shields[index] = (king, count)
+        return count
+
+
+def evaluate_pawns(board: list[list], key: int = 0) -> PawnEntry:
+    """Works out the pawn structure terms of a board from scratch
+
+    Args:
+        board (list[list[None|pieces]]): The board
+        key (int): Pawn key of the board, kept with the entry
+
+    Return:
+        The evaluated structure
+    """
+    # ranks[color][file] lists the ranks of the pawns of the color on the file
+    ranks = ([[] for _ in range(8)], [[] for _ in range(8)])
+    masks = [0, 0]
+    for x in range(8):
+        for y in range(8):
+            piece = board[x][y]
+            if piece is not None and piece.symbol == "p":
+                index = 0 if piece.color == Color.WHITE else 1
+                ranks[index][x].append(y)
+                masks[index] |= 1 << (x * 8 + y)
+
+    score = 0
+    passed = [0, 0]
+    for index, sign in ((0, 1), (1, -1)):
+        own = ranks[index]
+        enemy = ranks[1 - index]
+        for x in range(8):
+            if not own[x]:
+                continue
+
+            score -= sign * DOUBLED_PENALTY * (len(own[x]) - 1)
+            neighbours = [own[f] for f in (x - 1, x + 1) if 0 <= f <= 7]
+            if not any(neighbours):
+                score -= sign * ISOLATED_PENALTY * len(own[x])
+
+            for y in own[x]:
+                # Passed when no enemy pawn stands ahead of it on its own or a neighbouring file
+                ahead = [r for f in (x - 1, x, x + 1) if 0 <= f <= 7 for r in enemy[f]
+                         if (r > y if index == 0 else r < y)]
+                if not ahead:
+                    passed[index] |= 1 << (x * 8 + y)
+                    score += sign * PASSED_BONUS[y if index == 0 else 7 - y]
+
+    return PawnEntry(key, score, tuple(masks), tuple(passed))
+
+
+class PawnTable():
+    """Fixed size cache of pawn structure evaluations keyed by pawn key
+
+    Pawns move rarely compared to the other pieces, so most positions of a search share their pawn
+    structure with many others. Every key has one slot, picked by its low bits, and a new structure
+    replaces whatever was in its slot, so the memory used never grows.
+
+    Attributes:
+        size (int): Number of slots, a power of two
+        hits (int): Lookups answered from the table
+        misses (int): Lookups that had to evaluate the structure
+    """
+    # Rough size of one entry with its masks and list slot, used to turn kilobytes into slots
+    ENTRY_BYTES = 256
+
+    def __init__(self, kilobytes: int = 1024):
+        """Creates an empty table
+
+        Args:
+            kilobytes (int): Approximate memory the table may use
+        """
+        size = 1
+        while size * 2 * self.ENTRY_BYTES <= kilobytes * 1024:
+            size *= 2
+
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._slots = [None] * size
+
+    def probe(self, game: 'BoardManager') -> PawnEntry:
+        """Returns the evaluation of the pawn structure of a position, working it out if it is not cached"""
+        key = game.pawn_key()
+        slot = key & (self.size - 1)
+        entry = self._slots[slot]
+        if entry is not None and entry.key == key:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        entry = self._slots[slot] = evaluate_pawns(game.board, key)
+        return entry
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups answered from the table, 0 before the first lookup"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        """Returns the size and hit rate of the table"""
+        return {"size" : self.size,
+                "used" : sum(1 for entry in self._slots if entry is not None),
+                "hits" : self.hits,
+                "misses" : self.misses,
+                "hit_rate" : self.hit_rate}
+
+    def clear(self) -> None:
+        """Empties every slot and resets the statistics"""
+        self._slots = [None] * self.size
+        self.hits = 0
+        self.misses = 0
+
+
+def pawn_score(game: 'BoardManager', table: PawnTable | None = None) -> int:
+    """Scores the pawn structure and the pawn shields of both kings
+
+    Args:
+        game (BoardManager): Position to score
+        table (PawnTable | None): Cache to read the structure from, None to work it out every time
+
+    Return:
+        Score in centipawns from white's point of view
+    """
+    entry = evaluate_pawns(game.board) if table is None else table.probe(game)
+    shields = entry.shield(Color.WHITE, game.white_king_pos) - entry.shield(Color.BLACK, game.black_king_pos)
+    return entry.score + SHIELD_BONUS * shields
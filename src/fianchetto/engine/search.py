@@ -0,0 +1,534 @@
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, NamedTuple
+
+from fianchetto.core.board_manager import BoardManager, Move
+from .evaluation import evaluate
+from .pawns import PawnTable
+from .transposition import EXACT, LOWER, UPPER, TranspositionTable
+
+if TYPE_CHECKING:
+    from .time_manager import TimeManager
+
+INFINITY = 1_000_000
+MATE = 100_000
+
+# Scores this close to MATE are mates found by the search
+MATE_BOUND = MATE - 1000
+
+# How many nodes are searched between checks of the stop conditions
+_CHECK_EVERY = 256
+
+# Half width of the first aspiration window around the score of the last iteration, in centipawns
+ASPIRATION_WINDOW = 50
+
+# Depth taken off the search after a null move, and the least depth it is tried at
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_MIN_DEPTH = 3
+
+# Moves searched at full depth before later quiet moves are reduced, and the least depth to reduce at
+LMR_FULL_DEPTH_MOVES = 3
+LMR_MIN_DEPTH = 3
+
+# How far below alpha the static score may be, by remaining depth, before quiet moves are skipped
+FUTILITY_MARGINS = (0, 200, 500)
+
+
+class SearchLimits():
+    """Conditions that end a search. Fields left as None do not limit it
+
+    The fields are read while the search runs, so another thread may change them, for example to set a
+    deadline when a ponder search becomes a normal one.
+
+    Attributes:
+        depth (int | None): Deepest iteration to search
+        nodes (int | None): Most nodes to search
+        deadline (float | None): Value of clock at which the search stops
+        time_manager (TimeManager | None): Decides after each iteration whether to start another one
+        clock (Callable[[], float]): Time the deadline is measured in, time.monotonic unless a time manager
+            with its own clock is set
+    """
+    def __init__(self, depth: int | None = None, nodes: int | None = None, movetime: float | None = None,
+                 deadline: float | None = None, time_manager: 'TimeManager | None' = None):
+        """Creates a set of limits
+
+        Args:
+            depth (int | None): Deepest iteration to search
+            nodes (int | None): Most nodes to search
+            movetime (float | None): Seconds to search for, counted from now
+            deadline (float | None): time.monotonic() value at which the search stops
+            time_manager (TimeManager | None): Clock budget for the move, its hard limit becomes a deadline
+        """
+        self.depth = depth
+        self.nodes = nodes
+        self.deadline = deadline
+        self.time_manager = None
+        self.clock = time.monotonic
+        if movetime is not None:
+            self.set_deadline(time.monotonic() + movetime)
+
+        if time_manager is not None:
+            self.set_time_manager(time_manager)
+
+    def set_deadline(self, deadline: float) -> None:
+        """Moves the deadline earlier, or sets it if there was none"""
+        self.deadline = deadline if self.deadline is None else min(self.deadline, deadline)
+
+    def set_time_manager(self, time_manager: 'TimeManager') -> None:
+        """Puts the search on a clock budget, also while it is already running
+
+        The limits switch to the manager's clock, a deadline that was already set keeps the time it had left.
+        """
+        if time_manager.clock is not self.clock:
+            if self.deadline is not None:
+                self.deadline = time_manager.clock() + self.deadline - self.clock()
+
+            self.clock = time_manager.clock
+
+        self.time_manager = time_manager
+        self.set_deadline(time_manager.hard_deadline)
+
+
+class SearchInfo(NamedTuple):
+    """Progress report sent after each finished iteration
+
+    Attributes:
+        depth (int): Depth of the iteration
+        score (int): Score in centipawns from the side to move's point of view
+        mate (int | None): Moves until mate, negative when being mated, or None
+        nodes (int): Nodes searched so far
+        seconds (float): Time spent so far
+        pv (list[Move]): The principal variation
+    """
+    depth: int
+    score: int
+    mate: int | None
+    nodes: int
+    seconds: float
+    pv: list[Move]
+
+
+class SearchResult(NamedTuple):
+    """Outcome of a search
+
+    Attributes:
+        best_move (Move | None): Move to play, None if there are no legal moves
+        ponder_move (Move | None): Expected reply, if the search found one
+        score (int): Score of the best move from the side to move's point of view
+        depth (int): Depth of the last finished iteration
+        nodes (int): Nodes searched
+    """
+    best_move: Move | None
+    ponder_move: Move | None
+    score: int
+    depth: int
+    nodes: int
+
+
+class _SearchAborted(Exception):
+    """Raised inside the search tree when a limit is hit"""
+
+
+def _score_to_tt(score: int, ply: int) -> int:
+    """Makes mate scores relative to the stored position instead of the root"""
+    if score > MATE_BOUND:
+        return score + ply
+
+    if score < -MATE_BOUND:
+        return score - ply
+
+    return score
+
+
+def _score_from_tt(score: int, ply: int) -> int:
+    """Turns a stored mate score back into one relative to the root"""
+    if score > MATE_BOUND:
+        return score - ply
+
+    if score < -MATE_BOUND:
+        return score + ply
+
+    return score
+
+
+def _has_pieces(game: BoardManager) -> bool:
+    """Checks if the side to move has anything besides pawns and its king
+
+    Null move pruning assumes passing is the worst a side can do, which fails in the zugzwangs of pawn
+    endings, so it is only tried while the side has pieces.
+    """
+    for column in game.board:
+        for piece in column:
+            if piece is not None and piece.color == game.to_move and piece.symbol not in ("p", "K"):
+                return True
+
+    return False
+
+
+def mate_in(score: int) -> int | None:
+    """Turns a mate score into a number of moves, positive if the side to move mates"""
+    if score > MATE_BOUND:
+        return (MATE - score + 1) // 2
+
+    if score < -MATE_BOUND:
+        return -((MATE + score + 1) // 2)
+
+    return None
+
+
+class Searcher():
+    """Iterative deepening alpha-beta search with a transposition table
+
+    Principal variation search, aspiration windows, null move pruning, late move reductions and futility
+    pruning can each be switched off, to measure what they save and what they cost.
+
+    Attributes:
+        tt (TranspositionTable): Results shared between searches
+        pawn_table (PawnTable): Pawn structure evaluations shared between searches
+        nodes (int): Nodes visited by the current or last search
+        stop_event (threading.Event): Set from any thread to stop the search early. It stays set, whoever
+            starts the next search clears it first, so a stop sent before that search begins is not lost
+        pvs (bool): Search moves after the first with a null window and only search again if they beat it
+        aspiration (bool): Start each iteration with a narrow window around the last score
+        null_move (bool): Pass the move and cut off if the position still holds with a reduced search
+        lmr (bool): Search late quiet moves less deep unless they turn out to beat alpha
+        futility (bool): Skip quiet moves near the leaves when the static score is far below alpha
+        attack_maps (bool): Keep attack maps on the board while searching, which adds mobility and king
+            safety to the evaluation
+    """
+    def __init__(self, hash_mb: int = 16, pvs: bool = True, aspiration: bool = True, null_move: bool = True,
+                 lmr: bool = True, futility: bool = True, attack_maps: bool = True):
+        """Creates a searcher
+
+        Args:
+            hash_mb (int): Memory for the transposition table in megabytes
+            pvs (bool): Use principal variation search
+            aspiration (bool): Use aspiration windows at the root
+            null_move (bool): Use null move pruning
+            lmr (bool): Use late move reductions
+            futility (bool): Use futility pruning
+            attack_maps (bool): Turn on the board's attack maps for the search
+        """
+        self.tt = TranspositionTable(hash_mb)
+        self.pawn_table = PawnTable()
+        self.pvs = pvs
+        self.aspiration = aspiration
+        self.null_move = null_move
+        self.lmr = lmr
+        self.futility = futility
+        self.attack_maps = attack_maps
+        self.nodes = 0
+        self.stop_event = threading.Event()
+        self._limits = SearchLimits()
+        self._killers = []
+
+    def stop(self) -> None:
+        """Asks a running search to stop as soon as possible"""
+        self.stop_event.set()
+
+    def close(self) -> None:
+        """Holds nothing to release, it is here so any searcher from create_searcher can be closed"""
+
+    def __enter__(self) -> 'Searcher':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def search(self, game: BoardManager, limits: SearchLimits | None = None,
+               info: Callable[[SearchInfo], None] | None = None) -> SearchResult:
+        """Searches for the best move of the side to move
+
+        The board is changed while searching and restored before returning. Attack maps turned on for the
+        search are turned off again.
+
+        Args:
+            game (BoardManager): Position to search
+            limits (SearchLimits | None): When to stop, no limits searches until stop is called
+            info (Callable | None): Called with a SearchInfo after every finished iteration
+
+        Return:
+            The best move found and its score
+        """
+        self._limits = limits or SearchLimits()
+        self.nodes = 0
+        self._killers = [[None, None] for _ in range(128)]
+        if not self.attack_maps or game.attacks is not None:
+            return self._iterative_deepening(game, info)
+
+        game.enable_attack_maps()
+        try:
+            return self._iterative_deepening(game, info)
+
+        finally:
+            game.disable_attack_maps()
+
+    def _iterative_deepening(self, game: BoardManager, info: Callable[[SearchInfo], None] | None) -> SearchResult:
+        """Searches one depth deeper at a time until a limit is hit, see search"""
+        started = time.monotonic()
+        root_ply = len(game.history)
+
+        root_moves = game.legal_moves()
+        if not root_moves:
+            return SearchResult(None, None, -MATE if game.check == game.to_move else 0, 0, 0)
+
+        best_move = root_moves[0]
+        ponder_move = None
+        best_score = 0
+        finished_depth = 0
+        depth = 1
+        while self._limits.depth is None or depth <= self._limits.depth:
+            try:
+                if self.aspiration and finished_depth > 0 and abs(best_score) < MATE_BOUND:
+                    score = self._aspiration_search(game, depth, best_score)
+
+                else:
+                    score = self._negamax(game, depth, -INFINITY, INFINITY, 0)
+
+            except _SearchAborted:
+                while len(game.history) > root_ply:
+                    game.unmake_move()
+
+                break
+
+            pv = self.principal_variation(game, depth)
+            if pv:
+                best_move = pv[0]
+                ponder_move = pv[1] if len(pv) > 1 else None
+
+            best_score = score
+            finished_depth = depth
+            if info is not None:
+                info(SearchInfo(depth, score, mate_in(score), self.nodes, time.monotonic() - started, pv))
+
+            # Nothing more to find once a forced mate is within the searched depth
+            if abs(score) > MATE_BOUND and MATE - abs(score) <= depth:
+                break
+
+            manager = self._limits.time_manager
+            if manager is not None:
+                manager.iteration_finished(depth, score, best_move)
+                if manager.should_stop():
+                    break
+
+            depth += 1
+
+        return SearchResult(best_move, ponder_move, best_score, finished_depth, self.nodes)
+
+    def principal_variation(self, game: BoardManager, depth: int) -> list[Move]:
+        """Follows the best moves stored in the transposition table
+
+        Args:
+            game (BoardManager): Position to start from
+            depth (int): Most moves to follow
+
+        Return:
+            The moves of the principal variation
+        """
+        pv = []
+        seen = set()
+        while len(pv) < depth:
+            key = game.zobrist_key()
+            entry = self.tt.probe(key)
+            if entry is None or entry.move is None or key in seen or entry.move not in game.legal_moves():
+                break
+
+            seen.add(key)
+            pv.append(entry.move)
+            game.make_move(entry.move)
+
+        for _ in pv:
+            game.unmake_move()
+
+        return pv
+
+    def _aspiration_search(self, game: BoardManager, depth: int, guess: int) -> int:
+        """Searches the root with a window around the expected score, widening the side it fails on"""
+        below = above = ASPIRATION_WINDOW
+        while True:
+            alpha = guess - below if below < 1000 else -INFINITY
+            beta = guess + above if above < 1000 else INFINITY
+            score = self._negamax(game, depth, alpha, beta, 0)
+            if score <= alpha and alpha > -INFINITY:
+                below *= 4
+
+            elif score >= beta and beta < INFINITY:
+                above *= 4
+
+            else:
+                return score
+
+    def _check_limits(self) -> None:
+        """Raises _SearchAborted when a limit has been hit"""
+        limits = self._limits
+        if self.stop_event.is_set():
+            raise _SearchAborted()
+
+        if limits.nodes is not None and self.nodes >= limits.nodes:
+            raise _SearchAborted()
+
+        if limits.deadline is not None and limits.clock() >= limits.deadline:
+            raise _SearchAborted()
+
+    def _is_draw(self, game: BoardManager) -> bool:
+        """Checks the fifty move rule and repetitions since the last capture or pawn move"""
+        if game.halfmove_clock >= 100:
+            return True
+
+        key = game.zobrist_key()
+        history = game.history
+        for i in range(len(history) - 2, max(-1, len(history) - 1 - game.halfmove_clock), -2):
+            if history[i][-1] == key:
+                return True
+
+        return False
+
+    def _negamax(self, game: BoardManager, depth: int, alpha: int, beta: int, ply: int,
+                 null_allowed: bool = True) -> int:
+        """Scores a position with alpha-beta, from the side to move's point of view"""
+        self.nodes += 1
+        if self.nodes % _CHECK_EVERY == 0:
+            self._check_limits()
+
+        if ply > 0 and self._is_draw(game):
+            return 0
+
+        in_check = game.check == game.to_move
+        if in_check:
+            depth += 1
+
+        if depth <= 0:
+            return self._quiescence(game, alpha, beta, ply)
+
+        key = game.zobrist_key()
+        entry = self.tt.probe(key)
+        hash_move = None
+        if entry is not None:
+            hash_move = entry.move
+            if ply > 0 and entry.depth >= depth:
+                stored = _score_from_tt(entry.score, ply)
+                if entry.flag == EXACT:
+                    return stored
+
+                if entry.flag == LOWER and stored >= beta:
+                    return stored
+
+                if entry.flag == UPPER and stored <= alpha:
+                    return stored
+
+        # Nodes searched with a null window only have to show the score is below alpha or above beta
+        pv_node = beta - alpha > 1
+        static_score = None
+        if (self.null_move and null_allowed and not pv_node and not in_check and ply > 0
+                and depth >= NULL_MOVE_MIN_DEPTH and abs(beta) < MATE_BOUND):
+            static_score = evaluate(game, self.pawn_table)
+            if static_score >= beta and _has_pieces(game):
+                game.make_null_move()
+                score = -self._negamax(game, depth - 1 - NULL_MOVE_REDUCTION, -beta, -beta + 1, ply + 1, False)
+                game.unmake_move()
+                if score >= beta:
+                    return beta
+
+        futile = False
+        if (self.futility and not pv_node and not in_check and depth < len(FUTILITY_MARGINS)
+                and abs(alpha) < MATE_BOUND):
+            if static_score is None:
+                static_score = evaluate(game, self.pawn_table)
+
+            futile = static_score + FUTILITY_MARGINS[depth] <= alpha
+
+        original_alpha = alpha
+        best_score = -INFINITY
+        best_move = None
+        searched = 0
+        killers = self._killers[ply] if ply < len(self._killers) else ()
+        for move in game.staged_moves(hash_move, killers):
+            capture = game.is_capture(move)
+            quiet = not capture and move.promotion is None
+            if quiet and searched > 0 and (futile or self.lmr) and move not in killers:
+                # Only quiet moves that do not give check can be skipped or reduced
+                quiet = not game.gives_check(move)
+
+            else:
+                quiet = False
+
+            if futile and quiet:
+                continue
+
+            searched += 1
+            game.make_move(move)
+            if searched == 1:
+                score = -self._negamax(game, depth - 1, -beta, -alpha, ply + 1)
+
+            else:
+                score = None
+                if self.lmr and quiet and searched > LMR_FULL_DEPTH_MOVES and depth >= LMR_MIN_DEPTH:
+                    reduction = 1 if searched <= 2 * LMR_FULL_DEPTH_MOVES else 2
+                    score = -self._negamax(game, depth - 1 - reduction, -alpha - 1, -alpha, ply + 1)
+
+                # Search again without the reduction when the reduced search beat alpha
+                if score is None or score > alpha:
+                    if self.pvs:
+                        score = -self._negamax(game, depth - 1, -alpha - 1, -alpha, ply + 1)
+                        if alpha < score < beta:
+                            score = -self._negamax(game, depth - 1, -beta, -alpha, ply + 1)
+
+                    else:
+                        score = -self._negamax(game, depth - 1, -beta, -alpha, ply + 1)
+
+            game.unmake_move()
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+
+            if score > alpha:
+                alpha = score
+
+            if alpha >= beta:
+                if not capture and ply < len(self._killers) and move not in self._killers[ply]:
+                    self._killers[ply] = [move, self._killers[ply][0]]
+
+                break
+
+        if searched == 0:
+            return -MATE + ply if in_check else 0
+
+        if best_score <= original_alpha:
+            flag = UPPER
+
+        elif best_score >= beta:
+            flag = LOWER
+
+        else:
+            flag = EXACT
+
+        self.tt.store(key, depth, _score_to_tt(best_score, ply), flag, best_move)
+        return best_score
+
+    def _quiescence(self, game: BoardManager, alpha: int, beta: int, ply: int) -> int:
+        """Searches captures only until the position is quiet"""
+        self.nodes += 1
+        if self.nodes % _CHECK_EVERY == 0:
+            self._check_limits()
+
+        stand_pat = evaluate(game, self.pawn_table)
+        if stand_pat >= beta:
+            return stand_pat
+
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        # Captures that lose material by static exchange are not worth searching here
+        for move in game.staged_moves(captures_only=True, losing_captures=False):
+            game.make_move(move)
+            score = -self._quiescence(game, -beta, -alpha, ply + 1)
+            game.unmake_move()
+
+            if score >= beta:
+                return score
+
+            if score > alpha:
+                alpha = score
+
+        return alpha
@@ -0,0 +1,173 @@
+import time
+from typing import Callable, Iterable, NamedTuple
+
+from fianchetto.core.board_manager import Move
+from fianchetto.core.pgn import PgnGame
+from fianchetto.core.pieces import Color
+from .search import Searcher, SearchLimits
+
+# A score this much below the previous iteration counts as failing low
+FAIL_LOW_MARGIN = 30
+
+# Largest factor the soft limit may be stretched by
+MAX_SCALE = 3.0
+
+
+class TimeManager():
+    """Splits a game clock into a time budget for one move
+
+    The soft limit is the time after which no new iteration is started. It grows when the best move keeps
+    changing or the score drops, but never past the hard limit, at which the search is aborted.
+
+    Attributes:
+        soft_limit (float): Seconds after which no new iteration should start
+        hard_limit (float): Seconds after which the search must stop
+        scale (float): Current stretch of the soft limit
+        started (float): Value of clock when the clock started running
+        clock (Callable[[], float]): Returns the current time in seconds
+    """
+    def __init__(self, time_left: float, increment: float = 0.0, moves_to_go: int | None = None,
+                 fullmove_number: int = 1, overhead: float = 0.03, clock: Callable[[], float] = time.monotonic):
+        """Works out the limits for a move
+
+        Args:
+            time_left (float): Seconds left on the clock
+            increment (float): Seconds added after each move
+            moves_to_go (int | None): Moves until the next time control, or None for sudden death
+            fullmove_number (int): Number of the move being played, used to guess the moves still to come
+            overhead (float): Seconds kept back per move for communication lag
+            clock (Callable[[], float]): Returns the current time in seconds, a fake one makes the time used
+                independent of the machine
+        """
+        available = max(0.0, time_left - overhead)
+        if moves_to_go:
+            moves_left = min(moves_to_go, 50)
+
+        else:
+            moves_left = max(20, 45 - fullmove_number // 2)
+
+        self.soft_limit = available / moves_left + increment * 0.75
+
+        # With one move to go the whole clock is usable, otherwise leave plenty for later moves
+        ceiling = available * (0.9 if moves_left == 1 else 0.4)
+        self.hard_limit = max(0.0, min(self.soft_limit * 4, ceiling))
+        self.soft_limit = min(self.soft_limit, self.hard_limit)
+        self.scale = 1.0
+        self.clock = clock
+        self.started = clock()
+        self._last_score = None
+        self._last_move = None
+
+    def start(self) -> None:
+        """Starts the clock for this move"""
+        self.started = self.clock()
+
+    def elapsed(self) -> float:
+        """Returns the seconds used since start"""
+        return self.clock() - self.started
+
+    @property
+    def hard_deadline(self) -> float:
+        """The value of clock at which the search has to be aborted"""
+        return self.started + self.hard_limit
+
+    def iteration_finished(self, depth: int, score: int, best_move: Move | None) -> None:
+        """Adjusts the soft limit after an iteration of the search
+
+        Args:
+            depth (int): Depth of the iteration
+            score (int): Score it found
+            best_move (Move | None): Best move it found
+        """
+        if self._last_score is not None and depth >= 3:
+            if best_move != self._last_move:
+                self.scale = min(MAX_SCALE, self.scale * 1.4)
+
+            elif score <= self._last_score - FAIL_LOW_MARGIN:
+                self.scale = min(MAX_SCALE, self.scale * 1.5)
+
+            else:
+                # A stable best move lets the budget shrink back towards normal
+                self.scale = max(0.7, self.scale * 0.9)
+
+        self._last_score = score
+        self._last_move = best_move
+
+    def should_stop(self) -> bool:
+        """Returns True when no new iteration should be started"""
+        return self.elapsed() >= min(self.hard_limit, self.soft_limit * self.scale)
+
+
+class ClockReport(NamedTuple):
+    """Time used by one side in a simulated game
+
+    Attributes:
+        color (Color): The side
+        moves (int): Moves the side played
+        used (list[float]): Seconds spent on each move
+        remaining (float): Seconds left on the clock at the end
+        lowest (float): Fewest seconds left at any point
+        flagged (bool): True if the clock ran out
+    """
+    color: Color
+    moves: int
+    used: list[float]
+    remaining: float
+    lowest: float
+    flagged: bool
+
+
+def simulate_game(pgn_game: PgnGame, base: float, increment: float = 0.0, moves_to_go: int | None = None,
+                  searcher: Searcher | None = None, clock: Callable[[], float] = time.monotonic) -> list[ClockReport]:
+    """Replays a game, thinking on every move with a clock, to check how time is spent
+
+    The moves of the game are played whatever the search picks, so every run sees the same positions.
+
+    Args:
+        pgn_game (PgnGame): Game to replay
+        base (float): Starting seconds on each clock
+        increment (float): Seconds added after each move
+        moves_to_go (int | None): Moves per time control, the clock is topped up by base after that many
+        searcher (Searcher | None): Search to time, a new one is made if None
+        clock (Callable[[], float]): Clock the moves are timed with, see TimeManager
+
+    Return:
+        A report for white and one for black
+    """
+    searcher = searcher or Searcher()
+    clocks = {Color.WHITE : base, Color.BLACK : base}
+    lowest = dict(clocks)
+    used = {Color.WHITE : [], Color.BLACK : []}
+    flagged = {Color.WHITE : False, Color.BLACK : False}
+
+    for game, move in pgn_game.replay():
+        color = game.to_move
+        if flagged[color]:
+            continue
+
+        played = len(used[color])
+        to_go = None if moves_to_go is None else moves_to_go - played % moves_to_go
+        manager = TimeManager(clocks[color], increment, to_go, game.fullmove_number, clock=clock)
+        searcher.search(game, SearchLimits(time_manager=manager))
+        spent = manager.elapsed()
+
+        clocks[color] -= spent
+        used[color].append(spent)
+        lowest[color] = min(lowest[color], clocks[color])
+        if clocks[color] <= 0:
+            flagged[color] = True
+            continue
+
+        clocks[color] += increment
+        if to_go == 1:
+            clocks[color] += base
+
+    return [ClockReport(color, len(used[color]), used[color], clocks[color], lowest[color], flagged[color])
+            for color in (Color.WHITE, Color.BLACK)]
+
+
+def simulate_games(games: Iterable[PgnGame], base: float, increment: float = 0.0,
+                   moves_to_go: int | None = None) -> list[list[ClockReport]]:
+    """Runs simulate_game over many games with one shared searcher"""
+    searcher = Searcher()
+    return [simulate_game(pgn_game, base, increment, moves_to_go, searcher) for pgn_game in games]
@@ -0,0 +1,385 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Iterator, NamedTuple, TextIO
+
+from fianchetto.core.board_manager import BoardManager
+from fianchetto.core.notation import move_to_san, san_to_move
+from fianchetto.core.pgn import format_pgn, read_games
+from fianchetto.core.pieces import Color
+from .mcts import MctsSearcher, check_options, create_searcher
+from .search import Searcher, SearchLimits
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+
+class EngineConfig(NamedTuple):
+    """One side of a match
+
+    Attributes:
+        name (str): Name written into the PGN
+        options (dict | None): Keyword arguments for Searcher, or for MctsSearcher with algorithm=mcts, None
+            for the defaults
+    """
+    name: str
+    options: dict | None = None
+
+    @classmethod
+    def parse(cls, text: str) -> 'EngineConfig':
+        """Reads "name" or "name:key=value,key=value", values that look like numbers become ints or floats
+
+        Raises ValueError when an option is not one the searcher takes, see check_options.
+        """
+        name, _, rest = text.partition(":")
+        options = {}
+        for pair in filter(None, rest.split(",")):
+            key, _, value = pair.partition("=")
+            for kind in (int, float):
+                try:
+                    value = kind(value)
+                    break
+
+                except ValueError:
+                    pass
+
+            else:
+                if value.lower() in ("true", "false"):
+                    value = value.lower() == "true"
+
+            options[key.strip()] = value
+
+        check_options(options)
+        return cls(name, options)
+
+    def create(self) -> Searcher | MctsSearcher:
+        """Makes a searcher with these options"""
+        return create_searcher(self.options)
+
+
+class Opening(NamedTuple):
+    """Where a game of the match starts
+
+    Attributes:
+        fen (str): Starting position
+        moves (tuple[str, ...]): Book moves played from it in SAN before the engines take over
+    """
+    fen: str
+    moves: tuple[str, ...] = ()
+
+
+class GameRecord(NamedTuple):
+    """A finished game
+
+    Attributes:
+        index (int): Number of the game in the match
+        white (str): Name of the engine playing white
+        black (str): Name of the engine playing black
+        result (str): "1-0", "0-1" or "1/2-1/2"
+        reason (str): How the game ended
+        pgn (str): The game as PGN text
+    """
+    index: int
+    white: str
+    black: str
+    result: str
+    reason: str
+    pgn: str
+
+
+class MatchScore(NamedTuple):
+    """Wins, losses and draws of the first engine against the second"""
+    wins: int
+    losses: int
+    draws: int
+
+    @property
+    def games(self) -> int:
+        return self.wins + self.losses + self.draws
+
+
+class SprtResult(NamedTuple):
+    """State of a sequential probability ratio test
+
+    Attributes:
+        llr (float): Log likelihood ratio of elo1 against elo0
+        lower (float): The test accepts elo0 once llr falls to this
+        upper (float): The test accepts elo1 once llr reaches this
+        decision (str | None): "H0", "H1" or None while more games are needed
+    """
+    llr: float
+    lower: float
+    upper: float
+    decision: str | None
+
+
+def load_openings(path: str) -> list[Opening]:
+    """Reads an opening suite
+
+    PGN files give one opening per game, anything else is read as one FEN or EPD line per position.
+
+    Args:
+        path (str): Location of the suite
+
+    Return:
+        The openings in file order
+    """
+    if path.lower().endswith(".pgn"):
+        return [Opening(pgn_game.headers.get("FEN", START_FEN), tuple(pgn_game.moves)) for pgn_game in read_games(path)]
+
+    openings = []
+    with open(path) as stream:
+        for line in stream:
+            fields = line.split(";", 1)[0].split()
+            if len(fields) < 4:
+                continue
+
+            # EPD lines have no move counters, FEN lines do
+            if len(fields) >= 6 and fields[4].isdigit() and fields[5].isdigit():
+                openings.append(Opening(" ".join(fields[:6])))
+
+            else:
+                openings.append(Opening(" ".join(fields[:4]) + " 0 1"))
+
+    return openings
+
+
+def _insufficient_material(game: BoardManager) -> bool:
+    """Checks for positions no one can win: bare kings or a single minor piece"""
+    minors = 0
+    for column in game.board:
+        for piece in column:
+            if piece is None or piece.symbol == "K":
+                continue
+
+            if piece.symbol in ("p", "R", "Q"):
+                return False
+
+            minors += 1
+
+    return minors <= 1
+
+
+def _adjudicate(game: BoardManager, seen: dict[int, int]) -> tuple[str, str] | None:
+    """Returns (result, reason) once the game is over, or None"""
+    if not game.legal_moves():
+        if game.check == game.to_move:
+            return ("0-1" if game.to_move == Color.WHITE else "1-0"), "checkmate"
+
+        return "1/2-1/2", "stalemate"
+
+    if seen.get(game.zobrist_key(), 0) >= 3:
+        return "1/2-1/2", "threefold repetition"
+
+    if game.halfmove_clock >= 100:
+        return "1/2-1/2", "fifty move rule"
+
+    if _insufficient_material(game):
+        return "1/2-1/2", "insufficient material"
+
+    return None
+
+
+def play_game(index: int, opening: Opening, white: EngineConfig, black: EngineConfig, nodes: int | None = None,
+              movetime: float | None = None, max_plies: int = 400) -> GameRecord:
+    """Plays one engine game, run inside the worker processes
+
+    Args:
+        index (int): Number of the game in the match
+        opening (Opening): Where the game starts
+        white (EngineConfig): Engine playing white
+        black (EngineConfig): Engine playing black
+        nodes (int | None): Nodes per move
+        movetime (float | None): Seconds per move
+        max_plies (int): Engine moves after which the game is called a draw
+
+    Return:
+        The finished game
+    """
+    game = BoardManager()
+    game.load_fen(opening.fen)
+    fullmove_number = game.fullmove_number
+    black_first = game.to_move == Color.BLACK
+    sans = []
+    for san in opening.moves:
+        move = san_to_move(san, game)
+        sans.append(move_to_san(move, game))
+        game.apply_moves([move])
+
+    seen = {game.zobrist_key() : 1}
+    verdict = _adjudicate(game, seen)
+    plies = 0
+    with white.create() as white_searcher, black.create() as black_searcher:
+        searchers = {Color.WHITE : white_searcher, Color.BLACK : black_searcher}
+        while verdict is None:
+            if plies >= max_plies:
+                verdict = ("1/2-1/2", "move limit")
+                break
+
+            result = searchers[game.to_move].search(game, SearchLimits(nodes=nodes, movetime=movetime))
+            sans.append(move_to_san(result.best_move, game))
+            game.make_move(result.best_move)
+            key = game.zobrist_key()
+            seen[key] = seen.get(key, 0) + 1
+            plies += 1
+            verdict = _adjudicate(game, seen)
+
+    headers = {"Event" : "Fianchetto tournament",
+               "Round" : str(index + 1),
+               "White" : white.name,
+               "Black" : black.name,
+               "Result" : verdict[0]}
+    if opening.fen != START_FEN:
+        headers["SetUp"] = "1"
+        headers["FEN"] = opening.fen
+
+    headers["Termination"] = verdict[1]
+    pgn = format_pgn(headers, sans, verdict[0], fullmove_number, black_first)
+    return GameRecord(index, white.name, black.name, verdict[0], verdict[1], pgn)
+
+
+def _schedule(openings: list[Opening], games: int) -> Iterator[tuple[int, Opening, bool]]:
+    """Yields (index, opening, first engine plays white), every opening twice with the colors swapped"""
+    for index in range(games):
+        yield index, openings[(index // 2) % len(openings)], index % 2 == 0
+
+
+def score_of(records: list[GameRecord], name: str) -> MatchScore:
+    """Counts the wins, losses and draws of the engine with the given name"""
+    wins = losses = draws = 0
+    for record in records:
+        if record.result == "1/2-1/2":
+            draws += 1
+
+        elif (record.result == "1-0") == (record.white == name):
+            wins += 1
+
+        else:
+            losses += 1
+
+    return MatchScore(wins, losses, draws)
+
+
+def _score_and_variance(score: MatchScore) -> tuple[float, float]:
+    """Returns the mean score per game and its variance per game"""
+    n = score.games
+    mean = (score.wins + score.draws / 2) / n
+    variance = (score.wins * (1 - mean) ** 2 + score.losses * mean ** 2 + score.draws * (0.5 - mean) ** 2) / n
+    return mean, variance
+
+
+def _elo(mean: float) -> float:
+    """Converts an expected score into an Elo difference"""
+    mean = min(max(mean, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / mean - 1) + 0.0
+
+
+def elo_difference(score: MatchScore) -> tuple[float, float]:
+    """Estimates the Elo difference from a match score
+
+    Args:
+        score (MatchScore): Results of the first engine
+
+    Return:
+        (elo, margin) where margin is half the width of the 95% confidence interval
+    """
+    if score.games == 0:
+        return 0.0, math.inf
+
+    mean, variance = _score_and_variance(score)
+    deviation = math.sqrt(variance / score.games)
+    low = _elo(mean - 1.96 * deviation)
+    high = _elo(mean + 1.96 * deviation)
+    return _elo(mean), (high - low) / 2
+
+
+def sprt(score: MatchScore, elo0: float = 0.0, elo1: float = 5.0, alpha: float = 0.05,
+         beta: float = 0.05) -> SprtResult:
+    """Runs a sequential probability ratio test on a match score, using the normal approximation
+
+    Args:
+        score (MatchScore): Results of the first engine
+        elo0 (float): Elo difference of the null hypothesis
+        elo1 (float): Elo difference of the alternative hypothesis
+        alpha (float): Chance of accepting elo1 when elo0 holds
+        beta (float): Chance of accepting elo0 when elo1 holds
+
+    Return:
+        The log likelihood ratio, its bounds and the decision so far
+    """
+    lower = math.log(beta / (1 - alpha))
+    upper = math.log((1 - beta) / alpha)
+    if score.games == 0:
+        return SprtResult(0.0, lower, upper, None)
+
+    mean, variance = _score_and_variance(score)
+    if variance == 0:
+        return SprtResult(0.0, lower, upper, None)
+
+    s0 = 1 / (1 + 10 ** (-elo0 / 400))
+    s1 = 1 / (1 + 10 ** (-elo1 / 400))
+    llr = (s1 - s0) * (2 * mean - s0 - s1) * score.games / (2 * variance)
+    decision = "H1" if llr >= upper else "H0" if llr <= lower else None
+    return SprtResult(llr, lower, upper, decision)
+
+
+def run_tournament(first: EngineConfig, second: EngineConfig, openings: list[Opening], games: int,
+                   workers: int | None = None, nodes: int | None = None, movetime: float | None = None,
+                   output: TextIO | None = None, on_game: Callable[[GameRecord], None] | None = None,
+                   max_plies: int = 400) -> list[GameRecord]:
+    """Plays a match between two engines
+
+    Games are spread over a process pool and written to the PGN output as soon as each one finishes, so
+    the file can be read while the match runs.
+
+    Args:
+        first (EngineConfig): Engine whose results are reported
+        second (EngineConfig): Its opponent
+        openings (list[Opening]): Starting positions, each played twice with the colors swapped
+        games (int): Number of games
+        workers (int | None): Processes to use, None for one per CPU and 0 to play in this process
+        nodes (int | None): Nodes per move
+        movetime (float | None): Seconds per move
+        output (TextIO | None): Where finished games are written as PGN
+        on_game (Callable | None): Called with every finished game
+        max_plies (int): Engine moves after which a game is called a draw
+
+    Return:
+        The games in the order they finished
+    """
+    if first.name == second.name:
+        raise ValueError("The engines need different names")
+
+    if nodes is None and movetime is None:
+        raise ValueError("A node or time budget per move is needed")
+
+    if not openings:
+        openings = [Opening(START_FEN)]
+
+    tasks = []
+    for index, opening, first_white in _schedule(openings, games):
+        white, black = (first, second) if first_white else (second, first)
+        tasks.append((index, opening, white, black, nodes, movetime, max_plies))
+
+    records = []
+
+    def finished(record: GameRecord) -> None:
+        records.append(record)
+        if output is not None:
+            output.write(record.pgn)
+            output.flush()
+
+        if on_game is not None:
+            on_game(record)
+
+    if workers == 0:
+        for task in tasks:
+            finished(play_game(*task))
+
+        return records
+
+    with ProcessPoolExecutor(workers or os.cpu_count()) as executor:
+        futures = [executor.submit(play_game, *task) for task in tasks]
+        for future in as_completed(futures):
+            finished(future.result())
+
+    return records
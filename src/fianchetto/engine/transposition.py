@@ -0,0 +1,79 @@
+from typing import NamedTuple
+
+from fianchetto.core.board_manager import Move
+
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class TTEntry(NamedTuple):
+    """A stored search result
+
+    Attributes:
+        depth (int): Depth the position was searched to
+        score (int): Score found, see flag for how to read it
+        flag (int): EXACT, LOWER (the score is a lower bound) or UPPER (the score is an upper bound)
+        move (Move | None): Best move found, used to order moves first next time
+    """
+    depth: int
+    score: int
+    flag: int
+    move: Move | None
+
+
+class TranspositionTable():
+    """Bounded table of search results keyed by Zobrist key
+
+    When the table is full the oldest entry is dropped to make room.
+
+    Attributes:
+        capacity (int): Most entries kept at once
+        probes (int): Number of lookups made
+        hits (int): Number of lookups that found an entry
+    """
+    # Rough size of one entry including the dict slot, used to turn megabytes into a capacity
+    ENTRY_BYTES = 200
+
+    def __init__(self, megabytes: int = 16):
+        """Creates an empty table
+
+        Args:
+            megabytes (int): Approximate memory the table may use
+        """
+        self.capacity = max(1, megabytes * 1024 * 1024 // self.ENTRY_BYTES)
+        self.probes = 0
+        self.hits = 0
+        self._entries = {}
+
+    def probe(self, key: int) -> TTEntry | None:
+        """Returns the entry stored for a position or None"""
+        self.probes += 1
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+
+        return entry
+
+    def store(self, key: int, depth: int, score: int, flag: int, move: Move | None) -> None:
+        """Stores a search result, keeping a deeper result for the same position"""
+        old = self._entries.get(key)
+        if old is not None:
+            if old.depth > depth and flag != EXACT:
+                return
+
+            del self._entries[key]
+
+        elif len(self._entries) >= self.capacity:
+            del self._entries[next(iter(self._entries))]
+
+        self._entries[key] = TTEntry(depth, score, flag, move)
+
+    def clear(self) -> None:
+        """Removes every entry and resets the statistics"""
+        self._entries.clear()
+        self.probes = 0
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,259 @@
+"""Opt in call counters and timers for the hot paths of move generation and search
+
+Enabling swaps the measured methods for wrappers and disabling puts the originals back, so there is no
+cost while it is off.
+
+Queen.generate_valid_moves is built from the rook and bishop generators and King.in_check looks for
+attackers with the piece generators. The generator counters only count calls made outside another
+generator or in_check, so each move generation is counted once under the piece that asked for it and the
+time of the inner calls stays with the outer one.
+"""
+import cProfile
+import functools
+import json
+import pstats
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+from fianchetto.core.board_manager import BoardManager
+from fianchetto.core.pieces import Piece, Pawn, Rook, Bishop, Queen, Knight, King
+
+# counter name -> [calls, seconds]
+_counters = {}
+
+# (class, method name, original function) for every method currently wrapped
+_patched = []
+
+# Move generator and in_check calls currently running, the generators are not counted inside them
+_generating = [0]
+
+_TT_HITS = "TranspositionTable.hits"
+_NODES = "search.nodes"
+
+
+def _targets() -> list[tuple[type, str, bool]]:
+    """Returns (class, method name, timed) for every method that is measured"""
+    from fianchetto.engine.search import Searcher
+    from fianchetto.engine.transposition import TranspositionTable
+
+    targets = [(piece, "generate_valid_moves", True) for piece in (Pawn, Rook, Bishop, Queen, Knight, King)]
+    targets += [(Piece, "_remove_checks", True),
+                (King, "in_check", True),
+                (BoardManager, "_free_move", True),
+                (BoardManager, "move", True),
+                (BoardManager, "make_move", True),
+                (TranspositionTable, "probe", False),
+                (Searcher, "_negamax", False),
+                (Searcher, "_quiescence", False)]
+    return targets
+
+
+def _timed(name: str, function: Callable) -> Callable:
+    """Wraps a function so its calls and time are added to a counter"""
+    counter = _counters.setdefault(name, [0, 0.0])
+    generator = function.__name__ == "generate_valid_moves"
+    shields = generator or function.__name__ == "in_check"
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if generator and _generating[0]:
+            return function(*args, **kwargs)
+
+        started = time.perf_counter()
+        _generating[0] += shields
+        try:
+            return function(*args, **kwargs)
+
+        finally:
+            _generating[0] -= shields
+            counter[0] += 1
+            counter[1] += time.perf_counter() - started
+
+    return wrapper
+
+
+def _counted(name: str, function: Callable) -> Callable:
+    """Wraps a function so only its calls are counted, for recursive functions and very cheap ones"""
+    counter = _counters.setdefault(name, [0, 0.0])
+    nodes = _counters.setdefault(_NODES, [0, 0.0])
+    hits = _counters.setdefault(_TT_HITS, [0, 0.0])
+    is_node = function.__name__ in ("_negamax", "_quiescence")
+    is_probe = function.__name__ == "probe"
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        counter[0] += 1
+        if is_node:
+            nodes[0] += 1
+
+        result = function(*args, **kwargs)
+        if is_probe and result is not None:
+            hits[0] += 1
+
+        return result
+
+    return wrapper
+
+
+def is_enabled() -> bool:
+    """Returns True while the hot paths are being measured"""
+    return bool(_patched)
+
+
+def enable() -> None:
+    """Starts measuring. Counters keep their values from before, call reset to clear them"""
+    if _patched:
+        return
+
+    for cls, name, timed in _targets():
+        original = cls.__dict__[name]
+        label = f"{cls.__name__}.{name}"
+        setattr(cls, name, _timed(label, original) if timed else _counted(label, original))
+        _patched.append((cls, name, original))
+
+
+def disable() -> None:
+    """Stops measuring and restores the original methods"""
+    while _patched:
+        cls, name, original = _patched.pop()
+        setattr(cls, name, original)
+
+
+def reset() -> None:
+    """Sets every counter back to zero"""
+    for counter in _counters.values():
+        counter[0] = 0
+        counter[1] = 0.0
+
+
+@contextmanager
+def instrumented(clear: bool = True):
+    """Measures the hot paths for the length of a with block
+
+    Args:
+        clear (bool): Reset the counters before starting
+    """
+    if clear:
+        reset()
+
+    was_enabled = is_enabled()
+    enable()
+    try:
+        yield
+
+    finally:
+        if not was_enabled:
+            disable()
+
+
+def snapshot() -> dict:
+    """Returns the counters as a JSON friendly dict
+
+    Every counter has its number of calls, total seconds (including time spent in nested measured calls)
+    and calls per user move, where user moves are calls to BoardManager.move.
+    """
+    moves = _counters.get("BoardManager.move", [0, 0.0])[0]
+    counters = {}
+    for name, (calls, seconds) in sorted(_counters.items()):
+        if name in (_NODES, _TT_HITS):
+            continue
+
+        counters[name] = {"calls" : calls,
+                          "seconds" : seconds,
+                          "per_move" : calls / moves if moves else None}
+
+    probes = _counters.get("TranspositionTable.probe", [0, 0.0])[0]
+    return {"enabled" : is_enabled(),
+            "moves" : moves,
+            "counters" : counters,
+            "tt" : {"probes" : probes, "hits" : _counters.get(_TT_HITS, [0, 0.0])[0]},
+            "nodes" : _counters.get(_NODES, [0, 0.0])[0]}
+
+
+def to_json(path: str | None = None) -> str:
+    """Returns the snapshot as JSON, also writing it to a file if a path is given"""
+    text = json.dumps(snapshot(), indent=2)
+    if path is not None:
+        with open(path, "w") as stream:
+            stream.write(text)
+
+    return text
+
+
+def _label(function: tuple[str, int, str]) -> str:
+    """Formats a pstats function key as file:line(name)"""
+    filename, line, name = function
+    if filename == "~":
+        return name
+
+    return f"{filename.rsplit('/', 1)[-1]}:{line}({name})"
+
+
+def collapsed_stacks(stats: pstats.Stats, max_depth: int = 64) -> list[str]:
+    """Turns profile data into collapsed stack lines for flamegraph tools
+
+    cProfile only records caller and callee pairs, not whole stacks, so the time of a function is split
+    between its callers in proportion to the time spent under each of them.
+
+    Args:
+        stats (pstats.Stats): Loaded profile data
+        max_depth (int): Longest stack to follow
+
+    Return:
+        Lines of "outer;inner;innermost microseconds"
+    """
+    raw = stats.stats
+    callees = {}
+    for function, (_, _, _, _, callers) in raw.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((function, edge[3]))
+
+    roots = [function for function, entry in raw.items() if not entry[4]]
+    totals = {}
+
+    def walk(function, path: list[str], share: float) -> None:
+        own = raw[function][2] * share
+        stack = path + [_label(function)]
+        key = ";".join(stack)
+        if own > 0:
+            totals[key] = totals.get(key, 0.0) + own
+
+        if len(stack) >= max_depth:
+            return
+
+        for callee, edge_time in callees.get(function, []):
+            callee_total = raw[callee][3]
+            if callee_total <= 0 or _label(callee) in stack:
+                continue
+
+            # Paths worth less than a microsecond would not show on the graph, so stop expanding them
+            callee_share = share * edge_time / callee_total
+            if callee_total * callee_share >= 1e-6:
+                walk(callee, stack, callee_share)
+
+    for root in roots:
+        walk(root, [], 1.0)
+
+    return [f"{stack} {int(seconds * 1_000_000)}" for stack, seconds in totals.items() if seconds >= 1e-6]
+
+
+def profile(function: Callable, *args, output: str | None = None, **kwargs):
+    """Runs a function under cProfile
+
+    Args:
+        function (Callable): What to run, called with the remaining arguments
+        output (str | None): File to write collapsed stacks to, for flamegraph.pl or speedscope
+
+    Return:
+        (result of the function, pstats.Stats of the run)
+    """
+    profiler = cProfile.Profile()
+    result = profiler.runcall(function, *args, **kwargs)
+    stats = pstats.Stats(profiler)
+    if output is not None:
+        with open(output, "w") as stream:
+            for line in collapsed_stacks(stats):
+                stream.write(line + "\n")
+
+    return result, stats
@@ -0,0 +1 @@
+from .game_server import GameServer
\ No newline at end of file
@@ -0,0 +1,346 @@
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from fianchetto.core.board_manager import BoardManager
+from fianchetto.core.notation import move_to_uci, uci_to_move
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+
+def _status(game: BoardManager) -> str:
+    """Returns "checkmate", "stalemate" or "playing" for a position"""
+    if game.legal_moves():
+        return "playing"
+
+    return "checkmate" if game.check == game.to_move else "stalemate"
+
+
+def apply_move(fen: str, move: str) -> tuple[str, str]:
+    """Plays a move on a position, run inside the worker processes
+
+    Args:
+        fen (str): Position before the move
+        move (str): Move in UCI notation
+
+    Return:
+        (fen, status) of the position after the move
+    """
+    game = BoardManager()
+    game.load_fen(fen)
+    start, end, promotion = uci_to_move(move)
+    piece = game.board[start[0]][start[1]]
+    if promotion is None and type(piece).__name__ == "Pawn" and end[1] in (0, 7):
+        promotion = "Q"
+
+    game.move(start, end, promotion)
+    return game.to_fen(), _status(game)
+
+
+def list_legal_moves(fen: str) -> list[str]:
+    """Lists the legal moves of a position in UCI notation, run inside the worker processes"""
+    game = BoardManager()
+    game.load_fen(fen)
+    return [move_to_uci(*move) for move in game.legal_moves()]
+
+
+class GameSession():
+    """State of one hosted game
+
+    Games are kept as FEN strings so they are small and can be shipped to the worker processes.
+
+    Attributes:
+        fen (str): Current position
+        moves (list[str]): Moves played so far in UCI notation
+        status (str): "playing", "checkmate", "stalemate" or "resigned"
+        winner (str | None): "white" or "black" once the game is decided
+        last_used (float): Monotonic time of the last request for this game
+        lock (asyncio.Lock): Serializes requests for the game
+    """
+    def __init__(self, fen: str):
+        """Creates a session starting from the given position
+
+        Args:
+            fen (str): Starting position
+        """
+        self.fen = fen
+        self.moves = []
+        self.status = "playing"
+        self.winner = None
+        self.last_used = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def to_move(self) -> str:
+        """Returns "white" or "black" for the side to move"""
+        return "white" if self.fen.split()[1] == "w" else "black"
+
+    def state(self) -> dict:
+        """Returns the session as a JSON friendly dict"""
+        return {"fen" : self.fen,
+                "moves" : list(self.moves),
+                "status" : self.status,
+                "to_move" : self.to_move(),
+                "winner" : self.winner}
+
+
+class GameServer():
+    """Hosts many concurrent games over a line delimited JSON protocol
+
+    Every request is one JSON object on its own line with an "op" field and every response is one JSON
+    object with "ok" set to true or false. The ops are:
+
+        {"op": "create", "fen": optional} -> {"game": id, ...state}
+        {"op": "move", "game": id, "move": "e2e4"} -> state
+        {"op": "legal_moves", "game": id} -> {"moves": [...]}
+        {"op": "state", "game": id} -> state
+        {"op": "resign", "game": id} -> state
+
+    An "id" field in a request is echoed back in its response.
+
+    Attributes:
+        max_games (int): Most games kept at once, the least recently used one is dropped beyond that
+        idle_timeout (float): Seconds a game may sit unused before it is dropped
+        games (OrderedDict[str, GameSession]): The hosted games, least recently used first
+    """
+    def __init__(self, workers: int | None = None, max_games: int = 10000, idle_timeout: float = 600.0):
+        """Creates a server
+
+        Args:
+            workers (int | None): Size of the process pool for move generation. None uses one process per
+                CPU and 0 runs everything inside the event loop, which is only meant for testing
+            max_games (int): Most games kept at once
+            idle_timeout (float): Seconds a game may sit unused before it is dropped
+        """
+        self.max_games = max_games
+        self.idle_timeout = idle_timeout
+        self.games = OrderedDict()
+        self._ids = itertools.count(1)
+        self._executor = None if workers == 0 else ProcessPoolExecutor(workers)
+        self._server = None
+        self._reaper = None
+        self._clients = {}
+
+    async def _run(self, function, *args):
+        """Runs a function on the process pool, or directly when there is no pool"""
+        if self._executor is None:
+            return function(*args)
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    def _session(self, request: dict) -> GameSession:
+        """Looks up the game named in a request and marks it as recently used"""
+        game_id = request.get("game")
+        # Lists and objects from the JSON can not be looked up at all
+        if not isinstance(game_id, str):
+            raise ValueError("The game has to be a string")
+
+        if game_id not in self.games:
+            raise KeyError(f"Unknown game: {game_id}")
+
+        session = self.games[game_id]
+        session.last_used = time.monotonic()
+        self.games.move_to_end(game_id)
+        return session
+
+    def evict_idle(self) -> int:
+        """Drops games that have not been used for idle_timeout seconds
+
+        Return:
+            Number of games dropped
+        """
+        cutoff = time.monotonic() - self.idle_timeout
+        dropped = 0
+        while self.games:
+            game_id, session = next(iter(self.games.items()))
+            if session.last_used > cutoff:
+                break
+
+            del self.games[game_id]
+            dropped += 1
+
+        return dropped
+
+    async def handle(self, request: dict) -> dict:
+        """Answers a single request
+
+        Args:
+            request (dict): The decoded request
+
+        Return:
+            The response to send back
+        """
+        try:
+            response = await self._dispatch(request)
+            response["ok"] = True
+
+        except (KeyError, ValueError) as e:
+            response = {"ok" : False, "error" : e.args[0] if e.args else str(e)}
+
+        if "id" in request:
+            response["id"] = request["id"]
+
+        return response
+
+    async def _dispatch(self, request: dict) -> dict:
+        """Runs the op of a request, raising KeyError or ValueError for bad requests"""
+        op = request.get("op")
+        if op == "create":
+            fen = request.get("fen", START_FEN)
+            if not isinstance(fen, str):
+                raise ValueError("The fen has to be a string")
+
+            BoardManager().load_fen(fen, validate=True)
+
+            game_id = str(next(self._ids))
+            self.games[game_id] = GameSession(fen)
+            while len(self.games) > self.max_games:
+                self.games.popitem(last=False)
+
+            response = self.games[game_id].state()
+            response["game"] = game_id
+            return response
+
+        if op not in ("move", "legal_moves", "state", "resign"):
+            raise ValueError(f"Unknown op: {op}")
+
+        session = self._session(request)
+        async with session.lock:
+            if op == "state":
+                return session.state()
+
+            if op == "legal_moves":
+                if session.status != "playing":
+                    return {"moves" : []}
+
+                return {"moves" : await self._run(list_legal_moves, session.fen)}
+
+            if session.status != "playing":
+                raise ValueError("The game is over")
+
+            if op == "resign":
+                session.winner = "black" if session.to_move() == "white" else "white"
+                session.status = "resigned"
+                return session.state()
+
+            move = request.get("move")
+            if not isinstance(move, str):
+                raise ValueError("A move is needed")
+
+            mover = session.to_move()
+            session.fen, session.status = await self._run(apply_move, session.fen, move)
+            session.moves.append(move)
+            if session.status == "checkmate":
+                session.winner = mover
+
+            return session.state()
+
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serves one connection until it closes, or until it sends a line longer than the stream limit"""
+        self._clients[asyncio.current_task()] = writer
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+
+                except (asyncio.LimitOverrunError, ValueError):
+                    # The rest of the line is still unread, so the stream can not be trusted any more
+                    writer.write(json.dumps({"ok" : False, "error" : "Request line is too long"}).encode() + b"\n")
+                    await writer.drain()
+                    break
+
+                if not line:
+                    break
+
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("Requests must be JSON objects")
+
+                except ValueError as e:
+                    response = {"ok" : False, "error" : str(e)}
+
+                else:
+                    response = await self.handle(request)
+
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+
+        except ConnectionError:
+            pass
+
+        finally:
+            self._clients.pop(asyncio.current_task(), None)
+            writer.close()
+
+    async def _reap(self) -> None:
+        """Periodically drops idle games"""
+        while True:
+            await asyncio.sleep(max(1.0, self.idle_timeout / 4))
+            self.evict_idle()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765) -> int:
+        """Starts listening for connections
+
+        Args:
+            host (str): Address to bind to
+            port (int): Port to bind to, 0 picks a free one
+
+        Return:
+            The port the server is listening on
+        """
+        self._server = await asyncio.start_server(self._client, host, port)
+        self._reaper = asyncio.create_task(self._reap())
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        """Stops listening and shuts down the worker processes"""
+        if self._reaper is not None:
+            self._reaper.cancel()
+
+        if self._server is not None:
+            self._server.close()
+            # Closing the connections lets every handler see the end of its stream and return
+            for writer in list(self._clients.values()):
+                writer.close()
+
+            await asyncio.gather(*self._clients, return_exceptions=True)
+            await self._server.wait_closed()
+
+        if self._executor is not None:
+            self._executor.shutdown()
+
+
+async def serve(host: str, port: int, workers: int | None, max_games: int, idle_timeout: float) -> None:
+    """Runs a server until it is cancelled"""
+    server = GameServer(workers, max_games, idle_timeout)
+    bound = await server.start(host, port)
+    print(f"Serving games on {host}:{bound}")
+    try:
+        await asyncio.Event().wait()
+
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host many chess games over line delimited JSON")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes, defaults to one per CPU")
+    parser.add_argument("--max-games", type=int, default=10000)
+    parser.add_argument("--idle-timeout", type=float, default=600.0, help="Seconds before an unused game is dropped")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.max_games, args.idle_timeout))
+
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+
+class LoadTestReport():
+    """Results of a load test run
+
+    Attributes:
+        moves (int): Number of moves played across all clients
+        errors (int): Number of requests that came back with ok set to false
+        seconds (float): Wall clock length of the run
+        latencies (list[float]): Seconds taken by every request
+    """
+    def __init__(self, moves: int, errors: int, seconds: float, latencies: list[float]):
+        self.moves = moves
+        self.errors = errors
+        self.seconds = seconds
+        self.latencies = sorted(latencies)
+
+    def percentile(self, fraction: float) -> float:
+        """Returns the latency below which the given fraction of requests finished"""
+        if not self.latencies:
+            return 0.0
+
+        return self.latencies[min(len(self.latencies) - 1, int(fraction * len(self.latencies)))]
+
+    @property
+    def moves_per_second(self) -> float:
+        return self.moves / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (f"{self.moves} moves in {self.seconds:.2f}s ({self.moves_per_second:.1f} moves/s), "
+                f"{len(self.latencies)} requests, {self.errors} errors, "
+                f"p50 {self.percentile(0.50) * 1000:.1f}ms, p99 {self.percentile(0.99) * 1000:.1f}ms")
+
+
+async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, request: dict,
+                   latencies: list[float]) -> dict:
+    """Sends one request and waits for its response, recording how long it took"""
+    started = time.perf_counter()
+    writer.write(json.dumps(request).encode() + b"\n")
+    await writer.drain()
+    response = json.loads(await reader.readline())
+    latencies.append(time.perf_counter() - started)
+    return response
+
+
+async def _play(host: str, port: int, plies: int, rng: random.Random, latencies: list[float]) -> tuple[int, int]:
+    """Plays one game of random moves over its own connection
+
+    Return:
+        (moves played, errors seen)
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    moves = 0
+    errors = 0
+    try:
+        created = await _request(reader, writer, {"op" : "create"}, latencies)
+        game = created["game"]
+        while moves < plies:
+            legal = await _request(reader, writer, {"op" : "legal_moves", "game" : game}, latencies)
+            if not legal["ok"]:
+                errors += 1
+                break
+
+            if not legal["moves"]:
+                break
+
+            played = await _request(reader, writer, {"op" : "move", "game" : game, "move" : rng.choice(legal["moves"])}, latencies)
+            if not played["ok"]:
+                errors += 1
+                break
+
+            moves += 1
+
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+    return moves, errors
+
+
+async def run_load_test(host: str, port: int, clients: int = 100, plies: int = 40, seed: int = 0) -> LoadTestReport:
+    """Plays many random games against a running server at once
+
+    Args:
+        host (str): Address of the server
+        port (int): Port of the server
+        clients (int): Number of concurrent connections, each playing one game
+        plies (int): Most moves played per game
+        seed (int): Seed for the random move choice
+
+    Return:
+        Throughput and latency of the run
+    """
+    latencies = []
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    results = await asyncio.gather(*(_play(host, port, plies, random.Random(rng.random()), latencies)
+                                     for _ in range(clients)))
+    seconds = time.perf_counter() - started
+    return LoadTestReport(sum(moves for moves, _ in results), sum(errors for _, errors in results), seconds, latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test a running fianchetto game server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--plies", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(asyncio.run(run_load_test(args.host, args.port, args.clients, args.plies, args.seed)))
+
+
+if __name__ == "__main__":
+    main()
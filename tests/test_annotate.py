@@ -0,0 +1,158 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from fianchetto.cli.main_cli import main
+from fianchetto.core.pgn import format_pgn, parse_movetext, read_games
+from fianchetto.engine.annotate import PositionEval, annotate_pgn, game_positions, move_annotation, move_loss
+
+ARCHIVE = """[Event "Blunder"]
+[White "A"]
+[Black "B"]
+[Result "1-0"]
+
+1. e4 e5 2. Qh5 Nc6 3. Bc4 Nf6 4. Qxf7# 1-0
+
+[Event "Queen's Gambit"]
+[White "C"]
+[Black "D"]
+[Result "*"]
+
+1. d4 d5 2. c4 *
+
+[Event "From a position"]
+[White "E"]
+[Black "F"]
+[Result "*"]
+[SetUp "1"]
+[FEN "4k3/8/8/3q4/8/8/8/3RK3 b - - 0 30"]
+
+30... Ke7 31. Rxd5 *
+"""
+
+
+class Interrupted(Exception):
+    pass
+
+
+class TestAnnotate(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.input = os.path.join(self.directory.name, "games.pgn")
+        self.output = os.path.join(self.directory.name, "annotated.pgn")
+        self.checkpoint = os.path.join(self.directory.name, "annotated.pgn.checkpoint")
+        with open(self.input, "w") as stream:
+            stream.write(ARCHIVE)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read_output(self) -> str:
+        with open(self.output) as stream:
+            return stream.read()
+
+    def test_format_with_annotations(self):
+        text = format_pgn({"Result" : "*"}, ["e4", "e5", "Nf3"], "*", annotations=["{[%eval 0.30]}", "", "$2"])
+        self.assertIn("1. e4 {[%eval 0.30]} 1... e5 2. Nf3 $2 *", text)
+        self.assertEqual(parse_movetext(text.split("\n\n")[1]), (["e4", "e5", "Nf3"], "*"))
+
+    def test_move_loss(self):
+        even = PositionEval(0, None, "e4")
+        self.assertEqual(move_loss(even, PositionEval(-250, None, "e5"), True), 250)
+        self.assertEqual(move_loss(even, PositionEval(-250, None, "e5"), False), 0)
+        # Mates are capped, so a won position staying won is not a loss
+        self.assertEqual(move_loss(PositionEval(99_990, 5, "Qh5"), PositionEval(900, None, "Kg1"), True), 100)
+        self.assertEqual(move_loss(PositionEval(1500, None, "Qh5"), PositionEval(1200, None, "Kg1"), True), 0)
+
+    def test_move_annotation(self):
+        before = PositionEval(0, None, "g6")
+        self.assertEqual(move_annotation("Nf6", before, PositionEval(99_999, 1, "Qxf7#"), False),
+                         "$4 {[%eval #1] Best: g6}")
+        self.assertEqual(move_annotation("Nf6", before, PositionEval(-20, None, "Nc3"), False), "{[%eval -0.20]}")
+        self.assertEqual(move_annotation("a6", before, PositionEval(120, None, "Nc3"), False),
+                         "$2 {[%eval 1.20] Best: g6}")
+        self.assertEqual(move_annotation("Qxf7#", before, PositionEval(100_000, 0, None), True), "")
+
+    def test_game_positions(self):
+        games = list(read_games(self.input))
+        self.assertEqual(len(game_positions(games[0])), 8)
+        self.assertEqual(game_positions(games[2])[0], "4k3/8/8/3q4/8/8/8/3RK3 b - - 0 30")
+        games[1].moves.append("Qxh7")
+        self.assertEqual(len(game_positions(games[1])), 4)
+
+    def test_annotate(self):
+        self.assertEqual(annotate_pgn(self.input, self.output, self.checkpoint, workers=0, depth=2), 3)
+        text = self.read_output()
+        games = list(read_games(self.output))
+        self.assertEqual([game.moves for game in games], [game.moves for game in read_games(self.input)])
+        self.assertEqual(games[2].headers["FEN"], "4k3/8/8/3q4/8/8/8/3RK3 b - - 0 30")
+        self.assertIn("3... Nf6 $4 {[%eval #1] Best:", text)
+        self.assertIn("30... Ke7", text)
+        self.assertEqual(text.count("[%eval"), 11)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_resume(self):
+        expected_games = annotate_pgn(self.input, self.output, workers=0, depth=2)
+        expected = self.read_output()
+
+        def kill(written, pgn_game):
+            if written == 2:
+                raise Interrupted()
+
+        with self.assertRaises(Interrupted):
+            annotate_pgn(self.input, self.output, self.checkpoint, workers=0, depth=2, on_game=kill)
+
+        self.assertTrue(os.path.exists(self.checkpoint))
+        # Half written text after the last checkpoint is thrown away
+        with open(self.output, "a") as stream:
+            stream.write("[Event")
+
+        seen = []
+        games = annotate_pgn(self.input, self.output, self.checkpoint, workers=0, depth=2,
+                             on_game=lambda written, pgn_game: seen.append(pgn_game.headers["Event"]))
+        self.assertEqual(games, expected_games)
+        self.assertEqual(seen, ["From a position"])
+        self.assertEqual(self.read_output(), expected)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_resume_needs_same_settings(self):
+        def kill(written, pgn_game):
+            raise Interrupted()
+
+        with self.assertRaises(Interrupted):
+            annotate_pgn(self.input, self.output, self.checkpoint, workers=0, depth=1, on_game=kill)
+
+        for settings in ({"depth" : 2}, {"depth" : 1, "nodes" : 500}, {"depth" : 1, "options" : {"null_move" : False}}):
+            with self.assertRaises(ValueError) as error:
+                annotate_pgn(self.input, self.output, self.checkpoint, workers=0, **settings)
+
+            self.assertIn("other settings", str(error.exception))
+
+        self.assertEqual(annotate_pgn(self.input, self.output, self.checkpoint, workers=0, depth=1), 3)
+
+    def test_worker_pool(self):
+        annotate_pgn(self.input, self.output, workers=0, depth=2)
+        expected = self.read_output()
+        order = []
+        annotate_pgn(self.input, self.output, workers=2, queue_size=2, depth=2,
+                     on_game=lambda written, pgn_game: order.append(written))
+        self.assertEqual(self.read_output(), expected)
+        self.assertEqual(order, [1, 2, 3])
+
+    def test_needs_limit(self):
+        with self.assertRaises(ValueError):
+            annotate_pgn(self.input, self.output, workers=0)
+
+    def test_cli(self):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            code = main(["annotate", self.input, self.output, "--workers", "0", "--depth", "1"])
+
+        self.assertEqual(code, 0)
+        self.assertIn("Annotated 3 games", out.getvalue())
+        self.assertEqual(len(list(read_games(self.output))), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
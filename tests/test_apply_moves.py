@@ -0,0 +1,51 @@
+import unittest
+from fianchetto import BoardManager, IllegalMoveError, Move
+
+START = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+RUY_LOPEZ = [((4, 1), (4, 3)), ((4, 6), (4, 4)), ((6, 0), (5, 2)), ((1, 7), (2, 5)), ((5, 0), (1, 4)),
+             ((0, 6), (0, 5)), ((4, 0), (6, 0))]
+
+class TestApplyMoves(unittest.TestCase):
+    def load(self, fen=START):
+        game = BoardManager()
+        game.load_fen(fen)
+        return game
+
+    def test_validated_and_trusted_agree(self):
+        validated = self.load()
+        trusted = self.load()
+        self.assertEqual(validated.apply_moves(RUY_LOPEZ), 7)
+        self.assertEqual(trusted.apply_moves(RUY_LOPEZ, validate=False), 7)
+        self.assertEqual(validated.to_fen(), trusted.to_fen())
+        self.assertEqual(validated.to_fen(), "r1bqkbnr/1ppp1ppp/p1n5/1B2p3/4P3/5N2/PPPP1PPP/RNBQ1RK1 b kq - 1 4")
+
+    def test_reports_first_illegal_ply(self):
+        game = self.load()
+        moves = RUY_LOPEZ[:4] + [((5, 0), (5, 2))] + RUY_LOPEZ[5:]
+        with self.assertRaises(IllegalMoveError) as caught:
+            game.apply_moves(moves)
+
+        self.assertEqual(caught.exception.ply, 4)
+        self.assertEqual(caught.exception.move, Move((5, 0), (5, 2)))
+        self.assertEqual(len(game.history), 4)
+
+    def test_wrong_color_and_empty_square(self):
+        for move in (((4, 6), (4, 4)), ((4, 3), (4, 4))):
+            with self.assertRaises(IllegalMoveError):
+                self.load().apply_moves([move])
+
+    def test_promotion(self):
+        game = self.load("4k3/1P6/8/8/8/8/8/4K3 w - - 0 1")
+        game.apply_moves([Move((1, 6), (1, 7))])
+        self.assertEqual(game.board[1][7].symbol, 'Q')
+
+        game = self.load("4k3/1P6/8/8/8/8/8/4K3 w - - 0 1")
+        game.apply_moves([((1, 6), (1, 7), "N")])
+        self.assertEqual(game.board[1][7].symbol, 'N')
+
+        with self.assertRaises(IllegalMoveError):
+            self.load().apply_moves([((4, 1), (4, 3), "Q")])
+
+
+if __name__ == '__main__':
+    unittest.main()
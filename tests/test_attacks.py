@@ -0,0 +1,72 @@
+import random
+import unittest
+from fianchetto import BoardManager, Move
+from fianchetto.core.attacks import AttackMap, is_attacked
+from fianchetto.core.pieces import Color
+from fianchetto.engine import Searcher, SearchLimits
+
+FENS = ["rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        "r3k2r/1P6/8/3pP3/8/8/8/R3K2R w KQkq d6 0 1"]
+
+class TestAttackMaps(unittest.TestCase):
+    def assertMatchesRebuild(self, game):
+        fresh = AttackMap(game.board)
+        self.assertEqual(game.attacks.counts, fresh.counts)
+        self.assertEqual(game.attacks.covered, fresh.covered)
+
+    def test_counts(self):
+        game = BoardManager(attack_maps=True)
+        game.load_fen(FENS[0])
+        # e3 is covered by the d and f pawns, f3 by the e and g pawns and the g1 knight
+        self.assertEqual(game.attacks.count((4, 2), Color.WHITE), 2)
+        self.assertEqual(game.attacks.count((5, 2), Color.WHITE), 3)
+        self.assertEqual(game.attacks.count((4, 3), Color.WHITE), 0)
+        self.assertEqual(game.attacks.mobility(Color.WHITE), 22)
+
+    def test_incremental_matches_rebuild(self):
+        rng = random.Random(7)
+        for fen in FENS:
+            game = BoardManager(attack_maps=True)
+            game.load_fen(fen)
+            played = 0
+            for _ in range(40):
+                moves = game.legal_moves()
+                if not moves:
+                    break
+
+                game.make_move(rng.choice(moves))
+                played += 1
+                self.assertMatchesRebuild(game)
+
+            for _ in range(played):
+                game.unmake_move()
+                self.assertMatchesRebuild(game)
+
+    def test_lookup_matches_scan(self):
+        game = BoardManager(attack_maps=True)
+        game.load_fen(FENS[1])
+        for x in range(8):
+            for y in range(8):
+                for color in (Color.WHITE, Color.BLACK):
+                    self.assertEqual(game.is_square_attacked((x, y), color), is_attacked(game.board, (x, y), color))
+
+    def test_castling_through_attack(self):
+        for attack_maps in (False, True):
+            game = BoardManager(attack_maps=attack_maps)
+            game.load_fen("4k3/8/8/8/8/8/5r2/R3K2R w KQ - 0 1")
+            self.assertNotIn((6, 0), game.board[4][0].generate_valid_moves((4, 0), game))
+            self.assertIn((2, 0), game.board[4][0].generate_valid_moves((4, 0), game))
+
+    def test_free_move_updates(self):
+        game = BoardManager(attack_maps=True)
+        game.load_fen(FENS[0])
+        game._free_move((3, 0), (3, 4))
+        self.assertMatchesRebuild(game)
+
+    def test_search_with_attack_maps(self):
+        game = BoardManager(attack_maps=True)
+        game.load_fen("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+        result = Searcher().search(game, SearchLimits(depth=2))
+        self.assertEqual(result.best_move, Move((0, 0), (0, 7)))
+        self.assertMatchesRebuild(game)
@@ -0,0 +1,106 @@
+import os
+import random
+import tempfile
+import unittest
+from fianchetto import BoardManager
+from fianchetto.data import DatasetReader, DatasetWriter
+
+try:
+    import numpy
+    from fianchetto.data.batch import BoardBatch, board_results, popcount, slide, step, table_popcount, verify
+except ImportError:
+    numpy = None
+
+POSITIONS = ["rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+             "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+             "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+             "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+             "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+             "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3",
+             "r3k2r/8/8/8/8/8/5r2/R3K2R w KQ - 0 1",
+             "4k3/8/8/8/1b6/5n2/8/4K3 w - - 0 1"]
+
+
+def load(fen: str) -> BoardManager:
+    game = BoardManager()
+    game.load_fen(fen)
+    return game
+
+
+def random_boards(count: int, seed: int) -> list[BoardManager]:
+    """Boards reached by random games from the start position"""
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(count):
+        game = BoardManager()
+        game.generate_starting_position()
+        for _ in range(rng.randrange(100)):
+            moves = game.legal_moves()
+            if not moves:
+                break
+
+            game.make_move(rng.choice(moves))
+
+        boards.append(load(game.to_fen()))
+
+    return boards
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestBitboards(unittest.TestCase):
+    def test_steps_do_not_wrap(self):
+        h1 = numpy.array([1 << (7 * 8)], dtype=numpy.uint64)
+        a8 = numpy.array([1 << 7], dtype=numpy.uint64)
+        self.assertEqual(int(step(h1, 1, 0)[0]), 0)
+        self.assertEqual(int(step(a8, 0, 1)[0]), 0)
+        self.assertEqual(int(step(a8, 1, -2)[0]), 1 << (1 * 8 + 5))
+
+        # Rook on a1 with a blocker on a4: the ray stops on the blocker
+        rook = numpy.array([1], dtype=numpy.uint64)
+        empty = ~numpy.array([1 | 1 << 3], dtype=numpy.uint64)
+        self.assertEqual(int(slide(rook, empty, 0, 1)[0]), 0b1110)
+
+    def test_popcount_without_bitwise_count(self):
+        masks = numpy.array([0, 1, 0xFFFF_FFFF_FFFF_FFFF, 0x8000_0000_0000_0001, 0x0F0F], dtype=numpy.uint64)
+        self.assertEqual(list(table_popcount(masks)), [0, 1, 64, 2, 8])
+        self.assertEqual(list(table_popcount(masks[::2])), list(popcount(masks[::2])))
+
+    def test_known_positions(self):
+        batch = BoardBatch.from_fens(POSITIONS)
+        self.assertEqual(list(batch.pseudo_legal_counts()[:2]), [20, 48])
+        self.assertEqual([bool(flag) for flag in batch.in_check()], [False] * 3 + [True] + [False] * 3 + [True])
+        self.assertEqual(list(batch.en_passant), [-1] * 5 + [5, -1, -1])
+
+    def test_matches_board_manager(self):
+        boards = [load(fen) for fen in POSITIONS] + random_boards(40, 5)
+        self.assertEqual(verify(boards), [])
+
+    def test_black_to_move(self):
+        flipped = [load(fen.replace(" w ", " b ")) for fen in POSITIONS[:5]]
+        self.assertEqual(verify(flipped), [])
+        batch = BoardBatch.from_boards(flipped)
+        self.assertEqual(int(batch.pseudo_legal_counts()[0]), 20)
+        self.assertEqual(board_results(flipped[0])[3], 20)
+
+    def test_from_records(self):
+        boards = [load(fen) for fen in POSITIONS] + random_boards(10, 8)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "positions.fpds")
+            with DatasetWriter(path) as writer:
+                for game in boards:
+                    writer.append(game)
+
+            with DatasetReader(path) as reader:
+                records = reader.to_numpy()
+                batch = BoardBatch.from_records(records)
+                del records
+
+        expected = BoardBatch.from_boards(boards)
+        self.assertTrue((batch.pieces == expected.pieces).all())
+        self.assertTrue((batch.white_to_move == expected.white_to_move).all())
+        self.assertTrue((batch.castling == expected.castling).all())
+        self.assertTrue((batch.en_passant == expected.en_passant).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
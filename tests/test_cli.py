@@ -0,0 +1,63 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+from fianchetto.cli.main_cli import main, run_script
+
+class TestScriptedCli(unittest.TestCase):
+    def run_moves(self, text, **kwargs):
+        output = io.StringIO()
+        errors = io.StringIO()
+        code = run_script(io.StringIO(text), output=output, errors=errors, **kwargs)
+        return code, output.getvalue(), errors.getvalue()
+
+    def test_mixed_notations(self):
+        code, output, errors = self.run_moves("e2, e4\ne7e5  # the reply\nNf3 Nc6\n")
+        self.assertEqual(code, 0)
+        self.assertEqual(errors, "")
+        self.assertEqual(output, "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3\n")
+
+    def test_illegal_move(self):
+        code, output, errors = self.run_moves("e2e4 e7e5 e1e3")
+        self.assertEqual(code, 1)
+        self.assertEqual(output, "")
+        self.assertEqual(errors, "Move 3 (e1e3): Not a legal move\n")
+
+    def test_unreadable_move(self):
+        code, _, errors = self.run_moves("e2e4 Zz9")
+        self.assertEqual(code, 1)
+        self.assertTrue(errors.startswith("Move 2 (Zz9)"))
+
+    def test_render_writes_one_frame_per_position(self):
+        code, output, _ = self.run_moves("e2e4 e7e5", render=True)
+        self.assertEqual(code, 0)
+        self.assertEqual(output.count("White to move"), 2)
+        self.assertEqual(output.count("Black to move"), 1)
+
+    def test_promotion_from_fen(self):
+        code, output, _ = self.run_moves("b7b8n", fen="4k3/1P6/8/8/8/8/8/4K3 w - - 0 1")
+        self.assertEqual(code, 0)
+        self.assertTrue(output.startswith("1N2k3/"))
+
+    def test_moves_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "game.txt")
+            with open(path, "w") as stream:
+                stream.write("d2d4\nd7d5\n")
+
+            output = io.StringIO()
+            with redirect_stdout(output):
+                self.assertEqual(main(["--moves-file", path]), 0)
+
+        self.assertTrue(output.getvalue().startswith("rnbqkbnr/ppp1pppp/8/3p4/3P4/"))
+
+    @patch('builtins.input', side_effect=["y", "e2, e4", "reset", "n"])
+    def test_reset_returns_to_menu(self, mock_input):
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(main([]), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
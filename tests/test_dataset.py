@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+from fianchetto import BoardManager
+from fianchetto.data import DatasetReader, DatasetWriter, build_index
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+PGN = """[Event "Test"]
+[Result "0-1"]
+
+1. f3 e5 2. g4 Qh4# 0-1
+"""
+
+FENS = """# two positions
+rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1
+8/8/8/4k3/8/8/3P4/4K3 b - - 3 40
+"""
+
+class TestDataset(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "positions.fpds")
+        fen_path = os.path.join(self.directory.name, "positions.fen")
+        pgn_path = os.path.join(self.directory.name, "games.pgn")
+        with open(fen_path, "w") as stream:
+            stream.write(FENS)
+
+        with open(pgn_path, "w") as stream:
+            stream.write(PGN)
+
+        with DatasetWriter(self.path) as writer:
+            self.assertEqual(writer.add_fen_file(fen_path), 2)
+            self.assertEqual(writer.add_pgn_file(pgn_path), 4)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_random_access(self):
+        with DatasetReader(self.path) as reader:
+            self.assertEqual(len(reader), 6)
+            self.assertEqual(reader[1].fen(), "8/8/8/4k3/8/8/3P4/4K3 b - - 3 1")
+            self.assertEqual(reader[-1].decoded_move(), ((3, 7), (7, 3), None))
+            self.assertEqual(reader[-1].result, -1)
+            self.assertEqual([record.key for record in reader[2:4]], [reader[2].key, reader[3].key])
+
+    def test_lookup(self):
+        build_index(self.path)
+
+        # Appended after the index was built, must still be found
+        game = BoardManager()
+        game.load_fen("8/8/8/4k3/8/8/3P4/4K3 b - - 0 1")
+        with DatasetWriter(self.path) as writer:
+            writer.append(game, eval=-35)
+
+        with DatasetReader(self.path) as reader:
+            start = BoardManager()
+            start.generate_starting_position()
+            self.assertEqual(reader.lookup(start.zobrist_key()), [0, 2])
+            self.assertEqual(reader.lookup_fen("8/8/8/4k3/8/8/3P4/4K3 b - - 0 1"), [1, 6])
+            self.assertEqual(reader[6].eval, -35)
+            self.assertEqual(reader.lookup(12345), [])
+
+    def test_existing_file_is_appended(self):
+        with DatasetWriter(self.path) as writer:
+            self.assertEqual(writer.count, 6)
+
+    def test_partial_record_is_cut_off(self):
+        with open(self.path, "ab") as stream:
+            stream.write(b"\x01\x02\x03")
+
+        game = BoardManager()
+        game.load_fen("8/8/8/4k3/8/8/3P4/4K3 b - - 0 1")
+        with DatasetWriter(self.path) as writer:
+            self.assertEqual(writer.append(game, eval=12), 6)
+
+        with DatasetReader(self.path) as reader:
+            self.assertEqual(len(reader), 7)
+            self.assertEqual(reader[6].eval, 12)
+            self.assertEqual(reader[6].fen(), "8/8/8/4k3/8/8/3P4/4K3 b - - 0 1")
+
+    def test_bad_header(self):
+        for header in (b"FP", b"NOPE" + bytes(12)):
+            with open(self.path, "wb") as stream:
+                stream.write(header)
+
+            with self.assertRaises(ValueError):
+                DatasetWriter(self.path)
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_numpy_view(self):
+        with DatasetReader(self.path) as reader:
+            array = reader.to_numpy()
+            self.assertEqual(len(array), 6)
+            self.assertEqual(int(array["key"][3]), reader[3].key)
+            self.assertFalse(array.flags.owndata)
+            del array
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from fianchetto.cli.main_cli import main
+from fianchetto.engine.epd import load_epd, parse_epd, run_suite, solve, summarize
+
+SUITE = """# Shallow tactics
+r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - bm Qxf7#; id "mate.1";
+4k3/8/8/3q4/8/8/8/3RK3 w - - bm Rxd5; id "win.queen";
+6k1/8/8/8/8/8/1q6/1R4K1 b - - am Kf7; id "avoid";
+"""
+
+class TestEpd(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "suite.epd")
+        with open(self.path, "w") as stream:
+            stream.write(SUITE)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_parse(self):
+        record = parse_epd('4k3/8/8/3q4/8/8/8/3RK3 w - - bm Rxd5 Re1; id "win queen"; hmvc 3; fmvn 20;')
+        self.assertEqual(record.fen, "4k3/8/8/3q4/8/8/8/3RK3 w - - 3 20")
+        self.assertEqual(record.best_moves, ["Rxd5", "Re1"])
+        self.assertEqual(record.id, "win queen")
+        self.assertIsNone(parse_epd("# comment"))
+        self.assertEqual(len(load_epd(self.path)), 3)
+        for line in ("4K2X/8/8/8/8/8/8/4k3 w - - bm Kd7;", "4k3/8/8/8/8/8/8/4R1K1 w - - bm Kf2;"):
+            with self.assertRaises(ValueError):
+                parse_epd(line)
+
+    def test_solve(self):
+        records = load_epd(self.path)
+        result = solve(1, records[1], depth=2)
+        self.assertTrue(result.solved)
+        self.assertEqual(result.move, "Rxd5")
+        self.assertIsNotNone(result.solved_after)
+        self.assertGreater(result.nodes, 0)
+
+        # Avoid move tests are solved by any other move
+        self.assertTrue(solve(2, records[2], depth=1).solved)
+
+    def test_suite_in_pool(self):
+        records = load_epd(self.path)
+        seen = []
+        results = run_suite(records, workers=2, depth=2, on_result=seen.append)
+        self.assertEqual([result.index for result in results], [0, 1, 2])
+        self.assertEqual(len(seen), 3)
+        summary = summarize("suite", results)
+        self.assertEqual((summary.solved, summary.total), (3, 3))
+        self.assertGreater(summary.nodes_per_second, 0)
+
+        with self.assertRaises(ValueError):
+            run_suite(records)
+
+    def test_command(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            code = main(["epd", self.path, "--depth", "2", "--workers", "0"])
+
+        self.assertEqual(code, 0)
+        self.assertIn("suite.epd: solved 3/3", output.getvalue())
+
+    def test_command_bad_record(self):
+        with open(self.path, "a") as stream:
+            stream.write("4K2X/8/8/8/8/8/8/4k3 w - - bm Kd7;\n")
+
+        errors = io.StringIO()
+        with redirect_stdout(io.StringIO()), redirect_stderr(errors):
+            code = main(["epd", self.path, "--depth", "1", "--workers", "0"])
+
+        self.assertEqual(code, 1)
+        self.assertIn("Not a valid EPD record: 4K2X", errors.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
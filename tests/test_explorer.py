@@ -0,0 +1,64 @@
+import os
+import tempfile
+import time
+import unittest
+from fianchetto.core.pgn import read_games, read_games_range, split_ranges
+from fianchetto.data import OpeningExplorer, build_explorer
+
+START = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+AFTER_E4 = "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1"
+
+GAMES = [("1. e4 e5 2. Nf3 Nc6", "1-0"),
+         ("1. e4 c5 2. Nf3 d6", "0-1"),
+         ("1. d4 d5 2. c4 e6", "1/2-1/2"),
+         ("1. e4 e5 2. Bc4 Nf6", "1/2-1/2"),
+         ("1. e4 e5", "*")]
+
+class TestOpeningExplorer(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.pgn = os.path.join(self.directory.name, "games.pgn")
+        with open(self.pgn, "w") as stream:
+            for round, (moves, result) in enumerate(GAMES * 10):
+                stream.write(f'[Event "Test"]\n[Round "{round}"]\n[Result "{result}"]\n\n{moves} {result}\n\n')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_split_ranges_cover_every_game(self):
+        ranges = split_ranges(self.pgn, 7)
+        self.assertGreater(len(ranges), 1)
+        rounds = [game.headers["Round"] for start, end in ranges for game in read_games_range(self.pgn, start, end)]
+        self.assertEqual(rounds, [game.headers["Round"] for game in read_games(self.pgn)])
+
+    def test_lookup(self):
+        path = os.path.join(self.directory.name, "openings.fpoe")
+        self.assertEqual(build_explorer(self.pgn, path, workers=0), 40)
+        with OpeningExplorer(path) as explorer:
+            moves = explorer.lookup_fen(START)
+            self.assertEqual([move.move for move in moves], [((4, 1), (4, 3), None), ((3, 1), (3, 3), None)])
+            self.assertEqual((moves[0].white, moves[0].draws, moves[0].black), (10, 10, 10))
+            self.assertEqual(moves[1].score, 0.5)
+
+            replies = explorer.lookup_fen(AFTER_E4)
+            self.assertEqual(replies[0].move, ((4, 6), (4, 4), None))
+            self.assertEqual(replies[0].games, 20)
+            self.assertEqual(explorer.lookup(12345), [])
+
+            started = time.perf_counter()
+            for _ in range(100):
+                explorer.lookup_fen(AFTER_E4)
+
+            self.assertLess((time.perf_counter() - started) / 100, 0.01)
+
+    def test_parallel_build_matches(self):
+        serial = os.path.join(self.directory.name, "serial.fpoe")
+        parallel = os.path.join(self.directory.name, "parallel.fpoe")
+        build_explorer(self.pgn, serial, plies=3, workers=0)
+        build_explorer(self.pgn, parallel, plies=3, workers=2)
+        with open(serial, "rb") as first, open(parallel, "rb") as second:
+            self.assertEqual(first.read(), second.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
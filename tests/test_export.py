@@ -0,0 +1,154 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+from fianchetto import BoardManager
+from fianchetto.cli.main_cli import main
+from fianchetto.data.dataset import NO_EVAL, encode_move
+
+try:
+    import numpy
+    from fianchetto.data import export
+    from fianchetto.data.batch import BoardBatch
+except ImportError:
+    numpy = None
+
+GAMES = """[Event "Scholar"]
+[Result "1-0"]
+
+1. e4 e5 2. Qh5 Nc6 3. Bc4 Nf6 4. Qxf7# 1-0
+
+[Event "Short draw"]
+[Result "1/2-1/2"]
+
+1. d4 d5 2. c4 e6 3. Nc3 Nf6 1/2-1/2
+
+[Event "Broken"]
+[Result "0-1"]
+
+1. e4 e5 2. Ke3 Nc6 0-1
+"""
+
+OTHER = """[Event "Fool"]
+[Result "0-1"]
+
+1. f3 e5 2. g4 Qh4# 0-1
+"""
+
+
+class Interrupted(Exception):
+    pass
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.input = os.path.join(self.directory.name, "games.pgn")
+        self.other = os.path.join(self.directory.name, "other.pgn")
+        self.output = os.path.join(self.directory.name, "shards")
+        for path, text in ((self.input, GAMES), (self.other, OTHER)):
+            with open(path, "w") as stream:
+                stream.write(text)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def shards(self) -> list[str]:
+        return sorted(os.path.join(self.output, name) for name in os.listdir(self.output) if name.endswith(".npz"))
+
+    def test_shards_and_labels(self):
+        # 7 + 6 plies, the broken game stops before its illegal third move
+        self.assertEqual(export.export_training_data([self.input], self.output, workers=0, shard_size=4), 15)
+        self.assertEqual([os.path.basename(path) for path in self.shards()],
+                         [f"games-0000{i}.npz" for i in range(4)])
+        data = export.load_shards(self.shards())
+        self.assertEqual(data["pieces"].shape, (15, 12))
+        self.assertEqual(list(data["result"]), [1] * 7 + [0] * 6 + [-1] * 2)
+        self.assertTrue((data["eval"] == NO_EVAL).all())
+        self.assertEqual(int(data["move"][0]), encode_move((4, 1), (4, 3)))
+        self.assertEqual(list(data["white_to_move"][:3]), [True, False, True])
+
+        start = BoardManager()
+        start.generate_starting_position()
+        expected = BoardBatch.from_boards([start])
+        self.assertTrue((data["pieces"][0] == expected.pieces[0].reshape(12)).all())
+        self.assertEqual(int(data["castling"][0]), 15)
+
+    def test_planes(self):
+        export.export_training_data([self.other], self.output, workers=0, encoding="planes")
+        data = export.load_shards(self.shards())
+        self.assertEqual(data["pieces"].shape, (4, 12, 8, 8))
+        # White pawns on the second rank and the black king on e8 in the start position
+        self.assertEqual([int(data["pieces"][0, 0, x, 1]) for x in range(8)], [1] * 8)
+        self.assertEqual(int(data["pieces"][0, 11, 4, 7]), 1)
+        self.assertEqual(int(data["pieces"][0].sum()), 32)
+
+    def test_sampling_and_eval(self):
+        positions = export.export_training_data([self.input], self.output, workers=0, sample_rate=0.5,
+                                                skip_plies=2, depth=1)
+        data = export.load_shards(self.shards())
+        self.assertEqual(len(data["move"]), positions)
+        self.assertLess(positions, 15 - 6)
+        self.assertFalse((data["eval"] == NO_EVAL).any())
+
+    def test_resume(self):
+        export.export_training_data([self.input], self.output, workers=0, shard_size=3, sample_rate=0.7)
+        expected = export.load_shards(self.shards())
+        for path in os.listdir(self.output):
+            os.remove(os.path.join(self.output, path))
+
+        write_shard = export._write_shard
+
+        def kill_after_two(path, arrays, compress):
+            if len(self.shards()) == 2:
+                raise Interrupted()
+
+            write_shard(path, arrays, compress)
+
+        with mock.patch.object(export, "_write_shard", kill_after_two):
+            with self.assertRaises(Interrupted):
+                export.export_training_data([self.input], self.output, workers=0, shard_size=3, sample_rate=0.7)
+
+        self.assertEqual(len(self.shards()), 2)
+        positions = export.export_training_data([self.input], self.output, workers=0, shard_size=3,
+                                                sample_rate=0.7)
+        resumed = export.load_shards(self.shards())
+        self.assertEqual(positions, len(expected["move"]))
+        for key in expected:
+            self.assertTrue((resumed[key] == expected[key]).all(), key)
+
+        # A finished file is not exported again
+        self.assertEqual(export.export_pgn_file(self.input, self.output, shard_size=3, sample_rate=0.7), positions)
+
+    def test_resume_needs_same_settings(self):
+        export.export_training_data([self.input], self.output, workers=0, shard_size=3, seed=1)
+        for settings in ({"shard_size" : 4, "seed" : 1},
+                         {"shard_size" : 3},
+                         {"shard_size" : 3, "seed" : 1, "encoding" : "planes"},
+                         {"shard_size" : 3, "seed" : 1, "depth" : 1}):
+            with self.assertRaises(ValueError) as error:
+                export.export_pgn_file(self.input, self.output, **settings)
+
+            self.assertIn("other settings", str(error.exception))
+
+    def test_worker_pool(self):
+        positions = export.export_training_data([self.input, self.other], self.output, workers=2, shard_size=5)
+        self.assertEqual(positions, 19)
+        self.assertEqual(len(self.shards()), 4)
+        with self.assertRaises(ValueError):
+            export.export_training_data([self.input, self.input], self.output, workers=0)
+
+    def test_cli(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            code = main(["export", self.other, "-o", self.output, "--planes", "--compress"])
+
+        self.assertEqual(code, 0)
+        self.assertIn("Exported 4 positions", output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+from fianchetto.data import GameIndex, build_game_index
+from fianchetto.data.game_index import material_key, parse_material
+from fianchetto import BoardManager
+
+GAMES = [('[Event "Opening"]\n[Result "1-0"]\n\n1. e4 e5 2. Nf3 Nc6 1-0\n'),
+         ('[Event "Ending"]\n[FEN "8/8/4k3/8/8/3RP3/4K3/3r4 w - - 0 1"]\n[SetUp "1"]\n[Result "1/2-1/2"]\n\n'
+          '1. Rxd1 Kd5 1/2-1/2\n'),
+         ('[Event "Transposition"]\n[Result "0-1"]\n\n1. Nf3 Nc6 2. e4 e5 3. d4 0-1\n')]
+
+class TestGameIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.pgn = os.path.join(self.directory.name, "games.pgn")
+        self.path = os.path.join(self.directory.name, "games.fpgi")
+        with open(self.pgn, "w") as stream:
+            stream.write("\n".join(GAMES * 5))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_material_signature(self):
+        game = BoardManager()
+        game.load_fen("8/8/4k3/8/8/3RP3/4K3/3r4 w - - 0 1")
+        self.assertEqual(material_key(game), parse_material("KRPvKR"))
+        self.assertNotEqual(material_key(game), parse_material("KRvKRP"))
+        with self.assertRaises(ValueError):
+            parse_material("KRPKR")
+
+    def test_find(self):
+        self.assertEqual(build_game_index(self.pgn, self.path, workers=0), 15)
+        with GameIndex(self.path, self.pgn) as index:
+            found = list(index.find_fen("r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3"))
+            self.assertEqual([game.headers["Event"] for game in found], ["Opening", "Transposition"] * 5)
+
+            endings = list(index.find_material("KRPvKR"))
+            self.assertEqual(len(endings), 5)
+            self.assertEqual(endings[0].moves, ["Rxd1", "Kd5"])
+            self.assertEqual(len(index.material_offsets("KRPvK")), 5)
+            self.assertEqual(index.material_offsets("KQvK"), [])
+
+    def test_lazy(self):
+        build_game_index(self.pgn, self.path, workers=0)
+        with GameIndex(self.path, self.pgn) as index:
+            games = index.find_material("KRPvKR")
+            self.assertEqual(next(games).headers["Event"], "Ending")
+
+    def test_parallel_build_matches(self):
+        parallel = os.path.join(self.directory.name, "parallel.fpgi")
+        build_game_index(self.pgn, self.path, workers=0)
+        build_game_index(self.pgn, parallel, workers=2)
+        with open(self.path, "rb") as first, open(parallel, "rb") as second:
+            self.assertEqual(first.read(), second.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from fianchetto import BoardManager, Move
+from fianchetto.core.attacks import is_attacked
+from fianchetto.core.pieces import Color
+
+class TestGivesCheck(unittest.TestCase):
+    def load(self, fen):
+        game = BoardManager()
+        game.load_fen(fen)
+        return game
+
+    def assert_prediction(self, game, move):
+        """Plays a move after predicting it and compares with a search outwards from the king"""
+        predicted = game.gives_check(move)
+        mover = game.to_move
+        game.make_move(move)
+        king = game.black_king_pos if mover == Color.WHITE else game.white_king_pos
+        self.assertEqual(predicted, is_attacked(game.board, king, mover), (game.to_fen(), move))
+        self.assertEqual(game.check is not None, predicted, (game.to_fen(), move))
+
+    def test_matches_a_search_from_the_king(self):
+        fens = ["r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+                "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+                "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8"]
+        for fen in fens:
+            game = self.load(fen)
+            for move in game.legal_moves():
+                self.assert_prediction(game, move)
+                for reply in game.legal_moves():
+                    self.assert_prediction(game, reply)
+                    game.unmake_move()
+
+                game.unmake_move()
+
+    def test_direct_and_discovered_checks(self):
+        game = self.load("4k3/8/8/8/4N3/8/8/4R1K1 w - - 0 1")
+        # The knight uncovers the rook wherever it goes
+        for end in game.piece_moves((4, 3)):
+            self.assertTrue(game.gives_check(Move((4, 3), end)), end)
+
+        self.assertFalse(game.gives_check(Move((6, 0), (7, 1))))
+
+    def test_pawn_staying_on_the_line_does_not_discover(self):
+        game = self.load("4k3/8/8/8/8/4P3/8/4R1K1 w - - 0 1")
+        self.assertFalse(game.gives_check(Move((4, 2), (4, 3))))
+
+    def test_special_moves(self):
+        # En passant takes both pawns off the rank between the rook and the king
+        game = self.load("8/8/8/k1pP3R/8/8/8/6K1 w - c6 0 1")
+        self.assertTrue(game.gives_check(Move((3, 4), (2, 5))))
+
+        # Castling puts the rook on f1, facing the king on f8
+        game = self.load("5k2/8/8/8/8/8/8/4K2R w K - 0 1")
+        self.assertTrue(game.gives_check(Move((4, 0), (6, 0))))
+
+        # The pawn leaving e7 opens the file for a queen or rook on e8, a knight does not check from there
+        game = self.load("8/4P3/8/8/8/8/K7/4k3 w - - 0 1")
+        self.assertTrue(game.gives_check(Move((4, 6), (4, 7), "Q")))
+        self.assertTrue(game.gives_check(Move((4, 6), (4, 7), "R")))
+        self.assertFalse(game.gives_check(Move((4, 6), (4, 7), "N")))
+        self.assertEqual(len(game.history), 0)
+
+    def test_move_sets_check(self):
+        game = self.load("4k3/8/8/8/4N3/8/8/4R1K1 w - - 0 1")
+        game.move((4, 3), (2, 4))
+        self.assertEqual(game.check, Color.BLACK)
+
+
+if __name__ == '__main__':
+    unittest.main()
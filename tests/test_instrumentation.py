@@ -0,0 +1,69 @@
+import json
+import os
+import tempfile
+import unittest
+from fianchetto import BoardManager, instrumentation
+from fianchetto.core.pieces import Color, King, Queen
+from fianchetto.engine import Searcher, SearchLimits
+
+class TestInstrumentation(unittest.TestCase):
+    def tearDown(self):
+        instrumentation.disable()
+
+    def test_counts_hot_paths(self):
+        game = BoardManager()
+        game.generate_starting_position()
+        with instrumentation.instrumented():
+            game.move((4, 1), (4, 3))
+            game.move((4, 6), (4, 4))
+            Searcher().search(game, SearchLimits(depth=1))
+
+        snapshot = instrumentation.snapshot()
+        counters = snapshot["counters"]
+        self.assertEqual(snapshot["moves"], 2)
+        self.assertGreater(counters["Piece._remove_checks"]["calls"], 0)
+        self.assertGreater(counters["King.in_check"]["seconds"], 0)
+        self.assertGreater(snapshot["nodes"], 0)
+        self.assertGreater(snapshot["tt"]["probes"], 0)
+        self.assertFalse(snapshot["enabled"])
+        self.assertEqual(json.loads(instrumentation.to_json())["moves"], 2)
+
+    def test_nested_generators_count_once(self):
+        game = BoardManager()
+        game.load_fen("4k3/8/8/8/3Q4/8/8/4K3 w - - 0 1")
+        with instrumentation.instrumented():
+            Queen(Color.WHITE, True).generate_valid_moves((3, 3), game, True)
+            game.board[4][0].in_check(game)
+
+        counters = instrumentation.snapshot()["counters"]
+        self.assertEqual(counters["Queen.generate_valid_moves"]["calls"], 1)
+        self.assertEqual(counters["King.in_check"]["calls"], 1)
+        for name in ("Rook", "Bishop", "Pawn", "Knight", "King"):
+            self.assertEqual(counters[f"{name}.generate_valid_moves"]["calls"], 0, name)
+
+    def test_disable_restores_methods(self):
+        original = King.__dict__["in_check"]
+        instrumentation.enable()
+        self.assertIsNot(King.__dict__["in_check"], original)
+        instrumentation.disable()
+        self.assertIs(King.__dict__["in_check"], original)
+
+    def test_profile_writes_collapsed_stacks(self):
+        game = BoardManager()
+        game.generate_starting_position()
+        # Profile the move generation, not a lookup of moves cached by another test
+        game.move_cache = None
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "stacks.folded")
+            moves, _ = instrumentation.profile(game.legal_moves, output=path)
+            with open(path) as stream:
+                lines = stream.read().splitlines()
+
+        self.assertEqual(len(moves), 20)
+        self.assertTrue(any("generate_valid_moves" in line for line in lines))
+        self.assertTrue(any("allows" in line for line in lines))
+        self.assertTrue(all(line.rsplit(" ", 1)[1].isdigit() for line in lines))
+
+
+if __name__ == '__main__':
+    unittest.main()
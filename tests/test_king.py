@@ -13,6 +13,25 @@ class TestKing(unittest.TestCase):
         self.assertEqual(game.board[4][1].color, Color.WHITE)
         self.assertEqual(game.board[3][7].color, Color.BLACK)
 
+    def test_kings_keep_apart(self):
+        game = BoardManager(True)
+        game.board[4][3] = King(Color.WHITE, True)
+        game.board[4][5] = King(Color.BLACK, True)
+        game.white_king_pos = (4, 3)
+        game.black_king_pos = (4, 5)
+        self.assertFalse(game.board[4][3].in_check(game))
+
+        # A king standing next to the other one counts as attacked by it
+        game.board[4][4] = game.board[4][3]
+        game.board[4][3] = None
+        game.white_king_pos = (4, 4)
+        self.assertTrue(game.board[4][4].in_check(game))
+
+        game.board[4][3] = game.board[4][4]
+        game.board[4][4] = None
+        game.white_king_pos = (4, 3)
+        self.assertEqual(sorted(game.piece_moves((4, 3))), [(3, 2), (3, 3), (4, 2), (5, 2), (5, 3)])
+
 
     # Helper method for tests
     def _generate_kings(self) -> BoardManager:
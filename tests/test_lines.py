@@ -0,0 +1,97 @@
+import unittest
+from fianchetto import BoardManager, Move
+from fianchetto.core.board_manager import BETWEEN, LINE, mask_squares, square_bit, square_index
+from fianchetto.core.pieces import Color, King, Rook
+
+POSITIONS = ["r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+             "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+             "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+             "4k3/8/8/8/1b6/8/3P4/4K3 w - - 0 1",
+             "4k3/4r3/8/8/1b6/8/3N4/4K3 w - - 0 1",
+             "4k3/8/8/8/8/5n2/8/r3K3 w - - 0 1"]
+
+
+def sq(name: str) -> int:
+    return square_index(("abcdefgh".index(name[0]), int(name[1]) - 1))
+
+
+def reference_moves(game: BoardManager) -> set[Move]:
+    """Legal moves worked out by playing every candidate on the board"""
+    moves = set()
+    for x in range(8):
+        for y in range(8):
+            piece = game.board[x][y]
+            if piece is not None and piece.color == game.to_move:
+                for end in piece.generate_valid_moves((x, y), game):
+                    moves.add(Move((x, y), end, "Q" if piece.symbol == "p" and end[1] in (0, 7) else None))
+
+    return moves
+
+
+class TestLines(unittest.TestCase):
+    def test_between(self):
+        self.assertEqual(mask_squares(BETWEEN[sq("a1")][sq("a4")]), [(0, 1), (0, 2)])
+        self.assertEqual(mask_squares(BETWEEN[sq("h8")][sq("c3")]), [(3, 3), (4, 4), (5, 5), (6, 6)])
+        self.assertEqual(BETWEEN[sq("e1")][sq("e2")], 0)
+        self.assertEqual(BETWEEN[sq("b1")][sq("c3")], 0)
+        for a in range(64):
+            for b in range(64):
+                self.assertEqual(BETWEEN[a][b], BETWEEN[b][a])
+                self.assertFalse(BETWEEN[a][b] & (1 << a | 1 << b))
+
+    def test_line(self):
+        self.assertEqual(len(mask_squares(LINE[sq("a1")][sq("c3")])), 8)
+        self.assertEqual(LINE[sq("a1")][sq("c3")], LINE[sq("h8")][sq("b2")])
+        self.assertTrue(LINE[sq("d1")][sq("d5")] & square_bit((3, 7)))
+        self.assertEqual(LINE[sq("b1")][sq("c3")], 0)
+        self.assertEqual(LINE[sq("e4")][sq("e4")], 0)
+
+    def test_pins_and_evasions(self):
+        game = BoardManager()
+        game.load_fen("4k3/8/8/8/1b6/8/3N4/4K3 w - - 0 1")
+        pins = game.pin_info()
+        self.assertEqual(set(pins.pinned), {(3, 1)})
+        self.assertIsNone(pins.evasions)
+        self.assertFalse(pins.allows((3, 1), (5, 2)))
+
+        game.load_fen("4k3/8/8/8/1b6/8/8/4K2R w - - 0 1")
+        pins = game.pin_info()
+        self.assertEqual(pins.checkers, [(1, 3)])
+        self.assertEqual(mask_squares(pins.evasions), [(1, 3), (2, 2), (3, 1)])
+        self.assertFalse(pins.allows((7, 0), (7, 1)))
+
+        game.load_fen("4k3/8/8/8/1b6/5n2/8/4K3 w - - 0 1")
+        self.assertEqual(game.pin_info().evasions, 0)
+
+    def test_legal_moves_match_reference(self):
+        for fen in POSITIONS:
+            game = BoardManager()
+            game.load_fen(fen)
+            game.move_cache = None
+            legal = {move for move in game.legal_moves() if move.promotion in (None, "Q")}
+            self.assertEqual(legal, reference_moves(game), fen)
+
+    def test_debug_board(self):
+        game = BoardManager(debug=True)
+        game.board[4][0] = King(Color.WHITE)
+        game.board[4][7] = Rook(Color.BLACK)
+        game.board[4][3] = Rook(Color.WHITE)
+        game.white_king_pos = (4, 0)
+        game.black_king_pos = None
+        self.assertEqual(sorted(move.end for move in game.legal_moves() if move.start == (4, 3)),
+                         [(4, 1), (4, 2), (4, 4), (4, 5), (4, 6), (4, 7)])
+
+    def test_castling_paths(self):
+        game = BoardManager()
+        game.load_fen("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+        self.assertEqual(sorted(game.board[4][0].castling(game)), [(2, 0), (6, 0)])
+        game.load_fen("r3k2r/8/8/8/8/8/8/RN2K1NR w KQkq - 0 1")
+        self.assertEqual(game.board[4][0].castling(game), [])
+        game.load_fen("r3k2r/8/8/8/8/8/5r2/R3K2R w KQ - 0 1")
+        self.assertEqual(game.board[4][0].castling(game), [(2, 0)])
+        game.load_fen("r3k2r/8/8/8/8/8/4r3/R3K2R w KQ - 0 1")
+        self.assertEqual(game.board[4][0].castling(game), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
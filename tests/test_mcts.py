@@ -0,0 +1,131 @@
+import random
+import unittest
+from unittest import mock
+from fianchetto import BoardManager, Move
+from fianchetto.engine import MctsSearcher, Searcher, SearchLimits, create_searcher
+from fianchetto.engine.mcts import (PLAYOUTS_PER_DEPTH, capture_policy, leaves_king_safe, playout,
+                                    probability_score, pseudo_legal_moves, win_probability)
+from fianchetto.engine.annotate import evaluate_position
+from fianchetto.engine.epd import parse_epd, solve
+from fianchetto.engine.tournament import EngineConfig
+
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+BACK_RANK = "6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1"
+
+
+def load(fen: str) -> BoardManager:
+    game = BoardManager()
+    game.load_fen(fen)
+    return game
+
+
+class TestMcts(unittest.TestCase):
+    def test_fast_legality_matches_legal_moves(self):
+        for fen in (KIWIPETE, "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+                    "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3",
+                    "4k3/8/8/8/1b6/8/3P4/4K3 w - - 0 1"):
+            game = load(fen)
+            fast = {move for move in pseudo_legal_moves(game) if leaves_king_safe(game, move)}
+            legal = {tuple(move) for move in game.legal_moves() if move.promotion in (None, "Q")}
+            self.assertEqual(fast, legal, fen)
+
+    def test_playout_restores_board(self):
+        game = load(KIWIPETE)
+        rng = random.Random(3)
+        for policy in (None, capture_policy):
+            result = playout(game, rng) if policy is None else playout(game, rng, policy)
+            self.assertGreaterEqual(result, 0.0)
+            self.assertLessEqual(result, 1.0)
+            self.assertEqual(game.to_fen(), KIWIPETE)
+            self.assertEqual(game.history, [])
+
+    def test_playout_results(self):
+        rng = random.Random(0)
+        # Black to move is checkmated, stalemated, or left with bare kings
+        self.assertEqual(playout(load("R5k1/5ppp/8/8/8/8/8/6K1 b - - 0 1"), rng), 0.0)
+        self.assertEqual(playout(load("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1"), rng), 0.5)
+        self.assertEqual(playout(load("7k/8/6K1/8/8/8/8/8 b - - 0 1"), rng), 0.5)
+
+    def test_win_probability(self):
+        self.assertAlmostEqual(win_probability(0), 0.5)
+        self.assertEqual(probability_score(win_probability(200)), 200)
+        self.assertGreater(probability_score(1.0), 1000)
+
+    def test_finds_mate(self):
+        game = load(BACK_RANK)
+        result = MctsSearcher(seed=1).search(game, SearchLimits(nodes=300))
+        self.assertEqual(result.best_move, Move((3, 0), (3, 7)))
+        self.assertEqual(result.nodes, 300)
+        self.assertGreater(result.score, 300)
+        self.assertEqual(game.to_fen(), BACK_RANK)
+
+    def test_no_moves(self):
+        result = MctsSearcher().search(load("R5k1/5ppp/8/8/8/8/8/6K1 b - - 0 1"), SearchLimits(nodes=10))
+        self.assertIsNone(result.best_move)
+
+    def test_depth_limit(self):
+        result = create_searcher({"algorithm" : "mcts"}).search(load(BACK_RANK), SearchLimits(depth=2))
+        self.assertEqual(result.nodes, 2 * PLAYOUTS_PER_DEPTH)
+        self.assertEqual(result.best_move, Move((3, 0), (3, 7)))
+
+    def test_tree_reuse(self):
+        game = load(KIWIPETE)
+        searcher = MctsSearcher(seed=2)
+        first = searcher.search(game, SearchLimits(nodes=60))
+        game.make_move(first.best_move)
+        reply = searcher.root.best_child().best_child()
+        kept = 0 if reply is None else reply.visits
+        game.make_move(game.legal_moves()[0] if reply is None else reply.move)
+        searcher.search(game, SearchLimits(nodes=20))
+        self.assertEqual(searcher.root.visits, kept + 20)
+
+        fresh = MctsSearcher(seed=2, reuse=False)
+        fresh.search(game, SearchLimits(nodes=20))
+        self.assertEqual(fresh.root.visits, 20)
+
+    def test_info(self):
+        reports = []
+        searcher = MctsSearcher(seed=0)
+        searcher.search(load(BACK_RANK), SearchLimits(nodes=300), reports.append)
+        self.assertEqual(reports[-1].nodes, 300)
+        self.assertEqual(reports[-1].pv[0], Move((3, 0), (3, 7)))
+        self.assertGreater(searcher.playouts_per_second, 0)
+
+    def test_root_parallel(self):
+        searcher = MctsSearcher(workers=2, seed=0)
+        try:
+            result = searcher.search(load(BACK_RANK), SearchLimits(nodes=300))
+
+        finally:
+            searcher.close()
+
+        self.assertEqual(result.best_move, Move((3, 0), (3, 7)))
+        self.assertEqual(result.nodes, 300)
+
+    def test_callers_close_worker_pools(self):
+        options = {"algorithm" : "mcts", "workers" : 2, "seed" : 0}
+        record = parse_epd(f"{BACK_RANK.rsplit(' ', 2)[0]} bm Rd8#;")
+        with mock.patch.object(MctsSearcher, "close", autospec=True, side_effect=MctsSearcher.close) as close:
+            self.assertTrue(solve(0, record, nodes=200, options=options).solved)
+            self.assertEqual(evaluate_position(BACK_RANK, nodes=200, options=options).best, "Rd8#")
+
+        self.assertEqual(close.call_count, 2)
+        for call in close.call_args_list:
+            self.assertIsNone(call.args[0]._executor)
+
+        with Searcher() as searcher:
+            self.assertIsNotNone(searcher.search(load(BACK_RANK), SearchLimits(depth=1)).best_move)
+
+    def test_create_searcher(self):
+        self.assertIsInstance(create_searcher(), Searcher)
+        self.assertIsInstance(create_searcher({"algorithm" : "mcts", "rollout" : "captures"}), MctsSearcher)
+        self.assertIsInstance(EngineConfig.parse("mcts:algorithm=mcts,exploration=1.0").create(), MctsSearcher)
+        with self.assertRaises(ValueError):
+            create_searcher({"algorithm" : "minimax"})
+
+        with self.assertRaises(ValueError):
+            MctsSearcher(rollout="heavy")
+
+
+if __name__ == '__main__':
+    unittest.main()
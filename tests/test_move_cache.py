@@ -0,0 +1,91 @@
+import unittest
+from fianchetto import BoardManager, Move
+from fianchetto.core.move_cache import MoveCache
+
+START = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+class TestMoveCache(unittest.TestCase):
+    def new_game(self, cache):
+        game = BoardManager()
+        game.move_cache = cache
+        game.load_fen(START)
+        return game
+
+    def test_legal_moves_hit(self):
+        cache = MoveCache()
+        game = self.new_game(cache)
+        first = game.legal_moves()
+        self.assertEqual(cache.misses, 1)
+
+        # A new board of the same position finds the moves too
+        second = self.new_game(cache).legal_moves()
+        self.assertEqual(first, second)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.hit_rate, 0.5)
+
+    def test_move_uses_cached_piece_moves(self):
+        cache = MoveCache()
+        game = self.new_game(cache)
+        game.legal_moves()
+        with self.assertRaises(ValueError):
+            game.move((4, 1), (4, 4))
+
+        with self.assertRaises(ValueError):
+            game.move((0, 0), (0, 2))
+
+        game.move((4, 1), (4, 3))
+        self.assertEqual(cache.hits, 3)
+        self.assertEqual(game.board[4][3].symbol, 'p')
+
+    def test_results_can_be_changed_by_caller(self):
+        cache = MoveCache()
+        game = self.new_game(cache)
+        game.legal_moves().clear()
+        game.piece_moves((6, 0)).clear()
+        self.assertEqual(len(game.legal_moves()), 20)
+        self.assertEqual(sorted(game.piece_moves((6, 0))), [(5, 2), (7, 2)])
+
+    def test_capacity(self):
+        cache = MoveCache(2)
+        game = self.new_game(cache)
+        for move in (Move((4, 1), (4, 3)), Move((4, 6), (4, 4))):
+            game.legal_moves()
+            game.make_move(move)
+
+        game.legal_moves()
+        self.assertEqual(len(cache), 2)
+
+    def test_free_move_discards_its_positions(self):
+        cache = MoveCache()
+        other = self.new_game(cache)
+        other.make_move(Move((4, 1), (4, 3)))
+        other.legal_moves()
+        game = self.new_game(cache)
+        game.legal_moves()
+        game._free_move((1, 0), (1, 4))
+        # Only the edited position is forgotten, not every position of every board
+        self.assertEqual(len(cache), 1)
+        self.assertIsNotNone(cache.legal_moves(other.zobrist_key()))
+        self.assertIn(Move((1, 4), (2, 6)), game.legal_moves())
+
+    def test_off_by_default(self):
+        self.assertIsNone(BoardManager().move_cache)
+        cache = MoveCache()
+        BoardManager(move_cache=cache).load_fen(START)
+        game = BoardManager()
+        game.load_fen(START)
+        game.legal_moves()
+        self.assertEqual(cache.hits + cache.misses, 0)
+
+    def test_not_used_in_debug(self):
+        cache = MoveCache()
+        game = BoardManager(True)
+        game.move_cache = cache
+        game.generate_starting_position()
+        game.legal_moves()
+        game.move((4, 1), (4, 3))
+        self.assertEqual(cache.hits + cache.misses, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import io
+import unittest
+from fianchetto import BoardManager
+from fianchetto.core.notation import san_to_move, uci_to_move, move_to_uci, move_to_san
+from fianchetto.core.pgn import format_pgn, iter_games
+from fianchetto.core.pieces import Color
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+PGN = b"""[Event "Test"]
+[Result "1-0"]
+
+1. e4 e5 2. Nf3 {a comment} Nc6 (2... d6 3. d4) 3. Bb5 a6 $1 4. O-O 1-0
+
+[Event "Second"]
+
+1. d4 d5 *
+"""
+
+class TestNotation(unittest.TestCase):
+    def test_starting_fen(self):
+        game = BoardManager()
+        game.generate_starting_position()
+        self.assertEqual(game.to_fen(), START_FEN)
+
+    def test_fen_round_trip(self):
+        fen = "r3k2r/pp1n1ppp/2p5/3pP3/8/8/PPP2PPP/R3K2R w Kq d6 0 12"
+        game = BoardManager()
+        game.load_fen(fen)
+        self.assertEqual(game.to_fen(), fen)
+        self.assertEqual(game.castling_rights(), "Kq")
+        self.assertEqual(game.en_passant_pos, (3, 4))
+
+    def test_fen_clocks(self):
+        game = BoardManager()
+        game.generate_starting_position()
+        game.move((6, 0), (5, 2))
+        game.move((6, 7), (5, 5))
+        self.assertEqual(game.to_fen().split()[-2:], ["2", "2"])
+
+    def test_zobrist_transposition(self):
+        first = BoardManager()
+        first.generate_starting_position()
+        first.move((6, 0), (5, 2))
+        first.move((6, 7), (5, 5))
+        first.move((1, 0), (2, 2))
+
+        second = BoardManager()
+        second.generate_starting_position()
+        second.move((1, 0), (2, 2))
+        second.move((6, 7), (5, 5))
+        second.move((6, 0), (5, 2))
+
+        self.assertEqual(first.zobrist_key(), second.zobrist_key())
+        self.assertNotEqual(first.zobrist_key(), BoardManager().zobrist_key())
+
+    def test_san(self):
+        game = BoardManager()
+        game.load_fen("r3k3/1P6/8/8/8/8/8/R3K1NR w KQq - 0 1")
+        self.assertEqual(san_to_move("Ra2", game), ((0, 0), (0, 1), None))
+        self.assertEqual(san_to_move("O-O-O", game), ((4, 0), (2, 0), None))
+        self.assertEqual(san_to_move("bxa8=N+", game), ((1, 6), (0, 7), "N"))
+
+        with self.assertRaises(ValueError):
+            san_to_move("Nf6", game)
+
+    def test_move_to_san(self):
+        game = BoardManager()
+        game.load_fen("r3k3/1P6/8/8/8/8/8/R3K1NR w KQq - 0 1")
+        self.assertEqual(move_to_san(((0, 0), (0, 1)), game), "Ra2")
+        self.assertEqual(move_to_san(((4, 0), (2, 0)), game), "O-O-O")
+        self.assertEqual(move_to_san(((1, 6), (0, 7), "N"), game), "bxa8=N")
+        self.assertEqual(move_to_san(((0, 0), (0, 7)), game), "Rxa8+")
+
+        game.load_fen("6k1/5ppp/8/8/8/8/8/R2R2K1 w - - 0 1")
+        self.assertEqual(move_to_san(((0, 0), (2, 0)), game), "Rac1")
+        self.assertEqual(move_to_san(((3, 0), (3, 7)), game), "Rd8#")
+
+    def test_format_pgn_round_trip(self):
+        text = format_pgn({"Event" : "Test"}, ["e5", "Nf3", "Nc6"], "*", 1, True)
+        self.assertEqual(text, '[Event "Test"]\n\n1... e5 2. Nf3 Nc6 *\n\n')
+        game = next(iter_games(io.BytesIO(text.encode())))
+        self.assertEqual(game.moves, ["e5", "Nf3", "Nc6"])
+
+    def test_uci(self):
+        self.assertEqual(uci_to_move("e7e8q"), ((4, 6), (4, 7), "Q"))
+        self.assertEqual(move_to_uci((6, 0), (5, 2)), "g1f3")
+
+    def test_pgn(self):
+        games = list(iter_games(io.BytesIO(PGN)))
+        self.assertEqual(len(games), 2)
+        self.assertEqual(games[0].moves, ["e4", "e5", "Nf3", "Nc6", "Bb5", "a6", "O-O"])
+        self.assertEqual(games[0].result, "1-0")
+        self.assertEqual(games[1].result, "*")
+        self.assertEqual(games[1].offset, PGN.index(b"[Event \"Second\"]"))
+
+        final = games[0].final_position()
+        self.assertEqual(type(final.board[6][0]).__name__, "King")
+        self.assertEqual(final.to_move, Color.BLACK)
+
+
+if __name__ == '__main__':
+    unittest.main()
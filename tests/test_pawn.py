@@ -169,6 +169,18 @@ class TestPawn(unittest.TestCase):
         self.assertEqual(game.en_passant, False)
         self.assertEqual(game.en_passant_pos, None)
 
+    def test_en_passant_cannot_expose_king(self):
+        # Taking en passant clears two squares of the rank, which can open it to a rook
+        game = BoardManager()
+        game.load_fen("8/8/8/K2pP2r/8/8/8/7k w - d6 0 1")
+        self.assertNotIn((3, 5), game.piece_moves((4, 4)))
+
+        game.load_fen("8/8/8/K2pP3/8/8/8/7k w - d6 0 1")
+        self.assertIn((3, 5), game.piece_moves((4, 4)))
+
+        game.load_fen("8/8/8/8/R2Pp2k/8/8/K7 b - d3 0 1")
+        self.assertNotIn((3, 2), game.piece_moves((4, 3)))
+
     def en_passant_black(self):
         game = BoardManager(True)
         self._genereate_pawns(game.board)
@@ -0,0 +1,63 @@
+import unittest
+from fianchetto import BoardManager, Move
+from fianchetto.core.pieces import Color
+from fianchetto.core.zobrist import compute_pawn_key
+from fianchetto.engine.pawns import (DOUBLED_PENALTY, ISOLATED_PENALTY, PASSED_BONUS, PawnTable, evaluate_pawns,
+                                     pawn_score)
+
+class TestPawns(unittest.TestCase):
+    def load(self, fen):
+        game = BoardManager()
+        game.load_fen(fen)
+        return game
+
+    def test_pawn_key_follows_moves(self):
+        game = self.load("r3k2r/1P6/8/3pP3/8/8/8/R3K2R w KQkq d6 0 1")
+        key = game.pawn_key()
+        for move in (Move((4, 4), (3, 5)), Move((1, 6), (0, 7), "N"), Move((1, 6), (1, 7), "Q"), Move((0, 0), (0, 4))):
+            game.make_move(move)
+            self.assertEqual(game.pawn_key(), compute_pawn_key(game), move)
+            game.unmake_move()
+            self.assertEqual(game.pawn_key(), key)
+
+        # Moves of other pieces leave it alone
+        game.make_move(Move((0, 0), (0, 4)))
+        self.assertEqual(game.pawn_key(), key)
+
+    def test_structure_terms(self):
+        # White: doubled and isolated pawns on the c file, an isolated passed pawn on h5. Black: an
+        # isolated pawn on d6 that stops the c pawns
+        entry = evaluate_pawns(self.load("4k3/8/3p4/7P/8/2P5/2P5/4K3 w - - 0 1").board)
+        self.assertEqual(entry.passed, (1 << (7 * 8 + 4), 0))
+        white = -DOUBLED_PENALTY - 2 * ISOLATED_PENALTY - ISOLATED_PENALTY + PASSED_BONUS[4]
+        black = -ISOLATED_PENALTY
+        self.assertEqual(entry.score, white - black)
+
+    def test_shield(self):
+        game = self.load("6k1/5ppp/8/8/8/8/5PPP/6K1 w - - 0 1")
+        entry = evaluate_pawns(game.board)
+        self.assertEqual(entry.shield(Color.WHITE, game.white_king_pos), 3)
+        self.assertEqual(entry.shield(Color.BLACK, game.black_king_pos), 3)
+        self.assertEqual(entry.shield(Color.WHITE, (1, 0)), 0)
+
+    def test_table_hits_and_fixed_size(self):
+        table = PawnTable(kilobytes=4)
+        game = self.load("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1")
+        score = pawn_score(game, table)
+        self.assertEqual(pawn_score(game, table), score)
+        self.assertEqual(pawn_score(game), score)
+        self.assertEqual((table.hits, table.misses), (1, 1))
+
+        for move in game.legal_moves():
+            game.make_move(move)
+            table.probe(game)
+            game.unmake_move()
+
+        stats = table.stats()
+        self.assertLessEqual(stats["used"], table.size)
+        self.assertEqual(stats["hits"] + stats["misses"], 22)
+        self.assertGreater(table.hit_rate, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
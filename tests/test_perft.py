@@ -0,0 +1,39 @@
+import unittest
+from fianchetto import BoardManager
+from fianchetto.core.perft import divide, perft
+
+# Reference positions with their known node counts
+POSITIONS = [("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1", 3, 8902),
+             ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", 2, 2039),
+             ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", 3, 2812),
+             ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", 2, 264),
+             ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", 2, 1486)]
+
+class TestPerft(unittest.TestCase):
+    def load(self, fen):
+        game = BoardManager()
+        game.load_fen(fen)
+        game.move_cache = None
+        return game
+
+    def test_reference_counts(self):
+        for fen, depth, nodes in POSITIONS:
+            game = self.load(fen)
+            self.assertEqual(perft(game, depth), nodes, fen)
+            self.assertEqual(game.to_fen(), fen)
+
+    def test_divide_sums_to_perft(self):
+        game = self.load(POSITIONS[0][0])
+        counts = divide(game, 2)
+        self.assertEqual(len(counts), 20)
+        self.assertEqual(sum(counts.values()), 400)
+
+    def test_en_passant_that_exposes_the_king(self):
+        # After e4, fxe3 would take both pawns off the fourth rank and leave the king facing the rook
+        game = self.load("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1")
+        game.move((4, 1), (4, 3))
+        self.assertNotIn((4, 2), game.piece_moves((5, 3)))
+
+
+if __name__ == '__main__':
+    unittest.main()
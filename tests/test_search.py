@@ -0,0 +1,113 @@
+import unittest
+from fianchetto import BoardManager, Move
+from fianchetto.core.zobrist import compute_key
+from fianchetto.engine import Searcher, SearchLimits
+
+class TestMakeUnmake(unittest.TestCase):
+    def test_unmake_restores_position(self):
+        game = BoardManager()
+        game.load_fen("r3k2r/1P6/8/3pP3/8/8/8/R3K2R w KQkq d6 0 1")
+        fen = game.to_fen()
+        key = game.zobrist_key()
+
+        for move in (Move((4, 4), (3, 5)), Move((4, 0), (6, 0)), Move((1, 6), (0, 7), "N"), Move((0, 0), (0, 7))):
+            game.make_move(move)
+            self.assertEqual(game.zobrist_key(), compute_key(game))
+            game.unmake_move()
+            self.assertEqual(game.to_fen(), fen)
+            self.assertEqual(game.zobrist_key(), key)
+
+    def test_en_passant_capture(self):
+        game = BoardManager()
+        game.load_fen("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1")
+        game.move((4, 4), (3, 5))
+        self.assertIsNone(game.board[3][4])
+        self.assertEqual(type(game.board[3][5]).__name__, "Pawn")
+
+    def test_push_next_to_en_passant_pawn(self):
+        game = BoardManager()
+        game.load_fen("4k3/4p3/8/3pP3/8/8/8/4K3 w - d6 0 1")
+        game.move((4, 0), (3, 0))
+        game.move((4, 6), (4, 5))
+        self.assertIsNotNone(game.board[4][4])
+
+    def test_null_move(self):
+        game = BoardManager()
+        game.load_fen("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1")
+        fen = game.to_fen()
+        key = game.zobrist_key()
+        game.make_null_move()
+        self.assertEqual(game.zobrist_key(), compute_key(game))
+        self.assertFalse(game.en_passant)
+        self.assertIsNone(game.unmake_move())
+        self.assertEqual(game.to_fen(), fen)
+        self.assertEqual(game.zobrist_key(), key)
+
+
+class TestSearch(unittest.TestCase):
+    def test_mate_in_one(self):
+        game = BoardManager()
+        game.load_fen("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+        result = Searcher().search(game, SearchLimits(depth=2))
+        self.assertEqual(result.best_move, Move((0, 0), (0, 7)))
+        self.assertEqual(game.to_fen(), "6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+
+    def test_wins_material(self):
+        game = BoardManager()
+        game.load_fen("4k3/8/8/3q4/8/8/8/3RK3 w - - 0 1")
+        result = Searcher().search(game, SearchLimits(depth=1))
+        self.assertEqual(result.best_move, Move((3, 0), (3, 4)))
+
+    def test_no_moves(self):
+        game = BoardManager()
+        game.load_fen("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1")
+        result = Searcher().search(game, SearchLimits(depth=3))
+        self.assertIsNone(result.best_move)
+        self.assertEqual(result.score, 0)
+
+    def test_each_feature_can_be_switched_off(self):
+        features = ("pvs", "aspiration", "null_move", "lmr", "futility", "attack_maps")
+        fen = "r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4"
+        for feature in features + (None,):
+            game = BoardManager()
+            game.load_fen(fen)
+            result = Searcher(**{feature : False} if feature else {}).search(game, SearchLimits(depth=3))
+            self.assertEqual(result.best_move, Move((7, 4), (5, 6)), feature)
+            self.assertEqual(game.to_fen(), fen)
+
+    def test_features_save_nodes(self):
+        fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        nodes = []
+        for enabled in (True, False):
+            game = BoardManager()
+            game.load_fen(fen)
+            searcher = Searcher(pvs=enabled, aspiration=enabled, null_move=enabled, lmr=enabled, futility=enabled)
+            nodes.append(searcher.search(game, SearchLimits(depth=3)).nodes)
+
+        self.assertLess(nodes[0], nodes[1])
+
+    def test_attack_maps_during_search(self):
+        # The mobility and king safety terms of the evaluation need the maps
+        game = BoardManager()
+        game.generate_starting_position()
+        seen = []
+        Searcher().search(game, SearchLimits(depth=2), lambda info: seen.append(game.attacks is not None))
+        self.assertEqual(seen, [True, True])
+        self.assertIsNone(game.attacks)
+
+        game.enable_attack_maps()
+        Searcher(attack_maps=False).search(game, SearchLimits(depth=1))
+        self.assertIsNotNone(game.attacks)
+
+    def test_node_limit(self):
+        game = BoardManager()
+        game.generate_starting_position()
+        searcher = Searcher()
+        result = searcher.search(game, SearchLimits(nodes=300))
+        self.assertIsNotNone(result.best_move)
+        self.assertLess(searcher.nodes, 300 + 256)
+        self.assertEqual(len(game.history), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
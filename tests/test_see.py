@@ -0,0 +1,56 @@
+import unittest
+from fianchetto import BoardManager, Move
+
+class TestSee(unittest.TestCase):
+    def load(self, fen):
+        game = BoardManager()
+        game.load_fen(fen)
+        return game
+
+    def test_undefended_and_defended_captures(self):
+        game = self.load("4k3/8/8/4p3/8/8/8/4R1K1 w - - 0 1")
+        self.assertEqual(game.see(Move((4, 0), (4, 4))), 1)
+
+        game = self.load("4k3/8/3p4/4p3/8/8/8/4R1K1 w - - 0 1")
+        self.assertEqual(game.see(Move((4, 0), (4, 4))), -4)
+
+    def test_x_ray_behind_the_first_attacker(self):
+        # The rook on e1 takes back through the rook on e2 once that one has gone to e5
+        game = self.load("4r1k1/8/8/4p3/8/8/4R3/4R1K1 w - - 0 1")
+        self.assertEqual(game.see(Move((4, 1), (4, 4))), 1)
+
+        # The queen behind the bishop takes back the pawn that took the bishop
+        game = self.load("6k1/8/5p2/4p3/8/8/1B6/Q5K1 w - - 0 1")
+        self.assertEqual(game.see(Move((1, 1), (4, 4))), -1)
+
+    def test_king_does_not_take_a_defended_piece(self):
+        game = self.load("4k3/3p4/8/8/8/8/3R4/3R2K1 w - - 0 1")
+        self.assertEqual(game.see(Move((3, 1), (3, 6))), 1)
+
+    def test_quiet_move_and_en_passant(self):
+        game = self.load("4k3/8/1p6/8/8/8/8/R3K3 w - - 0 1")
+        self.assertEqual(game.see(Move((0, 0), (0, 4))), -5)
+        self.assertEqual(game.see(Move((0, 0), (0, 1))), 0)
+
+        game = self.load("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1")
+        self.assertEqual(game.see(Move((4, 4), (3, 5))), 1)
+
+    def test_board_is_not_changed(self):
+        fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        game = self.load(fen)
+        for move in game.legal_moves():
+            game.see(move)
+
+        self.assertEqual(game.to_fen(), fen)
+        self.assertEqual(game.history, [])
+
+    def test_losing_captures_are_ordered_last_or_left_out(self):
+        game = self.load("4k3/8/3p4/4p3/8/8/1B6/4R1K1 w - - 0 1")
+        losing = Move((4, 0), (4, 4))
+        staged = list(game.staged_moves(captures_only=True))
+        self.assertEqual(staged, [Move((1, 1), (4, 4)), losing])
+        self.assertNotIn(losing, list(game.staged_moves(captures_only=True, losing_captures=False)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import asyncio
+import json
+import unittest
+from fianchetto.server import GameServer
+from fianchetto.server.load_test import run_load_test
+
+class TestServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = GameServer(workers=0, max_games=3)
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def test_play_to_checkmate(self):
+        game = (await self.server.handle({"op" : "create"}))["game"]
+        for move in ("f2f3", "e7e5", "g2g4"):
+            response = await self.server.handle({"op" : "move", "game" : game, "move" : move})
+            self.assertTrue(response["ok"])
+
+        response = await self.server.handle({"op" : "move", "game" : game, "move" : "d8h4", "id" : 7})
+        self.assertEqual(response["status"], "checkmate")
+        self.assertEqual(response["winner"], "black")
+        self.assertEqual(response["id"], 7)
+
+        response = await self.server.handle({"op" : "legal_moves", "game" : game})
+        self.assertEqual(response["moves"], [])
+
+    async def test_errors(self):
+        game = (await self.server.handle({"op" : "create"}))["game"]
+        response = await self.server.handle({"op" : "move", "game" : game, "move" : "e2e5"})
+        self.assertFalse(response["ok"])
+
+        response = await self.server.handle({"op" : "state", "game" : "missing"})
+        self.assertFalse(response["ok"])
+
+        response = await self.server.handle({"op" : "fly"})
+        self.assertFalse(response["ok"])
+
+        for game_id in ([game], {"id" : game}, None):
+            response = await self.server.handle({"op" : "state", "game" : game_id})
+            self.assertEqual(response, {"ok" : False, "error" : "The game has to be a string"})
+
+    async def test_resign(self):
+        game = (await self.server.handle({"op" : "create"}))["game"]
+        response = await self.server.handle({"op" : "resign", "game" : game})
+        self.assertEqual(response["winner"], "black")
+        self.assertFalse((await self.server.handle({"op" : "move", "game" : game, "move" : "e2e4"}))["ok"])
+
+    async def test_eviction(self):
+        ids = [(await self.server.handle({"op" : "create"}))["game"] for _ in range(4)]
+        self.assertNotIn(ids[0], self.server.games)
+        self.assertEqual(len(self.server.games), 3)
+
+        self.server.idle_timeout = 0
+        self.assertEqual(self.server.evict_idle(), 3)
+
+    async def test_overlong_line(self):
+        port = await self.server.start("127.0.0.1", 0)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b'{"op" : "' + b"x" * 100_000 + b'"}\n')
+        await writer.drain()
+        response = json.loads(await reader.readline())
+        self.assertEqual(response, {"ok" : False, "error" : "Request line is too long"})
+        self.assertEqual(await reader.read(), b"")
+        writer.close()
+
+        # The server keeps serving other clients
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b'{"op" : "create"}\n')
+        await writer.drain()
+        self.assertTrue(json.loads(await reader.readline())["ok"])
+        writer.close()
+
+    async def test_load_test_over_socket(self):
+        port = await self.server.start("127.0.0.1", 0)
+        self.server.max_games = 100
+        report = await run_load_test("127.0.0.1", port, clients=4, plies=3)
+        self.assertEqual(report.moves, 12)
+        self.assertEqual(report.errors, 0)
+        self.assertGreater(report.percentile(0.99), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
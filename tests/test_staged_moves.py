@@ -0,0 +1,75 @@
+import unittest
+from unittest import mock
+from fianchetto import BoardManager, Move
+
+POSITIONS = ["rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+             "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+             "r3k2r/1P6/8/3pP3/8/8/8/R3K2R w KQkq d6 0 1",
+             "4k3/8/8/8/8/8/4r3/R3K3 w Q - 0 1",
+             "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1"]
+
+class TestStagedMoves(unittest.TestCase):
+    def load(self, fen):
+        game = BoardManager()
+        game.load_fen(fen)
+        return game
+
+    def test_same_moves_as_legal_moves(self):
+        for fen in POSITIONS:
+            game = self.load(fen)
+            staged = list(game.staged_moves())
+            self.assertEqual(len(staged), len(set(staged)), fen)
+            self.assertEqual(set(staged), set(game.legal_moves()), fen)
+
+    def test_hash_move_first(self):
+        game = self.load(POSITIONS[0])
+        hash_move = Move((6, 0), (5, 2))
+        self.assertEqual(next(game.staged_moves(hash_move)), hash_move)
+        self.assertEqual(list(game.staged_moves(hash_move)).count(hash_move), 1)
+
+    def test_illegal_hash_move_is_skipped(self):
+        game = self.load(POSITIONS[0])
+        self.assertNotIn(Move((4, 0), (4, 2)), list(game.staged_moves(Move((4, 0), (4, 2)))))
+
+    def test_captures_before_quiets(self):
+        game = self.load(POSITIONS[1])
+        staged = list(game.staged_moves())
+        captures = [game.is_capture(move) or move.promotion == "Q" for move in staged]
+        self.assertEqual(captures, sorted(captures, reverse=True))
+
+        # Captures of the most valuable piece come first
+        victims = [game.board[move.end[0]][move.end[1]].value for move in staged if game.board[move.end[0]][move.end[1]]]
+        self.assertEqual(victims[0], max(victims))
+
+    def test_killers_after_captures(self):
+        game = self.load(POSITIONS[1])
+        killer = Move((0, 1), (0, 2))
+        staged = list(game.staged_moves(killers=(killer, None)))
+        first_quiet = next(i for i, move in enumerate(staged) if not game.is_capture(move))
+        self.assertEqual(staged[first_quiet], killer)
+
+    def test_captures_only(self):
+        game = self.load(POSITIONS[2])
+        staged = list(game.staged_moves(captures_only=True))
+        self.assertIn(Move((4, 4), (3, 5)), staged)
+        self.assertIn(Move((1, 6), (1, 7), "Q"), staged)
+        self.assertNotIn(Move((1, 6), (1, 7), "N"), staged)
+        self.assertTrue(all(game.is_capture(move) or move.promotion == "Q" for move in staged))
+
+    def test_check_evasions(self):
+        game = self.load(POSITIONS[3])
+        game.check = game.to_move
+        self.assertEqual(set(game.staged_moves()), set(game.legal_moves()))
+        self.assertNotIn(Move((4, 0), (2, 0)), list(game.staged_moves()))
+
+    def test_quiet_checks_first_and_lazily(self):
+        game = self.load("4k3/8/8/8/8/8/8/R3K3 w - - 0 1")
+        staged = list(game.staged_moves())
+        self.assertEqual(staged[0], Move((0, 0), (0, 7)))
+        self.assertFalse(any(game.gives_check(move) for move in staged[1:]))
+
+        # Pulling the check tests the ten rook moves at most, never the king's five
+        with mock.patch.object(game, "gives_check", wraps=game.gives_check) as gives_check:
+            self.assertEqual(next(game.staged_moves()), Move((0, 0), (0, 7)))
+
+        self.assertLessEqual(gives_check.call_count, 10)
@@ -0,0 +1,88 @@
+import io
+import itertools
+import unittest
+from unittest import mock
+from fianchetto import BoardManager, Move
+from fianchetto.core.pgn import iter_games
+from fianchetto.engine import Searcher, SearchLimits, time_manager
+from fianchetto.engine.time_manager import TimeManager, simulate_game
+
+PGN = b"""[Event "Clock"]
+
+1. e4 e5 2. Nf3 Nc6 3. Bb5 a6 *
+"""
+
+class TestTimeManager(unittest.TestCase):
+    def test_limits(self):
+        manager = TimeManager(60, 1, overhead=0)
+        self.assertGreater(manager.soft_limit, 1)
+        self.assertLessEqual(manager.soft_limit, manager.hard_limit)
+        self.assertLessEqual(manager.hard_limit, 60 * 0.4)
+
+    def test_last_move_before_control(self):
+        manager = TimeManager(10, moves_to_go=1, overhead=0)
+        self.assertAlmostEqual(manager.hard_limit, 9)
+
+    def test_unstable_move_extends(self):
+        manager = TimeManager(60)
+        manager.iteration_finished(2, 10, Move((4, 1), (4, 3)))
+        manager.iteration_finished(3, 10, Move((3, 1), (3, 3)))
+        self.assertGreater(manager.scale, 1)
+
+        scale = manager.scale
+        manager.iteration_finished(4, -50, Move((3, 1), (3, 3)))
+        self.assertGreater(manager.scale, scale)
+
+    def test_should_stop(self):
+        manager = TimeManager(0)
+        self.assertTrue(manager.should_stop())
+
+    def test_fake_clock(self):
+        now = [100.0]
+        manager = TimeManager(60, clock=lambda: now[0])
+        self.assertFalse(manager.should_stop())
+        now[0] += manager.soft_limit
+        self.assertAlmostEqual(manager.elapsed(), manager.soft_limit)
+        self.assertTrue(manager.should_stop())
+
+    def test_search_on_fake_clock(self):
+        # The search reads the clock at every node, so each node takes a millisecond of simulated time
+        ticks = itertools.count()
+        manager = TimeManager(2.0, overhead=0, clock=lambda: next(ticks) * 0.001)
+        game = BoardManager()
+        game.generate_starting_position()
+        result = Searcher().search(game, SearchLimits(time_manager=manager))
+        self.assertIsNotNone(result.best_move)
+        self.assertLessEqual(manager.elapsed(), manager.hard_limit + 0.002)
+
+    def test_simulation_keeps_time(self):
+        managers = []
+
+        class Recorded(TimeManager):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                managers.append(self)
+
+        def simulate() -> list:
+            ticks = itertools.count()
+            game = next(iter_games(io.BytesIO(PGN)))
+            with mock.patch.object(time_manager, "TimeManager", Recorded):
+                return simulate_game(game, 1.0, 0.01, clock=lambda: next(ticks) * 0.001)
+
+        reports = simulate()
+        used = [spent for report in reports for spent in report.used]
+        self.assertEqual(len(used), 6)
+        for spent, manager in zip(used, managers[0::2] + managers[1::2]):
+            self.assertLessEqual(spent, manager.hard_limit + 0.002)
+
+        for report in reports:
+            self.assertEqual(report.moves, 3)
+            self.assertFalse(report.flagged)
+            self.assertAlmostEqual(report.remaining, 1.0 + 3 * 0.01 - sum(report.used))
+
+        # Simulated time does not depend on how busy the machine is
+        self.assertEqual(simulate(), reports)
+
+
+if __name__ == '__main__':
+    unittest.main()
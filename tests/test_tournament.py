@@ -0,0 +1,91 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from fianchetto.cli.main_cli import main
+from fianchetto.core.pgn import iter_games
+from fianchetto.engine.tournament import (EngineConfig,
+                                          MatchScore,
+                                          Opening,
+                                          elo_difference,
+                                          load_openings,
+                                          play_game,
+                                          run_tournament,
+                                          score_of,
+                                          sprt)
+
+class TestTournament(unittest.TestCase):
+    def test_engine_config(self):
+        config = EngineConfig.parse("big:hash_mb=32")
+        self.assertEqual(config, EngineConfig("big", {"hash_mb" : 32}))
+        self.assertEqual(config.create().tt.capacity, EngineConfig("x", {"hash_mb" : 32}).create().tt.capacity)
+        self.assertEqual(EngineConfig.parse("tree:algorithm=mcts,workers=0").options["workers"], 0)
+
+    def test_unknown_engine_option(self):
+        for text in ("a:hash=32", "a:algorithm=mcts,hash_mb=32", "a:algorithm=minimax"):
+            with self.assertRaises(ValueError):
+                EngineConfig.parse(text)
+
+        errors = io.StringIO()
+        with redirect_stderr(errors), self.assertRaises(SystemExit) as exit:
+            main(["tournament", "--first", "a:nullmove=false", "--games", "1"])
+
+        self.assertEqual(exit.exception.code, 2)
+        self.assertIn("Unknown alphabeta option nullmove", errors.getvalue())
+
+    def test_play_game_from_book(self):
+        opening = Opening("6k1/5ppp/8/8/8/8/8/R5K1 b - - 0 1", ["h6"])
+        record = play_game(3, opening, EngineConfig("a"), EngineConfig("b"), nodes=400)
+        game = next(iter_games(io.BytesIO(record.pgn.encode())))
+        self.assertEqual(game.headers["FEN"], opening.fen)
+        self.assertEqual(game.moves[0], "h6")
+        self.assertEqual(game.result, record.result)
+        self.assertEqual(game.headers["Round"], "4")
+
+        # The replayed game reaches the same end
+        final = game.final_position()
+        self.assertIsNotNone(final)
+
+    def test_match_streams_pgn(self):
+        output = io.StringIO()
+        finished = []
+        records = run_tournament(EngineConfig("a"), EngineConfig("b"), [Opening("7k/8/8/8/8/8/8/K5Q1 w - - 0 1")],
+                                 2, workers=0, nodes=300, output=output, on_game=finished.append, max_plies=6)
+        self.assertEqual(len(records), 2)
+        self.assertEqual(finished, records)
+        self.assertEqual({(r.white, r.black) for r in records}, {("a", "b"), ("b", "a")})
+        self.assertEqual(len(list(iter_games(io.BytesIO(output.getvalue().encode())))), 2)
+
+        score = score_of(records, "a")
+        self.assertEqual(score.games, 2)
+
+    def test_needs_budget(self):
+        with self.assertRaises(ValueError):
+            run_tournament(EngineConfig("a"), EngineConfig("b"), [], 2, workers=0)
+
+    def test_load_openings(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "suite.epd")
+            with open(path, "w") as stream:
+                stream.write("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - bm e5; id \"1\";\n\n")
+                stream.write("7k/8/8/8/8/8/8/K6Q w - - 3 40\n")
+
+            openings = load_openings(path)
+
+        self.assertEqual(openings[0].fen, "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1")
+        self.assertEqual(openings[1].fen, "7k/8/8/8/8/8/8/K6Q w - - 3 40")
+
+    def test_statistics(self):
+        elo, margin = elo_difference(MatchScore(60, 40, 100))
+        self.assertAlmostEqual(elo, 34.9, places=1)
+        self.assertGreater(margin, 0)
+        self.assertEqual(elo_difference(MatchScore(50, 50, 0))[0], 0)
+
+        self.assertEqual(sprt(MatchScore(600, 400, 1000)).decision, "H1")
+        self.assertEqual(sprt(MatchScore(400, 600, 1000)).decision, "H0")
+        self.assertIsNone(sprt(MatchScore(5, 5, 10)).decision)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import threading
+import time
+import unittest
+from unittest import mock
+from fianchetto.cli.uci import UciEngine
+
+class TestUci(unittest.TestCase):
+    def setUp(self):
+        self.lines = []
+        self.engine = UciEngine(self.lines.append)
+
+    def test_handshake(self):
+        self.engine.handle("uci")
+        self.engine.handle("isready")
+        self.assertIn("uciok", self.lines)
+        self.assertEqual(self.lines[-1], "readyok")
+
+    def test_search_options(self):
+        self.engine.handle("uci")
+        self.assertIn("option name NullMove type check default true", self.lines)
+        self.engine.handle("setoption name NullMove value false")
+        self.engine.handle("setoption name Hash value 8")
+        self.assertFalse(self.engine.searcher.null_move)
+        self.assertTrue(self.engine.searcher.lmr)
+
+    def test_position_and_go(self):
+        self.engine.handle("position startpos moves e2e4 e7e5")
+        self.assertEqual(self.engine.game.to_fen(), "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2")
+
+        self.engine.handle("position fen 6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+        self.engine.handle("go depth 2")
+        self.engine.wait()
+        self.assertTrue(any(line.startswith("info depth 1") for line in self.lines))
+        self.assertEqual(self.lines[-1].split()[:2], ["bestmove", "a1a8"])
+
+    def test_infinite_waits_for_stop(self):
+        self.engine.handle("position startpos")
+        self.engine.handle("go infinite")
+        self.engine.handle("isready")
+        self.assertIn("readyok", self.lines)
+        self.engine.handle("stop")
+        self.assertTrue(self.lines[-1].startswith("bestmove"))
+
+    def test_stop_right_after_go(self):
+        # The search thread starts late, the stop sent before it gets going must still end the search
+        search = self.engine.searcher.search
+
+        def late_search(*args):
+            time.sleep(0.05)
+            return search(*args)
+
+        def go_and_stop():
+            self.engine.handle("go infinite")
+            self.engine.handle("stop")
+
+        self.engine.handle("position startpos")
+        with mock.patch.object(self.engine.searcher, "search", late_search):
+            thread = threading.Thread(target=go_and_stop, daemon=True)
+            thread.start()
+            thread.join(10)
+
+        self.assertFalse(thread.is_alive())
+        self.assertTrue(self.lines[-1].startswith("bestmove"))
+
+    def test_ponderhit(self):
+        self.engine.handle("position startpos moves e2e4")
+        self.engine.handle("go ponder wtime 1000 btime 1000 depth 1")
+        self.engine.handle("ponderhit")
+        self.engine.wait()
+        self.assertTrue(self.lines[-1].startswith("bestmove"))
+
+    def test_clock(self):
+        self.engine.handle("position startpos")
+        self.engine.handle("go wtime 300 btime 300")
+        self.engine.wait()
+        self.assertTrue(self.lines[-1].startswith("bestmove"))
+
+    def test_bad_position(self):
+        self.engine.handle("position startpos moves e2e5")
+        self.assertTrue(self.lines[-1].startswith("info string"))
+
+
+if __name__ == '__main__':
+    unittest.main()
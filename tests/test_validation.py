@@ -0,0 +1,127 @@
+import os
+import tempfile
+import unittest
+from fianchetto import BoardManager, InvalidPositionError
+from fianchetto.core.pgn import PgnGame
+from fianchetto.core.pieces import Color, King, Knight, Pawn, Queen, Rook
+from fianchetto.data import DatasetWriter
+
+VALID = ["rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+         "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+         "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3",
+         "4k3/8/8/8/1b6/8/8/4K2R w - - 0 1"]
+
+
+def load(fen: str) -> BoardManager:
+    game = BoardManager()
+    game.load_fen(fen)
+    return game
+
+
+class TestValidation(unittest.TestCase):
+    def test_valid_positions(self):
+        for fen in VALID:
+            game = load(fen)
+            self.assertEqual(game.validation_errors(), [], fen)
+            game.validate()
+
+    def test_invalid_positions(self):
+        cases = {"4k3/8/8/8/8/8/8/8 w - - 0 1" : "White has 0 kings",
+                 "4k3/8/8/8/8/8/8/3KK3 w - - 0 1" : "White has 2 kings",
+                 "4k3/8/8/8/8/8/8/P3K3 w - - 0 1" : "Pawn on the back rank on a1",
+                 "8/8/8/8/8/8/3k4/4K3 w - - 0 1" : "The kings are next to each other",
+                 "4k3/8/8/8/8/8/8/4R1K1 w - - 0 1" : "The side not to move is in check"}
+        for fen, problem in cases.items():
+            game = load(fen)
+            self.assertIn(problem, game.validation_errors(), fen)
+            with self.assertRaises(InvalidPositionError) as error:
+                game.validate()
+
+            self.assertIn(problem, error.exception.problems)
+            with self.assertRaises(ValueError):
+                BoardManager().load_fen(fen, validate=True)
+
+    def test_castling_and_en_passant(self):
+        game = load("4k3/8/8/8/8/8/8/R3K3 w Q - 0 1")
+        game.board[4][0] = None
+        game.board[5][0] = King(Color.WHITE)
+        game.sync()
+        self.assertEqual(game.validation_errors(), ["Unmoved king away from its starting square on f1"])
+
+        game = load(VALID[2])
+        game.en_passant_pos = (5, 3)
+        self.assertEqual(game.validation_errors(), ["No pawn that just moved two squares on f4"])
+
+        game = load(VALID[2])
+        game.board[5][5] = Queen(Color.WHITE)
+        self.assertIn("The squares the pawn on f5 passed are not empty", game.validation_errors())
+
+    def test_castling_rights_need_a_rook(self):
+        # A knight in the corner used to take the rook's part: e1g1 gave 5NK1
+        for fen in ("4k3/8/8/8/8/8/8/4K2N w K - 0 1", "4k3/8/8/8/8/8/8/4K2r w K - 0 1",
+                    "4k3/8/8/8/8/8/8/3K3R w K - 0 1"):
+            with self.assertRaises(ValueError):
+                BoardManager().load_fen(fen, validate=True)
+
+        game = BoardManager(debug=True)
+        game.board[4][0] = King(Color.WHITE)
+        game.board[7][0] = Knight(Color.WHITE)
+        game.board[4][7] = King(Color.BLACK, True)
+        game.sync()
+        self.assertIn("The unmoved piece on h1 can castle but is not a rook of the king's color",
+                      game.validation_errors())
+        self.assertEqual(game.board[4][0].castling(game), [])
+
+    def test_en_passant_field(self):
+        for fen, problem in (("4k3/8/8/8/4P3/8/8/4K3 w - e3 0 1",
+                              "En passant square e3 is on the wrong rank for the side to move"),
+                             ("4k3/8/8/4P3/8/8/8/4K3 w - d6 0 1", "No pawn that just moved two squares on d5"),
+                             ("4k3/3n4/8/3pP3/8/8/8/4K3 w - d6 0 1",
+                              "The squares the pawn on d5 passed are not empty")):
+            with self.assertRaises(InvalidPositionError) as error:
+                BoardManager().load_fen(fen, validate=True)
+
+            self.assertEqual(error.exception.problems, [problem])
+
+        # Without a pawn to take the field is ignored when not validating
+        self.assertFalse(load("4k3/8/8/4P3/8/8/8/4K3 w - d6 0 1").en_passant)
+        game = BoardManager()
+        game.load_fen(VALID[2], validate=True)
+        self.assertTrue(game.en_passant)
+
+    def test_sync_hand_built_board(self):
+        game = BoardManager(debug=True)
+        game.board[6][0] = King(Color.WHITE, True)
+        game.board[4][7] = King(Color.BLACK, True)
+        game.board[6][6] = Rook(Color.BLACK, True)
+        game.board[0][1] = Pawn(Color.WHITE)
+        self.assertIn("White king field points at (4, 0) but the king is on (6, 0)", game.validation_errors())
+
+        game.sync()
+        self.assertEqual(game.white_king_pos, (6, 0))
+        self.assertEqual(game.check, Color.WHITE)
+        self.assertEqual(game.validation_errors(), [])
+        self.assertEqual(game.to_fen(), "4k3/6r1/8/8/8/8/P7/6K1 w - - 0 1")
+        self.assertEqual(game.zobrist_key(), load(game.to_fen()).zobrist_key())
+
+        game.board[6][6] = None
+        self.assertEqual(game.validation_errors(), ["The check flag does not match the board"])
+        game.sync()
+        self.assertIsNone(game.check)
+
+    def test_imports_validate(self):
+        with self.assertRaises(ValueError):
+            PgnGame({"FEN" : "4k3/8/8/8/8/8/8/4R1K1 w - - 0 1"}, [], "*").start_position()
+
+        with tempfile.TemporaryDirectory() as directory:
+            fen_path = os.path.join(directory, "positions.fen")
+            with open(fen_path, "w") as stream:
+                stream.write(VALID[0] + "\n4k3/8/8/8/8/8/8/P3K3 w - - 0 1\n")
+
+            with DatasetWriter(os.path.join(directory, "positions.fpds")) as writer:
+                with self.assertRaises(InvalidPositionError):
+                    writer.add_fen_file(fen_path)
+
+
+if __name__ == '__main__':
+    unittest.main()